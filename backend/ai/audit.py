@@ -0,0 +1,349 @@
+"""
+audit.py — Background whole-manuscript consistency audits.
+
+The interactive paths only check paragraphs as they are written or edited,
+so a contradiction between chapter 3 and chapter 40 is never reported once
+both are stored. An audit re-checks every chapter of a script — or of every
+script in a project — against its story bible:
+
+    1. sync        bring the script's bible in line with its saved content
+                   (update_knowledge_graph at background priority)
+    2. scan        one "contradictions" task per chapter (check_document on the
+                   chapter's paragraphs), all against the bible version read
+                   once after the sync — workers check against their cached
+                   replica of it (bible_replica.py), so each worker is sent
+                   the bible at most once per script; flags are upserted into
+                   `contradictions` (contradiction_store.py), tagged with the
+                   audit id and the chapter's number in the audit
+    3. checkpoint  after every chapter, on the job document
+
+    audit_jobs  {_id, scope, target_id, script_ids, status, plan, found,
+                 cursor {script, scene, chapter},
+                 progress {scripts_done, chapters_done, chapters_total},
+                 owner, lease_until, error, created_at, updated_at, finished_at}
+
+Status: queued → running → done | failed | cancelled.
+
+All NLP goes through nlp_executor.run_background, so an audit only takes an
+idle worker and interactive requests keep priority. A job is leased by the
+API process running it and the lease is renewed while it runs; jobs whose
+lease has expired (the process stopped or died) are resumed from their
+checkpoint when an API process starts. Flags are upserted by fingerprint, so
+a chapter scanned again after a crash never duplicates them. Progress and flags are read back from MongoDB by
+`audit_events`, so any API process can stream a job another one is running.
+"""
+
+import os
+import re
+import html
+import json
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from config.db import get_database
+from services.kg_scenes import split_scenes
+from services.contradiction_store import save_flags
+from services.kg_store import replica_source
+from ai.flow import check_contradictions, update_knowledge_graph
+
+logger = logging.getLogger(__name__)
+
+# Audits running at once in one API process; the rest wait as "queued"
+AUDIT_MAX_JOBS = int(os.getenv("AUDIT_MAX_JOBS", "1"))
+AUDIT_LEASE_SECONDS = float(os.getenv("AUDIT_LEASE_SECONDS", "60"))
+# How often the event stream polls the job document
+AUDIT_POLL_SECONDS = float(os.getenv("AUDIT_POLL_SECONDS", "1"))
+
+ACTIVE = ("queued", "running")
+FINISHED = ("done", "failed", "cancelled")
+
+_JOB_FIELDS = {"owner": 0, "lease_until": 0, "cursor": 0, "plan": 0}
+
+# Block elements end a line in the editor's innerText, which is what the analysis routes receive
+_BLOCK_RE = re.compile(r"<\s*(?:br|hr|/?(?:p|div|h[1-6]|li|blockquote))\b[^>]*>", re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+# ── Pure helpers ──────────────────────────────────────────────────────────────
+
+def plain_text(content: str) -> str:
+    """Saved editor HTML → plain text, one line per block (so paragraph hashes match the editor's)."""
+    return html.unescape(_TAG_RE.sub("", _BLOCK_RE.sub("\n", content or "")))
+
+
+def audit_chapters(text: str) -> List[dict]:
+    """The chapters / scenes an audit scans, each with its paragraphs as (offset, text) spans."""
+    return [
+        {"scene": scene["scene"], "title": scene["title"], "paragraphs": list(zip(scene["offsets"], scene["paragraphs"]))}
+        for scene in split_scenes(text)
+    ]
+
+
+def resume_index(chapters: List[dict], cursor: dict) -> int:
+    """
+    First chapter of the checkpointed script still to scan: the one after the
+    last scanned scene if it still exists, else by count (the text changed).
+    """
+    last = cursor.get("scene")
+    if last is not None:
+        for position, chapter in enumerate(chapters):
+            if chapter["scene"] == last:
+                return position + 1
+    return min(cursor.get("chapter", 0), len(chapters))
+
+
+def chapters_scanned(plan: List[int], script: int, chapter: int) -> int:
+    """Chapters of the audit scanned at cursor (script, chapter): the earlier scripts' and `chapter` of this one."""
+    return sum(plan[:script]) + chapter
+
+
+def sse_event(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    """One text/event-stream message."""
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _public(job: dict) -> dict:
+    job = {k: v for k, v in job.items() if k not in _JOB_FIELDS}
+    job["_id"] = str(job["_id"])
+    return job
+
+
+class _Stopped(Exception):
+    """The job was cancelled, or its lease was lost to another process."""
+
+
+# ── Jobs ──────────────────────────────────────────────────────────────────────
+
+async def create_audit(scope: str, target_id: str, script_ids: List[str]) -> dict:
+    """
+    Queue an audit of `script_ids` (in manuscript order) and start it. An audit
+    of the same target that is still queued or running is returned instead.
+    """
+    db = get_database()
+    existing = await db["audit_jobs"].find_one({"scope": scope, "target_id": target_id, "status": {"$in": list(ACTIVE)}})
+    if existing:
+        return _public(existing)
+
+    now = datetime.utcnow()
+    job = {
+        "scope": scope,
+        "target_id": target_id,
+        "script_ids": script_ids,
+        "status": "queued",
+        "plan": [0] * len(script_ids),
+        "cursor": {"script": 0, "scene": None, "chapter": 0},
+        "progress": {"scripts_done": 0, "chapters_done": 0, "chapters_total": 0},
+        "found": 0,
+        "owner": None,
+        "lease_until": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None,
+    }
+    result = await db["audit_jobs"].insert_one(job)
+    job["_id"] = result.inserted_id
+    audit_runner.start(str(result.inserted_id))
+    return _public(job)
+
+
+async def get_audit(job_id: str) -> Optional[dict]:
+    if not ObjectId.is_valid(job_id):
+        return None
+    job = await get_database()["audit_jobs"].find_one({"_id": ObjectId(job_id)})
+    return _public(job) if job else None
+
+
+async def cancel_audit(job_id: str) -> bool:
+    """Stop a queued or running audit; the runner notices at its next checkpoint."""
+    if not ObjectId.is_valid(job_id):
+        return False
+    now = datetime.utcnow()
+    result = await get_database()["audit_jobs"].update_one(
+        {"_id": ObjectId(job_id), "status": {"$in": list(ACTIVE)}},
+        {"$set": {"status": "cancelled", "updated_at": now, "finished_at": now}},
+    )
+    return result.modified_count > 0
+
+
+async def audit_events(job_id: str, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Server-sent events for one audit: `progress` whenever the job document
+    changes, `contradiction` for every flag found (id = the number of its
+    chapter in the audit, so a client reconnecting with Last-Event-ID picks up
+    after the last chapter it saw), then `end`.
+    """
+    db = get_database()
+    last_chapter = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    last_state = None
+    while True:
+        job = await get_audit(job_id)
+        if job is None:
+            yield sse_event("error", {"detail": "Audit not found"})
+            return
+
+        # Only checkpointed chapters: their flags are all written
+        done = job["progress"]["chapters_done"]
+        if done > last_chapter:
+            query = {"audit_id": job_id, "audit_chapter": {"$gt": last_chapter, "$lte": done}}
+            async for flag in db["contradictions"].find(query).sort([("audit_chapter", 1), ("_id", 1)]):
+                flag["_id"] = str(flag["_id"])
+                yield sse_event("contradiction", flag, event_id=str(flag["audit_chapter"]))
+            last_chapter = done
+
+        state = {k: job.get(k) for k in ("_id", "status", "progress", "found", "error")}
+        if state != last_state:
+            last_state = state
+            yield sse_event("progress", state)
+        if job["status"] in FINISHED:
+            yield sse_event("end", state)
+            return
+        await asyncio.sleep(AUDIT_POLL_SECONDS)
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+class AuditRunner:
+    """Runs audit jobs as asyncio tasks in this API process, AUDIT_MAX_JOBS at a time."""
+
+    def __init__(self, max_jobs: int = AUDIT_MAX_JOBS, lease_seconds: float = AUDIT_LEASE_SECONDS):
+        self.max_jobs = max_jobs
+        self.lease = timedelta(seconds=lease_seconds)
+        self.owner = uuid.uuid4().hex
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, job_id: str) -> None:
+        if job_id in self._tasks:
+            return
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_jobs)
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def resume(self) -> int:
+        """Start every unfinished audit whose lease has expired; called from the app lifespan."""
+        jobs = await get_database()["audit_jobs"].find(
+            {"status": {"$in": list(ACTIVE)}, "lease_until": {"$not": {"$gt": datetime.utcnow()}}}, {"_id": 1}
+        ).sort("created_at", 1).to_list(length=None)
+        for job in jobs:
+            self.start(str(job["_id"]))
+        return len(jobs)
+
+    async def shutdown(self) -> None:
+        """Stop running audits and release their leases so the next process resumes them at once."""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        await get_database()["audit_jobs"].update_many(
+            {"owner": self.owner, "status": "running"}, {"$set": {"lease_until": None}}
+        )
+
+    def stats(self) -> dict:
+        return {"owner": self.owner, "max_jobs": self.max_jobs, "tasks": len(self._tasks)}
+
+    async def _run(self, job_id: str) -> None:
+        async with self._slots:
+            job = await self._claim(job_id)
+            if job is None:
+                return
+            heartbeat = asyncio.create_task(self._heartbeat(job["_id"]))
+            try:
+                await self._audit(job)
+                await self._checkpoint(job["_id"], {"status": "done", "finished_at": datetime.utcnow()})
+            except _Stopped:
+                logger.info(f"Audit {job_id} stopped (cancelled or taken over)")
+            except Exception as e:
+                logger.error(f"Audit {job_id} failed: {e}")
+                await get_database()["audit_jobs"].update_one(
+                    {"_id": job["_id"], "owner": self.owner, "status": "running"},
+                    {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow(),
+                              "finished_at": datetime.utcnow()}},
+                )
+            finally:
+                heartbeat.cancel()
+
+    async def _claim(self, job_id: str) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await get_database()["audit_jobs"].find_one_and_update(
+            {"_id": ObjectId(job_id), "status": {"$in": list(ACTIVE)}, "lease_until": {"$not": {"$gt": now}}},
+            {"$set": {"status": "running", "owner": self.owner, "lease_until": now + self.lease, "updated_at": now}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _heartbeat(self, job_id: ObjectId) -> None:
+        # The sync step of a long manuscript can outlast a lease between checkpoints
+        while True:
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+            await get_database()["audit_jobs"].update_one(
+                {"_id": job_id, "owner": self.owner, "status": "running"},
+                {"$set": {"lease_until": datetime.utcnow() + self.lease}},
+            )
+
+    async def _checkpoint(self, job_id: ObjectId, fields: dict, inc: Optional[dict] = None) -> None:
+        """Record progress and renew the lease — or raise _Stopped if the job is no longer ours to run."""
+        now = datetime.utcnow()
+        update = {"$set": {**fields, "updated_at": now, "lease_until": now + self.lease}}
+        if inc:
+            update["$inc"] = inc
+        result = await get_database()["audit_jobs"].update_one(
+            {"_id": job_id, "owner": self.owner, "status": "running"}, update
+        )
+        if not result.matched_count:
+            raise _Stopped()
+
+    async def _audit(self, job: dict) -> None:
+        db = get_database()
+        job_id, audit_id = job["_id"], str(job["_id"])
+        plan, cursor = job["plan"], job["cursor"]
+        for position in range(cursor["script"], len(job["script_ids"])):
+            script_id = job["script_ids"][position]
+            script = await db["scripts"].find_one({"_id": ObjectId(script_id)}, {"content": 1})
+            text = plain_text(script.get("content", "")) if script else ""
+            if text.strip():
+                await update_knowledge_graph(script_id, text, full_manuscript=True, background=True)
+            chapters = audit_chapters(text)
+            # One bible version for every chapter of the script
+            source = await replica_source(script_id)
+            start = resume_index(chapters, cursor) if position == cursor["script"] else 0
+
+            # The chapter count is only known once the script is read; it can change between resumes
+            plan[position] = len(chapters)
+            await self._checkpoint(job_id, {"plan": plan, "progress.chapters_total": sum(plan)})
+
+            for ordinal in range(start, len(chapters)):
+                chapter = chapters[ordinal]
+                flags = await check_contradictions(script_id, chapter["paragraphs"], background=True, source=source)
+                # Each chapter's flags are tagged with its number in the audit, for audit_events. Progress
+                # follows the cursor and `found` only counts inserted fingerprints, so a chapter scanned
+                # again after a resume (its flags upserted onto the same documents) isn't counted twice.
+                done = chapters_scanned(plan, position, ordinal + 1)
+                new = await save_flags(
+                    script_id, flags, fields={"audit_id": audit_id, "audit_chapter": done, "scene": chapter["scene"]},
+                    new_only=True,
+                )
+                await self._checkpoint(
+                    job_id,
+                    {"cursor": {"script": position, "scene": chapter["scene"], "chapter": ordinal + 1},
+                     "progress.chapters_done": done},
+                    {"found": len(new)},
+                )
+
+            cursor = {"script": position + 1, "scene": None, "chapter": 0}
+            await self._checkpoint(
+                job_id,
+                {"cursor": cursor, "progress.chapters_done": chapters_scanned(plan, position + 1, 0),
+                 "progress.scripts_done": position + 1},
+            )
+
+
+# Single runner per API process
+audit_runner = AuditRunner()
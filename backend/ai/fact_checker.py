@@ -3,7 +3,7 @@ RAG-based Fact Checker — uses the Knowledge Graph as a retrieval source.
 
 Pipeline:
 1. Extract entities from the user's query using spaCy NER
-2. Retrieve matching nodes + edges from the story bible (MongoDB)
+2. Retrieve matching nodes + edges from the story bible's retrieval index
 3. Format the retrieved subgraph as structured facts
 4. Pass the focused context + query to Groq for verification
 
@@ -11,28 +11,40 @@ This replaces the naive "dump entire story bible" approach with targeted
 entity-aware retrieval for more accurate fact checking.
 """
 
-import os
-import spacy
-from groq import AsyncGroq
-from dotenv import load_dotenv
-from config.db import get_database
-
-load_dotenv()
-
-# ── Dedicated Groq client for fact checking ──────────────────────────────────
-API_KEY = os.getenv("GROQ_API_KEY")
-try:
-    client = AsyncGroq(api_key=API_KEY)
-except Exception as e:
-    print(f"Warning: Failed to initialize Groq fact-checker client: {e}")
-    client = None
-
-# ── spaCy model for entity extraction ────────────────────────────────────────
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("Warning: spaCy model 'en_core_web_sm' not found for fact checker.")
-    nlp = None
+from itertools import combinations
+from ai.llm_gateway import llm_gateway
+from services.nlp_executor import nlp_executor
+from services.kg_store import bible_graph, bible_index, load_bible
+
+# Full-graph fallback is capped at what format_facts_for_llm renders anyway
+MAX_FALLBACK_NODES = 50
+MAX_FALLBACK_LINKS = 100
+
+# Matched entities that aren't linked directly are connected by their shortest
+# path in the graph, if it's at most this many hops (checked for the first few matches)
+MAX_PATH_HOPS = 3
+MAX_PATH_ENTITIES = 4
+
+# Characters of editor content scanned for extra query entities (centred on the cursor when known)
+EDITOR_WINDOW = 2000
+
+# ── spaCy model for entity extraction (shared with the NLP services) ─────────
+# Loaded on first use: extraction runs inside the NLP worker processes, so the
+# API process itself never has to hold the model.
+nlp = None
+
+
+def _get_nlp():
+    global nlp
+    if nlp is None:
+        # Imported here so merely importing this module never pulls in spaCy
+        from services.nlp_registry import get_nlp
+        try:
+            nlp = get_nlp("fact_checker")
+        except RuntimeError as e:
+            print(f"Warning: {e}")
+    return nlp
+
 
 VALID_ENTITY_LABELS = {"PERSON", "GPE", "LOC", "FAC", "ORG", "DATE", "EVENT", "NORP", "WORK_OF_ART"}
 
@@ -46,10 +58,14 @@ def extract_query_entities(text: str) -> list[str]:
     Use spaCy NER to pull out character names, locations, dates, orgs, etc.
     from the user's chat message so we know what to look up in the graph.
     """
+    nlp = _get_nlp()
     if not nlp:
         return []
 
-    doc = nlp(text)
+    from services.doc_cache import parse
+
+    # Only entities and POS tags are read below — skip the parser and lemmatizer
+    doc = parse(nlp, text, profile="ner-only")
     entities = set()
     for ent in doc.ents:
         if ent.label_ in VALID_ENTITY_LABELS:
@@ -67,68 +83,82 @@ def extract_query_entities(text: str) -> list[str]:
 # Step 2 — Retrieve relevant facts from the knowledge graph
 # ═════════════════════════════════════════════════════════════════════════════
 
-async def retrieve_facts_from_graph(script_id: str, query_entities: list[str]) -> dict:
+async def retrieve_facts_from_graph(script_id: str, query_entities: list[str], cursor: int | None = None) -> dict:
     """
-    Query MongoDB story_bibles for the given script, then filter
-    nodes and links to only those mentioning the query entities.
+    Match the query entities against the script's node ids through the
+    per-version token index, then take only the edges touching those nodes
+    (plus their 1-hop neighbours) from its adjacency map.
     Returns a structured dict of relevant nodes and links.
+
+    Matched entities are looked up across the whole story — a contradiction
+    with chapter 2 matters in chapter 20 — but the no-match fallback is taken
+    from the scenes around `cursor` (an offset in the manuscript) when given.
     """
-    db = get_database()
-    bible = await db["story_bibles"].find_one({"script_id": script_id})
-
-    if not bible:
-        return {"nodes": [], "links": [], "matched_entities": []}
-
-    all_nodes = bible.get("nodes", [])
-    all_links = bible.get("links", [])
-
-    # Find nodes whose ID fuzzy-matches any query entity
-    matched_node_ids = set()
-    matched_nodes = []
-
-    for node in all_nodes:
-        node_id = node.get("id", "")
-        for query_ent in query_entities:
-            # Case-insensitive substring match (handles "Arjun" matching "arjun")
-            if query_ent.lower() in node_id.lower() or node_id.lower() in query_ent.lower():
-                matched_node_ids.add(node_id)
-                matched_nodes.append(node)
-                break
+    index = await bible_index(script_id)
+
+    if not len(index):
+        return {"nodes": [], "links": [], "evidence": {}, "matched_entities": []}
+
+    # Case-insensitive, whole-token match (handles "arjun" and "Arjun's" → "Arjun Mehta")
+    matched_node_ids = index.match(query_entities)
 
     # If no specific entities found, return the full graph (fallback)
+    # — capped at what format_facts_for_llm can render anyway
     if not matched_node_ids:
+        bible = await load_bible(script_id, max_nodes=MAX_FALLBACK_NODES, max_links=MAX_FALLBACK_LINKS, cursor=cursor)
         return {
-            "nodes": all_nodes,
-            "links": all_links,
+            **bible,
             "matched_entities": query_entities,
             "retrieval_mode": "full_graph_fallback"
         }
 
-    # Retrieve all links where source or target matches a found entity
-    matched_links = []
-    for link in all_links:
-        src = link.get("source", "")
-        tgt = link.get("target", "")
-        if src in matched_node_ids or tgt in matched_node_ids:
-            matched_links.append(link)
-            # Also pull in the connected entity's node (1-hop neighbors)
-            connected_id = tgt if src in matched_node_ids else src
-            if connected_id not in matched_node_ids:
-                matched_node_ids.add(connected_id)
-                # Find and add the neighbor node
-                for node in all_nodes:
-                    if node.get("id") == connected_id:
-                        matched_nodes.append(node)
-                        break
+    # Retrieve all links where source or target matches a found entity,
+    # and pull in the connected entities' nodes (1-hop neighbors)
+    subgraph = index.neighbourhood(matched_node_ids)
+    paths = await _connecting_paths(script_id, matched_node_ids, subgraph)
 
     return {
-        "nodes": matched_nodes,
-        "links": matched_links,
-        "matched_entities": list(matched_node_ids),
+        **subgraph,
+        "paths": paths,
+        "matched_entities": [n["id"] for n in subgraph["nodes"]],
         "retrieval_mode": "entity_targeted"
     }
 
 
+async def _connecting_paths(script_id: str, matched_node_ids: list[str], subgraph: dict) -> list[list[str]]:
+    """
+    Shortest chains linking pairs of matched entities beyond one hop
+    ("Meera → Arjun → Ravi"), via the CSR graph. The links and entities along
+    each chain are added to `subgraph` in place.
+    """
+    if len(matched_node_ids) < 2:
+        return []
+    graph = await bible_graph(script_id)
+    index = await bible_index(script_id)
+    seen_links = {id(link) for link in subgraph["links"]}
+    seen_nodes = {node["id"] for node in subgraph["nodes"]}
+    all_evidence = index.bible.get("evidence", {})
+
+    paths = []
+    for source, target in combinations(matched_node_ids[:MAX_PATH_ENTITIES], 2):
+        path = graph.shortest_path(source, target)
+        if not path or not 3 <= len(path) <= MAX_PATH_HOPS + 1:
+            continue
+        paths.append(path)
+        for link in graph.path_links(path):
+            if id(link) not in seen_links:
+                seen_links.add(id(link))
+                subgraph["links"].append(link)
+                for sid in link.get("evidence", []):
+                    if sid in all_evidence:
+                        subgraph["evidence"][sid] = all_evidence[sid]
+        for node_id in path:
+            if node_id not in seen_nodes:
+                seen_nodes.add(node_id)
+                subgraph["nodes"].append(index.nodes_by_id[node_id])
+    return paths
+
+
 # ═════════════════════════════════════════════════════════════════════════════
 # Step 3 — Format retrieved facts into structured context for LLM
 # ═════════════════════════════════════════════════════════════════════════════
@@ -141,6 +171,7 @@ def format_facts_for_llm(retrieved: dict) -> str:
     """
     nodes = retrieved.get("nodes", [])
     links = retrieved.get("links", [])
+    evidence = retrieved.get("evidence", {})
     matched = retrieved.get("matched_entities", [])
     mode = retrieved.get("retrieval_mode", "entity_targeted")
 
@@ -192,10 +223,14 @@ def format_facts_for_llm(retrieved: dict) -> str:
             src = link.get("source", "?")
             tgt = link.get("target", "?")
             rel = link.get("relation", "related to")
-            sentence = link.get("sentence", "")
+            count = link.get("count", 1)
+            # First evidence sentence the link still has text for
+            sentence = next((evidence[sid] for sid in link.get("evidence", []) if sid in evidence), "")
 
-            # Show the relationship
+            # Show the relationship (and how often the text supports it)
             fact_line = f"  • {src} [{rel}] {tgt}"
+            if count > 1:
+                fact_line += f" (×{count})"
 
             # Show the original source sentence as evidence (deduped)
             if sentence and sentence not in seen_sentences:
@@ -207,6 +242,13 @@ def format_facts_for_llm(retrieved: dict) -> str:
             sections.append(fact_line)
             rendered_links += 1
 
+    # Multi-hop chains between the entities the query mentions
+    paths = retrieved.get("paths", [])
+    if paths:
+        sections.append("\nCONNECTIONS:")
+        for path in paths:
+            sections.append(f"  • {' → '.join(path)}")
+
     return "\n".join(sections)
 
 
@@ -240,27 +282,27 @@ async def fact_check_with_rag(
     editor_content: str = "",
     conversation_history: list = None,
     programmatic_flags: list = None,
+    cursor: int | None = None,
 ) -> str:
     """
     Full RAG pipeline for fact checking:
-    1. Extract entities from user message + editor content
+    1. Extract entities from user message + editor content (around `cursor`, if given)
     2. Retrieve relevant facts from knowledge graph
     3. Format context and send to Groq for verification
     4. Incorporate programmatic flags from the logic engine
+    Raises LLMError (see llm_gateway.py) when the model can't be reached.
     """
-    if not client:
-        return "Groq API client is not initialized. Check GROQ_API_KEY in .env"
-
-    # Step 1: Extract entities from both the user's question and the editor content
-    query_text = user_message
+    # Step 1: Extract entities from both the user's question and the editor content.
+    # Parsed separately so the unchanged editor excerpt is a Doc-cache hit on every turn
+    query_entities = await nlp_executor.run("query_entities", user_message)
     if editor_content:
         # Also scan the editor content for entities to widen retrieval
-        query_text += " " + editor_content[:2000]
-
-    query_entities = extract_query_entities(query_text)
+        start = 0 if cursor is None else max(0, min(cursor, len(editor_content)) - EDITOR_WINDOW // 2)
+        editor_entities = await nlp_executor.run("query_entities", editor_content[start:start + EDITOR_WINDOW])
+        query_entities = list(dict.fromkeys(query_entities + editor_entities))
 
     # Step 2: Retrieve relevant facts from the knowledge graph
-    retrieved = await retrieve_facts_from_graph(script_id, query_entities)
+    retrieved = await retrieve_facts_from_graph(script_id, query_entities, cursor)
 
     # Step 3: Format for LLM
     facts_context = format_facts_for_llm(retrieved)
@@ -291,15 +333,10 @@ async def fact_check_with_rag(
     formatted_messages.append({"role": "user", "content": user_message})
 
     # Step 4: Call Groq
-    try:
-        response = await client.chat.completions.create(
-            messages=formatted_messages,
-            model="llama-3.1-8b-instant",
-            temperature=0.2,  # Low temp for precise, factual responses
-            max_tokens=1500,
-            top_p=1,
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"Fact-checker Groq error: {e}")
-        return f"Error during fact checking: {str(e)}"
+    return await llm_gateway.chat(
+        formatted_messages,
+        model="llama-3.1-8b-instant",
+        temperature=0.2,  # Low temp for precise, factual responses
+        max_tokens=1500,
+        purpose="fact_check",
+    )
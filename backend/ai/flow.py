@@ -17,25 +17,152 @@ import io
 import base64
 import asyncio
 import logging
-from typing import Optional
+from collections import Counter
+from typing import List, Optional, Tuple
 
 from config.db import get_database
-from config.db_helpers import insert_document
-from services.knowledge_graph import KnowledgeGraphEngine
-from services.contradiction_detector import ContradictionDetector
+from services.nlp_executor import StaleReplicaError, nlp_executor
+from services.kg_incremental import paragraph_hash, diff_paragraphs
+from services.kg_merge import empty_delta
+from services.kg_scenes import split_scenes
+from services.contradiction_store import save_flags
+from services.kg_store import (
+    apply_merge, bible_stats, bible_version, cached_bible, format_bible_summary, load_bible, replica_source,
+    save_scenes,
+)
 from ai.writing_tools import ai_auto_suggest
 from ai.media_generator import generate_comic_image
 
 logger = logging.getLogger(__name__)
 
-# ── Singleton NLP engines (loaded once, reused across requests) ──────────────
-try:
-    _kg_engine = KnowledgeGraphEngine()
-    _detector = ContradictionDetector()
-except Exception as e:
-    logger.error(f"Failed to initialize NLP engines in flow.py: {e}")
-    _kg_engine = None
-    _detector = None
+
+# ═════════════════════════════════════════════════════════════════════════════
+# 0. Incremental Knowledge Graph Update
+#    Shared by orchestrate_analysis and the /analyze route. Only paragraphs
+#    whose text changed since the last call are sent to spaCy.
+# ═════════════════════════════════════════════════════════════════════════════
+
+async def check_contradictions(
+    script_id: str, paragraphs: List[Tuple[int, str]], background: bool = False, source: Optional[tuple] = None
+) -> list:
+    """
+    Contradiction flags for `paragraphs` ((offset, text) pairs) against the
+    script's bible, from the detector in the process pool. Workers keep a
+    replica of the bible (services/bible_replica.py) and are sent only its
+    version and the last few merge deltas leading to it; the whole bible goes
+    only to a worker that has no replica those deltas bring up to date.
+    `source` is a kg_store.replica_source() result to check against instead
+    of the current version (an audit pins one per script).
+    """
+    run = nlp_executor.run_background if background else nlp_executor.run
+    version, deltas, bible = source or await replica_source(script_id)
+    try:
+        return await run("contradictions", paragraphs, script_id, version, deltas)
+    except StaleReplicaError:
+        snapshot = {key: bible[key] for key in ("nodes", "links", "evidence", "facts")}
+        return await run("contradictions", paragraphs, script_id, version, (), snapshot)
+
+
+async def update_knowledge_graph(
+    script_id: str, text: str, full_manuscript: bool = False, background: bool = False
+) -> dict:
+    """
+    Fold `text` into the script's story bible:
+    1. Cut the text into scenes at its chapter / scene headings (kg_scenes.py),
+       hash every paragraph with its scene and diff against the stored hashes
+       (partial text also by paragraph text alone — see below)
+    2. Check only new/edited paragraphs for contradictions against the current KG
+    3. Extract entities/links for new paragraphs only (one batched NLP task),
+       folding known aliases onto their canonical entities
+    4. Merge the change into kg_paragraphs / kg_nodes / kg_edges / kg_evidence
+       atomically (kg_store.apply_merge re-checks the diff inside the merge),
+       resolving new surface forms through the alias table (kg_aliases.py),
+       and record the scene list in kg_scenes
+
+    `full_manuscript=True` says `text` is the whole manuscript: paragraphs no
+    longer in it are retracted, repeat counts follow it, its scene list is
+    stored, and if it shares no paragraph with the stored bible the bible is
+    rebuilt. Otherwise (a chapter, a selection, a chat message) new paragraphs
+    are added and nothing stored is touched; a paragraph already stored under
+    any scene is not new, since text without its heading is cut into the
+    wrong scene.
+
+    `background=True` (consistency audits) runs the NLP at background priority
+    and skips step 2 — the audit checks every chapter itself.
+
+    Returns:
+        {
+            "flags": [...contradiction flags, with sentence start / end offsets in `text`...],
+            "kg_stats": { "nodes": int, "links": int },
+            "kg_delta": { nodes/links/evidence added·updated·removed, base_version, version, reset },
+            "paragraphs": { "total": int, "extracted": int, "removed": int },
+        }
+    """
+    db = get_database()
+
+    # ── Step 1: Diff paragraph hashes ────────────────────────────────────────
+    scenes = split_scenes(text)
+    paragraphs = [p for scene in scenes for p in scene["paragraphs"]]
+    paragraph_scenes = [scene["scene"] for scene in scenes for _ in scene["paragraphs"]]
+    paragraph_offsets = [offset for scene in scenes for offset in scene["offsets"]]
+    hashes = [paragraph_hash(p, scene) for p, scene in zip(paragraphs, paragraph_scenes)]
+    text_hashes = [paragraph_hash(p) for p in paragraphs]
+    occurrences = Counter(hashes)
+    query = {"script_id": script_id}
+    if not full_manuscript:
+        # Partial text has no headings before it, so its scenes are a guess: also match paragraphs by text alone
+        query["$or"] = [{"hash": {"$in": list(occurrences)}}, {"text_hash": {"$in": list(set(text_hashes))}}]
+    stored_docs = await db["kg_paragraphs"].find(
+        query, {"hash": 1, "text_hash": 1, "occurrences": 1}
+    ).to_list(length=None)
+    stored = {d["hash"]: d.get("occurrences", 1) for d in stored_docs}
+    known_texts = None if full_manuscript else {d["text_hash"] for d in stored_docs if d.get("text_hash")}
+    new, recounted, removed = diff_paragraphs(paragraphs, stored, paragraph_scenes, known_texts)
+    if not full_manuscript:
+        # A partial view says nothing about the rest of the manuscript or its repeat counts
+        recounted, removed = {}, []
+        occurrences = Counter({p_hash: occurrences[p_hash] for p_hash in new})
+    # Where each paragraph first appears, for contradiction offsets
+    offset_of = {}
+    for p_hash, offset in zip(hashes, paragraph_offsets):
+        offset_of.setdefault(p_hash, offset)
+    scene_of = dict(zip(hashes, paragraph_scenes))
+    text_hash_of = dict(zip(hashes, text_hashes))
+
+    stats = {"total": len(paragraphs), "extracted": len(new), "removed": len(removed)}
+    if not new and not recounted and not removed:
+        # Nothing changed since the last analysis — no NLP, no bible writes
+        # (scene offsets still move when only blank lines changed)
+        if full_manuscript:
+            await save_scenes(script_id, scenes)
+        version = await bible_version(script_id)
+        return {"flags": [], "kg_stats": await bible_stats(script_id),
+                "kg_delta": empty_delta(version), "paragraphs": stats}
+
+    # ── Steps 2 + 3: NLP on edited paragraphs only, in the process pool ──────
+    flags = []
+    extracted = {}
+    run = nlp_executor.run_background if background else nlp_executor.run
+    if new:
+        existing = await cached_bible(script_id)
+        if not background:
+            # Unchanged paragraphs were already checked when they were written
+            changed = [(offset_of[p_hash], paragraph) for p_hash, paragraph in new.items()]
+            flags = await check_contradictions(script_id, changed)
+        graphs = await run(
+            "kg_paragraphs", list(new.values()), [scene_of[h] for h in new], existing.get("aliases", {})
+        )
+        extracted = {
+            p_hash: {**graph, "scene": scene_of[p_hash], "text_hash": text_hash_of[p_hash]}
+            for p_hash, graph in zip(new, graphs)
+        }
+
+    # ── Step 4: One atomic merge into kg_paragraphs and the normalized bible ─
+    delta = await apply_merge(script_id, dict(occurrences), extracted, full=full_manuscript)
+    if full_manuscript:
+        await save_scenes(script_id, scenes)
+
+    return {"flags": flags, "kg_stats": await bible_stats(script_id), "kg_delta": delta, "paragraphs": stats}
 
 
 # ═════════════════════════════════════════════════════════════════════════════
@@ -49,123 +176,44 @@ async def orchestrate_analysis(
     text: str,
     run_suggestions: bool = True,
     user_message: str = "",
+    full_manuscript: bool = False,
 ) -> dict:
     """
     Runs the full analysis pipeline in sequence:
-    1. Fetch existing story bible from DB
-    2. Run contradiction detector against existing KG
-    3. Rebuild/merge knowledge graph with new text
-    4. Save merged KG and new contradictions to DB
-    5. Optionally run auto-suggest for proactive continuity tips
+    1. Diff the text's paragraph hashes against the stored bible
+    2. Run the contradiction detector on new/edited paragraphs against the existing KG
+    3. Extract entities/links from new paragraphs only
+    4. Merge them into the normalized story bible
+       (steps 1–4 are update_knowledge_graph)
+    5. Save the new contradictions to DB
+    6. Optionally run auto-suggest for proactive continuity tips
+
+    Pass `full_manuscript=True` only when `text` is the whole script (see update_knowledge_graph).
 
     Returns:
         {
-            "issues": [{ sentence, conflict_with, reason_tag, _id }],
+            "issues": [{ sentence, conflict_with, reason_tag, start, end, _id }],
             "suggestions": ["suggestion 1", ...],
             "kg_stats": { "nodes": int, "links": int },
+            "kg_delta": { ...see update_knowledge_graph... },
             "contradictions_found": int,
         }
     """
-    if not _kg_engine or not _detector:
-        return {
-            "issues": [],
-            "suggestions": [],
-            "kg_stats": {"nodes": 0, "links": 0},
-            "contradictions_found": 0,
-            "error": "NLP engines not initialized",
-        }
+    # ── Steps 1–4: Incremental KG update + contradiction check on edited text ─
+    kg_update = await update_knowledge_graph(script_id, text, full_manuscript=full_manuscript)
+    flags = kg_update["flags"]
+    kg_stats = kg_update["kg_stats"]
 
-    db = get_database()
+    # ── Step 5: Persist contradictions to DB ─────────────────────────────────
+    saved_issues = await save_flags(script_id, flags)
 
-    # ── Step 1: Fetch existing story bible ───────────────────────────────────
-    existing_bible = await db["story_bibles"].find_one({"script_id": script_id})
-    existing_nodes = existing_bible.get("nodes", []) if existing_bible else []
-    existing_links = existing_bible.get("links", []) if existing_bible else []
-
-    # ── Step 2: Contradiction detection against existing KG ──────────────────
-    flags = _detector.check_sentence(
-        text,
-        existing_nodes=existing_nodes,
-        existing_links=existing_links,
-    )
-
-    # ── Step 3: Knowledge graph extraction from new text ─────────────────────
-    graph_data = _kg_engine.process_text(text, scene_id="current_scene")
-
-    # ── Step 4: Merge new graph data into existing KG ────────────────────────
-    existing_nodes_dict = {n["id"]: n for n in existing_nodes}
-
-    for new_node in graph_data.get("nodes", []):
-        node_id = new_node["id"]
-        if node_id in existing_nodes_dict:
-            # Merge mentions, preserving existing data
-            old_mentions = set(existing_nodes_dict[node_id].get("mentions", []))
-            new_mentions = set(new_node.get("mentions", []))
-            existing_nodes_dict[node_id]["mentions"] = list(old_mentions | new_mentions)
-            existing_nodes_dict[node_id]["count"] = new_node.get("count", 1)
-        else:
-            existing_nodes_dict[node_id] = new_node
-
-    merged_nodes = list(existing_nodes_dict.values())
-
-    # Merge links — deduplicate by (source, target, relation) signature
-    merged_links = list(existing_links)
-    existing_sigs = {
-        (l["source"], l["target"], l.get("relation", ""))
-        for l in existing_links
-    }
-    for new_link in graph_data.get("links", []):
-        sig = (new_link["source"], new_link["target"], new_link.get("relation", ""))
-        if sig not in existing_sigs:
-            merged_links.append(new_link)
-            existing_sigs.add(sig)
-
-    # ── Step 5: Persist merged story bible ───────────────────────────────────
-    await db["story_bibles"].update_one(
-        {"script_id": script_id},
-        {"$set": {
-            "script_id": script_id,
-            "nodes": merged_nodes,
-            "links": merged_links,
-        }},
-        upsert=True,
-    )
-
-    # ── Step 6: Persist contradictions to DB ─────────────────────────────────
-    saved_issues = []
-    for flag in flags:
-        new_contra = {
-            "script_id": script_id,
-            "sentence": flag.get("conflicting_sentence"),
-            "conflict_with": flag.get("reason_detail"),
-            "reason_tag": flag.get("reason_tag"),
-            "resolved": False,
-        }
-        contra_id = await insert_document("contradictions", new_contra)
-        saved_issues.append({
-            "_id": contra_id,
-            "sentence": new_contra["sentence"],
-            "conflict_with": new_contra["conflict_with"],
-            "reason_tag": new_contra["reason_tag"],
-        })
-
-    # ── Step 7: Auto-suggestions (proactive continuity tips) ─────────────────
+    # ── Step 6: Auto-suggestions (proactive continuity tips) ─────────────────
     suggestions = []
     if run_suggestions and text.strip():
         # Build a summary of the story bible for the suggestion engine
-        node_lines = [
-            f"- {n.get('type', 'Entity')}: {n['id']}"
-            for n in merged_nodes[:40]
-        ]
-        link_lines = [
-            f"- {l['source']} [{l.get('relation', 'related to')}] {l['target']}"
-            for l in merged_links[:60]
-        ]
-        story_bible_summary = ""
-        if node_lines:
-            story_bible_summary += "Entities:\n" + "\n".join(node_lines) + "\n"
-        if link_lines:
-            story_bible_summary += "Relationships:\n" + "\n".join(link_lines)
+        # Suggestions are about the end of the text, so take context from the last scenes
+        preview = await load_bible(script_id, max_nodes=40, max_links=60, with_evidence=False, cursor=len(text))
+        story_bible_summary = format_bible_summary(preview, kg_stats)
 
         try:
             suggest_result = await ai_auto_suggest(
@@ -180,7 +228,8 @@ async def orchestrate_analysis(
     return {
         "issues": saved_issues,
         "suggestions": suggestions,
-        "kg_stats": {"nodes": len(merged_nodes), "links": len(merged_links)},
+        "kg_stats": kg_stats,
+        "kg_delta": kg_update["kg_delta"],
         "contradictions_found": len(saved_issues),
     }
 
@@ -1,27 +1,12 @@
-import os
-from groq import AsyncGroq
-from dotenv import load_dotenv
-
-load_dotenv()
-
-API_KEY = os.getenv("GROQ_API_KEY")
-
-# Initialize the async Groq client
-try:
-    client = AsyncGroq(api_key=API_KEY)
-except Exception as e:
-    print(f"Warning: Failed to initialize Groq client: {e}")
-    client = None
+from ai.llm_gateway import llm_gateway
 
 async def generate_chat_reply(messages: list, context: str = "", story_bible: str = "", mode: str = "Standard") -> str:
     """
     Generate a chat reply from Groq based on conversation history and context.
     Mode controls the persona: Standard (helpful assistant), Advanced (deeper analysis),
     or Fact Check (rigorous fact-checker against the story bible).
+    Raises LLMError (see llm_gateway.py) when the model can't be reached.
     """
-    if not client:
-        return "Groq API client is not initialized. Please ensure GROQ_API_KEY is legally set in .env"
-    
     # Build system prompt based on the selected mode
     if mode == "Fact Check":
         system_prompt = (
@@ -59,15 +44,10 @@ async def generate_chat_reply(messages: list, context: str = "", story_bible: st
             "content": msg.get("content", "")
         })
 
-    try:
-        response = await client.chat.completions.create(
-            messages=formatted_messages,
-            model="llama-3.1-8b-instant",
-            temperature=0.3 if mode == "Fact Check" else 0.7,
-            max_tokens=1024,
-            top_p=1,
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"Error calling Groq: {e}")
-        return "Sorry, I ran into an error generating a response. Please try again."
+    return await llm_gateway.chat(
+        formatted_messages,
+        model="llama-3.1-8b-instant",
+        temperature=0.3 if mode == "Fact Check" else 0.7,
+        max_tokens=1024,
+        purpose="chat",
+    )
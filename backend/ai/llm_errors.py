@@ -0,0 +1,28 @@
+"""
+llm_errors.py — Exceptions raised by the LLM gateway and its scheduler.
+
+main.py maps them to HTTP responses: LLMUnavailableError (and LLMShedError)
+→ 503 with Retry-After, LLMTimeoutError → 504, any other LLMError → 502.
+"""
+
+from typing import Optional
+
+
+class LLMError(RuntimeError):
+    """The provider rejected the call (bad request, auth) — not worth retrying."""
+
+
+class LLMUnavailableError(LLMError):
+    """No client configured, or the provider stayed rate-limited / failing through every retry."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError, TimeoutError):
+    """The call did not finish within its deadline."""
+
+
+class LLMShedError(LLMUnavailableError):
+    """A low-priority call was dropped to keep the token budget for interactive requests."""
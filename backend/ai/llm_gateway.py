@@ -0,0 +1,263 @@
+"""
+llm_gateway.py — The one way out to the LLM provider (Groq).
+
+groq_service.py, writing_tools.py and fact_checker.py each built their own
+AsyncGroq client with the SDK defaults, and turned any failure into a string
+the user saw as if it were the model's answer. Every chat completion now goes
+through `llm_gateway.chat(...)`, which owns:
+
+    pool         one httpx.AsyncClient (keep-alive connection pool) shared by
+                 every call, closed from the app lifespan
+    concurrency  at most LLM_MAX_CONCURRENCY calls in flight per API process;
+                 the rest wait for a slot
+    retries      429, 5xx, connection errors and per-attempt timeouts are
+                 retried with full-jitter exponential backoff (Retry-After is
+                 honoured when the provider sends one)
+    deadline     each call — waiting for budget or a slot, every attempt and
+                 every backoff — must finish within its deadline
+    budget       before each attempt the call is charged against the
+                 tokens-per-minute bucket at its priority class
+                 (interactive / suggestion — see llm_scheduler.py); an
+                 attempt that fails gets its charge back
+    metrics      calls, failures, retries, latency percentiles and token usage
+                 per purpose (GET /api/llm/gateway)
+
+Failures raise LLMError subclasses (llm_errors.py); main.py maps them to
+503 / 504 / 502.
+"""
+
+import os
+import random
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+from groq import APIConnectionError, APIStatusError, APITimeoutError, AsyncGroq
+
+from ai.llm_errors import LLMError, LLMTimeoutError, LLMUnavailableError
+from ai.llm_scheduler import LLMScheduler, estimate_tokens
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+API_KEY = os.getenv("GROQ_API_KEY")
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "16"))
+# Whole call (queueing, attempts, backoff) and a single HTTP attempt
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "60"))
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+# Latencies kept per purpose for the percentiles in stats()
+LATENCY_WINDOW = 512
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the provider's Retry-After header, when it sent one."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after")) if response is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full jitter: uniform in [0, min(max, base · 2^attempt)], never sooner than Retry-After."""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class _Usage:
+    """Counters for one purpose (chat, writing tools, fact check, ...)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def report(self) -> dict:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1) if ordered else None
+
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "max": percentile(1.0)},
+        }
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        api_key: Optional[str] = API_KEY,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        deadline: float = LLM_DEADLINE,
+        max_retries: int = LLM_MAX_RETRIES,
+        scheduler: Optional[LLMScheduler] = None,
+    ):
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self._http: Optional[httpx.AsyncClient] = None
+        self._client: Optional[AsyncGroq] = None
+        # Created lazily, inside the running loop
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight = 0
+        self._waiting = 0
+        self._usage: Dict[str, _Usage] = {}
+        self.scheduler = scheduler or LLMScheduler()
+
+    def _get_client(self) -> AsyncGroq:
+        # Deferred so importing the routers doesn't open connections during worker boot
+        if self._client is None:
+            if not self.api_key:
+                raise LLMUnavailableError("LLM client is not configured. Check GROQ_API_KEY in .env")
+            self._http = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=self.max_connections, max_keepalive_connections=self.max_connections,
+            ))
+            # Retries and timeouts are ours, not the SDK's
+            self._client = AsyncGroq(api_key=self.api_key, http_client=self._http, max_retries=0)
+        return self._client
+
+    async def chat(
+        self,
+        messages: List[dict],
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        top_p: float = 1,
+        purpose: str = "chat",
+        priority: str = "interactive",
+        deadline: Optional[float] = None,
+    ) -> str:
+        """
+        One chat completion at `priority` (see llm_scheduler.py); returns the reply text.
+        Raises LLMUnavailableError (LLMShedError), LLMTimeoutError or LLMError.
+        """
+        client = self._get_client()
+        usage = self._usage.setdefault(purpose, _Usage())
+        usage.calls += 1
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        expires = started + (deadline or self.deadline)
+        estimate = estimate_tokens(messages, max_tokens)
+
+        attempt = 0
+        while True:
+            charged = 0
+            try:
+                # Token budget first, then a connection slot — a call queued for budget holds no slot
+                charged = await self.scheduler.acquire(priority, estimate, expires)
+                response = await self._attempt(
+                    client, expires, messages=messages, model=model, temperature=temperature,
+                    max_tokens=max_tokens, top_p=top_p,
+                )
+                break
+            except asyncio.CancelledError:
+                self.scheduler.settle(charged, 0)
+                raise
+            except LLMError:
+                self.scheduler.settle(charged, 0)
+                usage.failures += 1
+                raise
+            except Exception as e:
+                # A failed attempt reports no usage: give its charge back before retrying or giving up
+                self.scheduler.settle(charged, 0)
+                if not _retryable(e):
+                    usage.failures += 1
+                    logger.error(f"LLM call ({purpose}) rejected: {e}")
+                    raise LLMError(f"The language model rejected the request: {e}") from e
+                if getattr(e, "status_code", None) == 429:
+                    # After the refund, so the bucket really ends up empty
+                    self.scheduler.throttled()
+                retry_after = _retry_after(e)
+                delay = backoff_delay(attempt, retry_after)
+                if attempt >= self.max_retries or loop.time() + delay >= expires:
+                    usage.failures += 1
+                    logger.error(f"LLM call ({purpose}) failed after {attempt + 1} attempts: {e}")
+                    raise LLMUnavailableError(
+                        "The language model is busy or unavailable. Please retry shortly.", retry_after
+                    ) from e
+                attempt += 1
+                usage.retries += 1
+                logger.warning(f"LLM call ({purpose}) attempt {attempt} failed ({e}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        usage.latencies.append(loop.time() - started)
+        tokens_used = None
+        if response.usage is not None:
+            usage.prompt_tokens += response.usage.prompt_tokens or 0
+            usage.completion_tokens += response.usage.completion_tokens or 0
+            tokens_used = (response.usage.prompt_tokens or 0) + (response.usage.completion_tokens or 0)
+        self.scheduler.settle(charged, tokens_used)
+        return response.choices[0].message.content
+
+    async def _attempt(self, client: AsyncGroq, expires: float, **request):
+        """One HTTP attempt inside a concurrency slot, bounded by what is left of the deadline."""
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), expires - loop.time())
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError("LLM call passed its deadline waiting for a free slot")
+        finally:
+            self._waiting -= 1
+
+        self._inflight += 1
+        try:
+            remaining = expires - loop.time()
+            return await asyncio.wait_for(
+                client.chat.completions.create(**request, timeout=min(LLM_ATTEMPT_TIMEOUT, remaining)), remaining
+            )
+        except asyncio.TimeoutError:
+            raise LLMTimeoutError("LLM call exceeded its deadline")
+        finally:
+            self._inflight -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_connections": self.max_connections,
+            "in_flight": self._inflight,
+            "waiting": self._waiting,
+            "scheduler": self.scheduler.stats(),
+            "purposes": {purpose: usage.report() for purpose, usage in self._usage.items()},
+        }
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._client = None
+
+
+# Single gateway per API process — shared by every LLM call site
+llm_gateway = LLMGateway()
@@ -0,0 +1,198 @@
+"""
+llm_scheduler.py — Tokens-per-minute budget and priority classes for LLM calls.
+
+Groq caps the account at about 12k tokens per minute (LLM_TPM_LIMIT), and
+every call used to be sent as soon as it was made: a burst of background
+suggestions could use up the minute and leave a writer's rewrite waiting on
+429 retries. llm_gateway.py now asks this scheduler for tokens before every
+attempt:
+
+    bucket     a token bucket holding LLM_TPM_LIMIT · LLM_TPM_SAFETY tokens,
+               refilled continuously over a minute; a call is charged its
+               estimated prompt tokens plus max_tokens, then settled against
+               the usage the provider reports. A 429 empties it.
+    classes    interactive  (chat, editor actions, plot tweaks, fact checks)
+               suggestion   (writing-mode / post-analysis auto-suggestions)
+               A suggestion may only spend the bucket down to its reserve, so
+               the last LLM_RESERVE_SUGGESTION of the minute is kept for
+               interactive calls. (Consistency audits make no LLM calls.)
+    queueing   calls that don't fit wait in priority order (nothing overtakes
+               a waiting call of a higher class). Suggestions are shed after
+               LLM_SUGGESTION_MAX_WAIT — by then the writer has moved on.
+
+Shed calls raise LLMShedError (an LLMUnavailableError, so a 503 with
+Retry-After).
+"""
+
+import os
+import heapq
+import asyncio
+import itertools
+from typing import Dict, List, Optional
+
+from ai.llm_errors import LLMShedError, LLMTimeoutError
+
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "12000"))
+# Spend a little under the provider's limit: estimates are approximate and other clients may share the key
+LLM_TPM_SAFETY = float(os.getenv("LLM_TPM_SAFETY", "0.9"))
+LLM_RESERVE_SUGGESTION = float(os.getenv("LLM_RESERVE_SUGGESTION", "0.3"))
+LLM_SUGGESTION_MAX_WAIT = float(os.getenv("LLM_SUGGESTION_MAX_WAIT", "2"))
+
+# Lower rank = served first
+PRIORITIES = {"interactive": 0, "suggestion": 1}
+
+# Rough chars-per-token for English prose, and the chat template's overhead per message
+CHARS_PER_TOKEN = 4
+TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(messages: List[dict], max_tokens: int) -> int:
+    """Tokens a call can count against the per-minute limit: its prompt estimate plus max_tokens."""
+    prompt = sum(len(m.get("content") or "") // CHARS_PER_TOKEN + TOKENS_PER_MESSAGE for m in messages)
+    return prompt + max_tokens
+
+
+class TokenBucket:
+    """Continuously refilled token budget; the caller passes the clock."""
+
+    def __init__(self, capacity: float, per_second: float, now: float = 0.0):
+        self.capacity = capacity
+        self.per_second = per_second
+        self.level = capacity
+        self._updated = now
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.per_second)
+        self._updated = now
+
+    def take(self, tokens: float, floor: float, now: float) -> bool:
+        """Spend `tokens` if that leaves at least `floor` in the bucket."""
+        self._refill(now)
+        if self.level - tokens < floor:
+            return False
+        self.level -= tokens
+        return True
+
+    def wait_time(self, tokens: float, floor: float, now: float) -> float:
+        """Seconds until `take(tokens, floor)` would succeed."""
+        self._refill(now)
+        return max(0.0, (tokens + floor - self.level) / self.per_second)
+
+    def adjust(self, tokens: float, now: float) -> None:
+        """Give back (positive) or charge (negative) tokens after the fact; may go below zero."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + tokens)
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        tokens_per_minute: float = LLM_TPM_LIMIT * LLM_TPM_SAFETY,
+        reserves: Optional[Dict[str, float]] = None,
+        max_waits: Optional[Dict[str, float]] = None,
+    ):
+        self.bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        reserves = reserves or {"interactive": 0.0, "suggestion": LLM_RESERVE_SUGGESTION}
+        self.floors = {PRIORITIES[name]: share * tokens_per_minute for name, share in reserves.items()}
+        self.max_waits = max_waits or {"suggestion": LLM_SUGGESTION_MAX_WAIT}
+        # Heap of [rank, seq, tokens, future]
+        self._waiting: List[list] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.granted = {name: 0 for name in PRIORITIES}
+        self.queued = {name: 0 for name in PRIORITIES}
+        self.shed = {name: 0 for name in PRIORITIES}
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    async def acquire(self, priority: str, tokens: int, expires: float) -> int:
+        """
+        Wait until `tokens` may be spent at `priority`; returns the tokens charged.
+        Raises LLMShedError when a sheddable class waited too long, LLMTimeoutError at `expires`.
+        """
+        rank = PRIORITIES[priority]
+        floor = self.floors.get(rank, 0.0)
+        tokens = min(tokens, self.bucket.capacity - floor)
+        now = self._now()
+        self._prune()
+        # Waiting calls of the same or a higher class go first
+        if not (self._waiting and self._waiting[0][0] <= rank) and self.bucket.take(tokens, floor, now):
+            self.granted[priority] += 1
+            return tokens
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, [rank, next(self._seq), tokens, future])
+        self.queued[priority] += 1
+        self._dispatch()
+        max_wait = self.max_waits.get(priority)
+        wait = expires - now if max_wait is None else min(max_wait, expires - now)
+        try:
+            await asyncio.wait_for(future, max(wait, 0.0))
+        except asyncio.TimeoutError:
+            self._dispatch()
+            if max_wait is not None and max_wait < expires - now:
+                self.shed[priority] += 1
+                raise LLMShedError(
+                    f"LLM budget is reserved for interactive requests; {priority} call dropped",
+                    retry_after=self.bucket.wait_time(tokens, floor, self._now()),
+                )
+            raise LLMTimeoutError(f"LLM call waited past its deadline for token budget ({priority})")
+        self.granted[priority] += 1
+        return tokens
+
+    def settle(self, charged: int, used: Optional[int]) -> None:
+        """Correct the charge with the provider's reported usage (0 refunds a failed attempt)."""
+        if used is not None:
+            self.bucket.adjust(charged - used, self._now())
+            self._dispatch()
+
+    def throttled(self) -> None:
+        """The provider answered 429: whatever we think is left, it isn't."""
+        self.bucket.drain(self._now())
+        self._dispatch()
+
+    def _prune(self) -> None:
+        while self._waiting and self._waiting[0][3].done():
+            heapq.heappop(self._waiting)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = self._now()
+        while True:
+            self._prune()
+            if not self._waiting:
+                return
+            rank, _, tokens, future = self._waiting[0]
+            floor = self.floors.get(rank, 0.0)
+            if not self.bucket.take(tokens, floor, now):
+                # Strict priority: the head waits for the refill and nothing behind it overtakes
+                delay = self.bucket.wait_time(tokens, floor, now)
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiting)
+            future.set_result(tokens)
+
+    def stats(self) -> dict:
+        self._prune()
+        waiting = {name: 0 for name in PRIORITIES}
+        names = {rank: name for name, rank in PRIORITIES.items()}
+        for rank, _, _, future in self._waiting:
+            if not future.done():
+                waiting[names[rank]] += 1
+        return {
+            "tokens_per_minute": round(self.bucket.capacity),
+            "available": round(self.bucket.level),
+            "reserves": {names[rank]: round(floor) for rank, floor in self.floors.items()},
+            "waiting": waiting,
+            "granted": dict(self.granted),
+            "queued": dict(self.queued),
+            "shed": dict(self.shed),
+        }
@@ -1,20 +1,26 @@
 import os
 import base64
 import asyncio
-from google import genai
-from google.genai import types
 from dotenv import load_dotenv
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# Initialize the Gemini client for Imagen 4.0 image generation
-try:
-    client = genai.Client(api_key=GEMINI_API_KEY) if GEMINI_API_KEY else None
-except Exception as e:
-    print(f"Warning: Failed to initialize Gemini client: {e}")
-    client = None
+# Gemini client for Imagen 4.0 image generation — built on first use because
+# importing google.genai is slow and most workers never generate images
+client = None
+
+
+def _get_client():
+    global client
+    if client is None and GEMINI_API_KEY:
+        try:
+            from google import genai
+            client = genai.Client(api_key=GEMINI_API_KEY)
+        except Exception as e:
+            print(f"Warning: Failed to initialize Gemini client: {e}")
+    return client
 
 
 def _build_comic_prompt(selected_text: str) -> str:
@@ -44,6 +50,7 @@ async def generate_comic_image(selected_text: str) -> dict:
       - prompt_used: the comic prompt sent to Imagen
       - source_text: the original selected text
     """
+    client = _get_client()
     if not client:
         return {
             "status": "error",
@@ -58,6 +65,8 @@ async def generate_comic_image(selected_text: str) -> dict:
 
     comic_prompt = _build_comic_prompt(selected_text)
 
+    from google.genai import types
+
     try:
         # Run the synchronous Imagen call in a thread so FastAPI stays non-blocking
         response = await asyncio.to_thread(
@@ -0,0 +1,59 @@
+"""
+Synthetic manuscript generator shared by the benchmark scripts.
+
+Produces deterministic prose with a configurable cast of named characters and
+places, so benchmarks are repeatable without shipping copyrighted novels.
+"""
+
+import random
+
+_FIRST = ["Arjun", "Meera", "Kabir", "Ananya", "Rohan", "Isha", "Vikram", "Tara", "Dev", "Nila",
+          "Samir", "Leela", "Farhan", "Zoya", "Karan", "Pooja", "Aditya", "Riya", "Nikhil", "Sana"]
+_LAST = ["Mehta", "Sharma", "Kapoor", "Iyer", "Rao", "Khan", "Das", "Verma", "Nair", "Bose",
+         "Gill", "Joshi", "Menon", "Sen", "Pillai", "Reddy", "Ghosh", "Malik", "Chopra", "Bhatt"]
+_PLACES = ["Mumbai", "Delhi", "Pune", "Goa", "Shimla", "Kolkata", "Chennai", "Jaipur", "Agra", "Kochi"]
+_VERBS = ["met", "followed", "called", "warned", "trusted", "left", "visited", "helped", "watched", "found"]
+_FILLER = [
+    "The rain had not stopped since morning.",
+    "Nobody in the room said a word for a long time.",
+    "It was the kind of silence that carried its own weight.",
+    "The old clock in the hallway kept its stubborn rhythm.",
+    "The Annual fair had been cancelled again.",
+]
+
+
+def make_cast(n_entities: int, seed: int = 7) -> list[str]:
+    """Unique full names (plus places) — enough to reach a few hundred distinct entities."""
+    rng = random.Random(seed)
+    names = [f"{f} {l}" for f in _FIRST for l in _LAST]
+    rng.shuffle(names)
+    cast = names[: max(0, n_entities - len(_PLACES))]
+    return cast + _PLACES[: n_entities - len(cast)]
+
+
+def make_text(n_words: int, n_entities: int = 40, seed: int = 7, paragraph_sentences: int = 5) -> str:
+    """Roughly `n_words` of prose, split into blank-line separated paragraphs."""
+    rng = random.Random(seed)
+    cast = make_cast(n_entities, seed)
+    people = [c for c in cast if c not in _PLACES] or cast
+    places = [c for c in cast if c in _PLACES] or _PLACES
+
+    paragraphs, sentences, words = [], [], 0
+    while words < n_words:
+        if rng.random() < 0.25:
+            sentence = rng.choice(_FILLER)
+        else:
+            a, b = rng.sample(people, 2) if len(people) > 1 else (people[0], people[0])
+            negation = "did not " if rng.random() < 0.15 else ""
+            verb = rng.choice(_VERBS)
+            if negation:
+                verb = {"met": "meet", "left": "leave", "found": "find"}.get(verb, verb.rstrip("ed") or verb)
+            sentence = f"{a} {negation}{verb} {b} in {rng.choice(places)} before the storm."
+        sentences.append(sentence)
+        words += len(sentence.split())
+        if len(sentences) >= paragraph_sentences:
+            paragraphs.append(" ".join(sentences))
+            sentences = []
+    if sentences:
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
@@ -0,0 +1,97 @@
+"""
+Story-bible payloads: the JSON story_bible route vs the columnar export
+(services/bible_export.py) the graph viewer downloads.
+
+RUN WITH: python benchmarks/bench_bible_export.py (from inside backend/)
+Sizes are raw and gzip'd (what a compressing proxy would send). "decode" is
+json.loads vs decode_bible back to full Python dicts; "views" is just mapping
+the columns, which is all a browser does before drawing (typed-array views).
+"""
+
+import sys
+import gzip
+import json
+import time
+import random
+import hashlib
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks._corpus import make_cast, make_text
+from services.bible_export import encode_bible, decode_bible
+
+RUNS = 5
+SIZES = [(300, 2_000), (400, 12_000), (400, 50_000)]
+RELATIONS = ["meet", "follow", "call", "warn", "trust", "leave", "visit", "help", "watch", "find"]
+
+
+def make_bible(n_nodes: int, n_edges: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    cast = make_cast(n_nodes)
+    sentences = [s.strip() + "." for s in make_text(20_000, n_entities=50).split(".") if s.strip()]
+    scenes = [f"scene_{i}" for i in range(40)]
+    nodes = [{"id": name, "type": "PERSON", "count": rng.randint(1, 50), "mentions": rng.sample(scenes, 3)}
+             for name in cast]
+    keys = set()
+    while len(keys) < n_edges:
+        a, b = sorted(rng.sample(cast, 2))
+        keys.add((a, b, rng.choice(RELATIONS)))
+    links, evidence = [], {}
+    for a, b, relation in sorted(keys):
+        sids = []
+        for text in rng.sample(sentences, rng.randint(1, 5)):
+            sid = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+            evidence[sid] = text
+            sids.append(sid)
+        links.append({"source": a, "target": b, "relation": relation, "count": rng.randint(1, 9),
+                      "scenes": rng.sample(scenes, 2), "evidence": sids})
+    return {"nodes": nodes, "links": links, "evidence": evidence, "aliases": {}}
+
+
+def map_columns(payload: bytes) -> int:
+    header_length = int.from_bytes(payload[4:8], "little")
+    header = json.loads(payload[8:8 + header_length])
+    offset, views = 8 + header_length, 0
+    for col in header["columns"]:
+        width = 1 if col["dtype"] == "u1" else 4
+        np.frombuffer(payload, dtype=np.uint8 if width == 1 else "<u4", count=col["length"], offset=offset)
+        size = col["length"] * width
+        offset += size + (-size % 4)
+        views += 1
+    return views
+
+
+def _median_ms(fn) -> float:
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    print(f"{'edges':>6} | {'json KB':>8} {'gz':>7} | {'export KB':>9} {'gz':>7} | "
+          f"{'json decode ms':>14} {'export decode ms':>16} {'views ms':>8} | {'encode ms':>9}")
+    for n_nodes, n_edges in SIZES:
+        bible = make_bible(n_nodes, n_edges)
+        as_json = json.dumps({"script_id": "bench", "version": 1, **bible}).encode("utf-8")
+        export = encode_bible(bible, 1)
+        assert decode_bible(export)["links"] == bible["links"]
+
+        json_ms = _median_ms(lambda: json.loads(as_json))
+        export_ms = _median_ms(lambda: decode_bible(export))
+        views_ms = _median_ms(lambda: map_columns(export))
+        encode_ms = _median_ms(lambda: encode_bible(bible, 1))
+        print(f"{n_edges:>6} | {len(as_json) / 1024:>8.0f} {len(gzip.compress(as_json)) / 1024:>7.0f} | "
+              f"{len(export) / 1024:>9.0f} {len(gzip.compress(export)) / 1024:>7.0f} | "
+              f"{json_ms:>14.1f} {export_ms:>16.1f} {views_ms:>8.2f} | {encode_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
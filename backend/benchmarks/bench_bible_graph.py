@@ -0,0 +1,93 @@
+"""
+Multi-hop story-bible queries: Python list scans over the links vs the
+per-version CSR graph (services/bible_graph.py).
+
+RUN WITH: python benchmarks/bench_bible_graph.py (from inside backend/)
+Graph construction is timed separately — it happens once per bible version.
+"""
+
+import sys
+import time
+import random
+import statistics
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.bible_graph import BibleGraph
+
+RUNS = 5
+SIZES = [(1_000, 5_000), (3_000, 12_000), (10_000, 50_000)]
+RELATIONS = ["meet", "call", "warn", "trust", "leave", "visit", "help", "watch", "find", "follow"]
+
+
+def make_bible(n_nodes: int, n_edges: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    nodes = [{"id": f"Entity {i}", "type": "PERSON" if i % 5 else "GPE", "count": 1, "mentions": []}
+             for i in range(n_nodes)]
+    keys = set()
+    while len(keys) < n_edges:
+        a, b = sorted(rng.sample(range(n_nodes), 2))
+        keys.add((a, b, rng.choice(RELATIONS)))
+    links = [{"source": f"Entity {a}", "target": f"Entity {b}", "relation": r, "count": rng.randint(1, 5),
+              "scenes": [], "evidence": []} for a, b, r in sorted(keys)]
+    return {"nodes": nodes, "links": links, "evidence": {}}
+
+
+def scan_k_hop(bible: dict, seeds: list, k: int) -> dict:
+    """What a list-scan implementation does: one pass over every link per hop."""
+    distance = {s: 0 for s in seeds}
+    frontier = set(seeds)
+    for hop in range(1, k + 1):
+        found = set()
+        for link in bible["links"]:
+            if link["source"] in frontier and link["target"] not in distance:
+                found.add(link["target"])
+            elif link["target"] in frontier and link["source"] not in distance:
+                found.add(link["source"])
+        for node_id in found:
+            distance[node_id] = hop
+        frontier = found
+    return distance
+
+
+def scan_top_degree(bible: dict, k: int) -> list:
+    neighbours = {}
+    for link in bible["links"]:
+        neighbours.setdefault(link["source"], set()).add(link["target"])
+        neighbours.setdefault(link["target"], set()).add(link["source"])
+    return sorted(((n, len(s)) for n, s in neighbours.items()), key=lambda x: -x[1])[:k]
+
+
+def _median_ms(fn) -> float:
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    print(f"{'nodes':>6} {'edges':>6} {'build ms':>9} | {'2-hop scan':>10} {'2-hop csr':>10} | "
+          f"{'top-20 scan':>11} {'top-20 csr':>10} | {'path ms':>8}")
+    for n_nodes, n_edges in SIZES:
+        bible = make_bible(n_nodes, n_edges)
+        build_ms = _median_ms(lambda: BibleGraph(bible))
+        graph = BibleGraph(bible)
+        seeds = ["Entity 1", "Entity 2"]
+
+        assert scan_k_hop(bible, seeds, 2) == graph.k_hop(seeds, 2)
+        scan_ms = _median_ms(lambda: scan_k_hop(bible, seeds, 2))
+        csr_ms = _median_ms(lambda: graph.k_hop(seeds, 2))
+        scan_top_ms = _median_ms(lambda: scan_top_degree(bible, 20))
+        csr_top_ms = _median_ms(lambda: graph.top_by_degree(20))
+        path_ms = _median_ms(lambda: graph.shortest_path("Entity 1", f"Entity {n_nodes - 1}"))
+
+        print(f"{n_nodes:>6} {n_edges:>6} {build_ms:>9.1f} | {scan_ms:>10.2f} {csr_ms:>10.2f} | "
+              f"{scan_top_ms:>11.2f} {csr_top_ms:>10.2f} | {path_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Contradiction check of a new chapter: the per-call path (check_sentence on
+the whole text, or once per sentence — the detector's old entry point, kept
+here as the baseline) vs the document scan (ContradictionDetector.check_document:
+one nlp.pipe pass, per-sentence facts, one sparse similarity product).
+
+RUN WITH: python benchmarks/bench_contradiction_scan.py (from inside backend/)
+The story bible is extracted once from an earlier manuscript. The Doc cache
+is cleared before every run, so parsing is part of each timing.
+"""
+
+import sys
+import time
+import statistics
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks._corpus import make_text
+from services.bible_replica import BibleReplica
+from services.contradiction_detector import SIMILARITY_THRESHOLD, ContradictionDetector
+from services.doc_cache import doc_cache, parse
+from services.kg_facts import build_fact_index, fact_features
+from services.kg_incremental import paragraph_spans
+from services.knowledge_graph import KnowledgeGraphEngine
+
+RUNS = 3
+BIBLE_WORDS = 30_000
+CHAPTER_WORDS = [1_000, 5_000, 20_000]
+
+
+def check_sentence(detector, sentence, existing_nodes, fact_index, evidence, index) -> list:
+    """The per-call baseline: one parse, and one subject / verb / polarity for the whole `sentence`."""
+    doc = parse(detector.nlp, sentence)
+    verbs = [tok for tok in doc if tok.pos_ == "VERB"]
+    features = fact_features(doc, verbs[0].lemma_ if verbs else "")
+    if not features["subject"] or not verbs:
+        return []
+    target_entity = detector._target_entity(features["subject"], existing_nodes)
+    if not target_entity:
+        return []
+    sids = detector._candidates(target_entity, features["lemma"], features["negated"], fact_index, evidence)
+    if not sids:
+        return []
+    cosine_sims = detector._score(index, evidence, sids, lambda index: index.similarities(sentence, sids))
+    return [
+        detector._flag(sentence, sid, evidence[sid])
+        for sid, similarity in zip(sids, cosine_sims) if similarity > SIMILARITY_THRESHOLD
+    ]
+
+
+def _median_ms(fn) -> float:
+    timings = []
+    for _ in range(RUNS):
+        doc_cache.clear()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    engine = KnowledgeGraphEngine()
+    detector = ContradictionDetector(engine.nlp)
+    bible = engine.process_text(make_text(BIBLE_WORDS, seed=7))
+    nodes, evidence = bible["nodes"], bible["evidence"]
+    facts = build_fact_index(bible)
+    # A worker's warm replica: the same lexical index for every path
+    index = BibleReplica(0, bible).index
+    print(f"Bible: {len(nodes)} entities, {len(bible['links'])} edges, {len(evidence)} evidence sentences\n")
+
+    print(f"{'words':>6} {'sentences':>9} | {'whole-text ms':>13} {'flags':>5} | "
+          f"{'per-sentence ms':>15} {'flags':>5} | {'document ms':>11} {'flags':>5} | {'speed-up':>8}")
+    for n_words in CHAPTER_WORDS:
+        chapter = make_text(n_words, seed=11)
+        paragraphs = paragraph_spans(chapter)
+        sentences = [sent.text for sent in engine.nlp(chapter).sents]
+
+        def whole_text():
+            return check_sentence(detector, chapter, nodes, facts, evidence, index)
+
+        def per_sentence():
+            return [f for s in sentences for f in check_sentence(detector, s, nodes, facts, evidence, index)]
+
+        def document():
+            return detector.check_document(paragraphs, nodes, facts, evidence, index)
+
+        whole_ms, per_ms, doc_ms = _median_ms(whole_text), _median_ms(per_sentence), _median_ms(document)
+        print(f"{n_words:>6} {len(sentences):>9} | {whole_ms:>13.1f} {len(whole_text()):>5} | "
+              f"{per_ms:>15.1f} {len(per_sentence()):>5} | {doc_ms:>11.1f} {len(document()):>5} | "
+              f"{per_ms / doc_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Contradiction candidate scoring: refitting a TfidfVectorizer on the sentence
+plus the matched entity's evidence sentences on every check (the old
+ContradictionDetector) vs the per-script incremental lexical index
+(services/lexical_index.py).
+
+RUN WITH: python benchmarks/bench_lexical_index.py (from inside backend/)
+The entity checked is the best-connected one (the protagonist, whose
+sentences are the ones writers touch most). "cold" is the first check a
+worker sees for a script; "sync +20" is a later check after an edit added
+20 evidence sentences.
+"""
+
+import sys
+import time
+import random
+import statistics
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from benchmarks._corpus import _FILLER, _PLACES, _VERBS, make_cast
+from services.lexical_index import LexicalIndex
+
+RUNS = 5
+SIZES = [5_000, 12_000, 50_000]
+EVIDENCE_PER_EDGE = 2
+QUERY = "Arjun Mehta did not meet Meera Sharma in Mumbai after the fair."
+
+
+def make_bible(n_edges: int, seed: int = 7) -> dict:
+    """Edges with a skewed degree distribution, each backed by a couple of evidence sentences."""
+    rng = random.Random(seed)
+    cast = make_cast(400, seed)
+    weights = [1 / (rank + 1) for rank in range(len(cast))]
+    links, evidence, keys = [], {}, set()
+    while len(links) < n_edges:
+        a, b = rng.choices(cast, weights=weights, k=2)
+        verb = rng.choice(_VERBS)
+        if a == b or (a, b, verb) in keys:
+            continue
+        keys.add((a, b, verb))
+        sids = []
+        for _ in range(EVIDENCE_PER_EDGE):
+            text = f"{a} {verb} {b} in {rng.choice(_PLACES)}. {rng.choice(_FILLER)}"
+            sid = f"s{len(evidence)}"
+            evidence[sid] = text
+            sids.append(sid)
+        links.append({"source": a, "target": b, "relation": verb, "evidence": sids})
+    return {"links": links, "evidence": evidence}
+
+
+def candidates(bible: dict, entity: str) -> list:
+    return [sid for link in bible["links"] if entity in (link["source"], link["target"]) for sid in link["evidence"]]
+
+
+def refit(sentence: str, texts: list):
+    matrix = TfidfVectorizer().fit_transform([sentence] + texts)
+    return cosine_similarity(matrix[0:1], matrix[1:]).flatten()
+
+
+def _median_ms(fn) -> float:
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    print(f"{'edges':>6} {'sentences':>9} {'candidates':>10} | {'refit ms':>9} | "
+          f"{'cold ms':>8} {'sync +20':>9} {'query ms':>9} | {'speed-up':>8}")
+    for n_edges in SIZES:
+        bible = make_bible(n_edges)
+        evidence = bible["evidence"]
+        degree = {}
+        for link in bible["links"]:
+            for end in (link["source"], link["target"]):
+                degree[end] = degree.get(end, 0) + 1
+        entity = max(degree, key=degree.get)
+        sids = candidates(bible, entity)
+        texts = [evidence[sid] for sid in sids]
+
+        refit_ms = _median_ms(lambda: refit(QUERY, texts))
+        cold_ms = _median_ms(lambda: LexicalIndex().sync(evidence))
+
+        index = LexicalIndex()
+        index.sync(evidence)
+        batches = iter([
+            {f"new{run}-{i}": f"{entity} left {_PLACES[i % len(_PLACES)]} {run}." for i in range(20)}
+            for run in range(RUNS)
+        ])
+        sync_ms = _median_ms(lambda: index.sync(next(batches)))
+        query_ms = _median_ms(lambda: index.similarities(QUERY, sids))
+
+        print(f"{n_edges:>6} {len(evidence):>9} {len(sids):>10} | {refit_ms:>9.2f} | "
+              f"{cold_ms:>8.1f} {sync_ms:>9.2f} {query_ms:>9.2f} | {refit_ms / (sync_ms + query_ms):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
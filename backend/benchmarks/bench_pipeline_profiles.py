@@ -0,0 +1,47 @@
+"""
+Per-profile latency of the shared spaCy pipeline on a ~5k-word chapter.
+
+RUN WITH: python benchmarks/bench_pipeline_profiles.py (from inside backend/)
+The Doc cache is bypassed on purpose — this measures raw pipeline cost.
+"""
+
+import sys
+import time
+import statistics
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks._corpus import make_text
+from services.nlp_registry import get_nlp, PROFILES, disabled_components, run_profile
+
+RUNS = 5
+WORDS = 5000
+
+
+def main():
+    nlp = get_nlp("bench_pipeline_profiles")
+    chapter = make_text(WORDS)
+    print(f"Model: {nlp.meta.get('name')} {nlp.meta.get('version')} — pipes: {nlp.pipe_names}")
+    print(f"Chapter: {len(chapter.split())} words, {RUNS} runs per profile\n")
+
+    # Warm up once so lazy weight initialisation doesn't land in the first profile
+    run_profile(nlp, chapter, "full")
+
+    baseline = None
+    print(f"{'profile':<15} {'skipped components':<45} {'median ms':>10} {'speedup':>8}")
+    for profile in PROFILES:
+        timings = []
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            run_profile(nlp, chapter, profile)
+            timings.append((time.perf_counter() - started) * 1000)
+        median = statistics.median(timings)
+        baseline = baseline or median
+        skipped = ",".join(disabled_components(nlp, profile)) or "-"
+        print(f"{profile:<15} {skipped:<45} {median:>10.1f} {baseline / median:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Worker startup benchmark — import cost, time to first served request, time to ready.
+
+RUN WITH: python benchmarks/bench_startup.py (from inside backend/)
+Needs MongoDB reachable via MONGODB_URL, because the app lifespan connects to it.
+
+Measures, in fresh processes so nothing is already imported or cached:
+1. `import main`                 — what every uvicorn worker pays before binding
+2. boot → first `/` response     — when the load balancer can route traffic
+3. boot → `/ready` returns 200   — when NLP engines are warm in every pool worker
+"""
+
+import os
+import sys
+import time
+import socket
+import statistics
+import subprocess
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+IMPORT_RUNS = 5
+READY_TIMEOUT = 300
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import() -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_boot() -> dict:
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy(),
+    )
+    timings = {"first_request_s": None, "ready_s": None}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=2) as client:
+            while time.perf_counter() - started < READY_TIMEOUT:
+                try:
+                    if timings["first_request_s"] is None and client.get("/").status_code == 200:
+                        timings["first_request_s"] = time.perf_counter() - started
+                    if timings["first_request_s"] is not None:
+                        ready = client.get("/ready")
+                        if ready.status_code == 200:
+                            timings["ready_s"] = time.perf_counter() - started
+                            timings["engines"] = ready.json()["engines"]
+                            break
+                except httpx.TransportError:
+                    pass  # server not listening yet
+                time.sleep(0.05)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return timings
+
+
+def _ms(seconds) -> str:
+    return f"{seconds * 1000:8.1f} ms" if seconds is not None else "  timed out"
+
+
+def main():
+    imports = [measure_import() for _ in range(IMPORT_RUNS)]
+    print(f"import main         median {statistics.median(imports) * 1000:8.1f} ms  (n={IMPORT_RUNS})")
+
+    boot = measure_boot()
+    print(f"boot → first '/'    {_ms(boot['first_request_s'])}")
+    print(f"boot → /ready 200   {_ms(boot['ready_s'])}")
+    for name, state in boot.get("engines", {}).items():
+        print(f"  {name:<14} {state}")
+
+
+if __name__ == "__main__":
+    main()
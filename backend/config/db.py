@@ -1,7 +1,7 @@
 # backend/config/db.py
 
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ASCENDING, TEXT
+from pymongo import ASCENDING, DESCENDING, TEXT
 import os
 from dotenv import load_dotenv
 
@@ -47,7 +47,43 @@ async def create_indexes(db):
     await db["scripts"].create_index([("project_id", ASCENDING)])
     await db["scripts"].create_index([("content", TEXT)])
     await db["story_bibles"].create_index([("script_id", ASCENDING)])
-    await db["contradictions"].create_index([("script_id", ASCENDING)])
+    await db["kg_paragraphs"].create_index([("script_id", ASCENDING), ("hash", ASCENDING)], unique=True)
+    await db["kg_paragraphs"].create_index([("script_id", ASCENDING), ("text_hash", ASCENDING)])
+    await db["kg_nodes"].create_index([("script_id", ASCENDING), ("id", ASCENDING)], unique=True)
+    await db["kg_nodes"].create_index([("script_id", ASCENDING), ("degree", DESCENDING), ("id", ASCENDING)])
+    await db["kg_nodes"].create_index(
+        [("script_id", ASCENDING), ("type", ASCENDING), ("degree", DESCENDING), ("id", ASCENDING)]
+    )
+    await db["kg_edges"].create_index(
+        [("script_id", ASCENDING), ("source", ASCENDING), ("target", ASCENDING), ("relation", ASCENDING)], unique=True
+    )
+    await db["kg_edges"].create_index([("script_id", ASCENDING), ("source", ASCENDING)])
+    await db["kg_edges"].create_index([("script_id", ASCENDING), ("target", ASCENDING)])
+    await db["kg_edges"].create_index(
+        [("script_id", ASCENDING), ("scenes", ASCENDING), ("source", ASCENDING), ("target", ASCENDING),
+         ("relation", ASCENDING)]
+    )
+    await db["kg_evidence"].create_index([("script_id", ASCENDING), ("sid", ASCENDING)], unique=True)
+    await db["kg_aliases"].create_index([("script_id", ASCENDING), ("alias", ASCENDING)], unique=True)
+    await db["kg_scenes"].create_index([("script_id", ASCENDING), ("scene", ASCENDING)], unique=True)
+    await db["kg_scenes"].create_index([("script_id", ASCENDING), ("ordinal", ASCENDING)])
+    await db["kg_nodes"].create_index([("script_id", ASCENDING), ("mentions", ASCENDING), ("importance", DESCENDING)])
+    await db["kg_edges"].create_index([("script_id", ASCENDING), ("scenes", ASCENDING), ("count", DESCENDING)])
+    # Type-filtered windows (bible_window.edge_filter); edges from before migration 009 have no end types
+    await db["kg_edges"].create_index(
+        [("script_id", ASCENDING), ("source_type", ASCENDING), ("target_type", ASCENDING), ("source", ASCENDING),
+         ("target", ASCENDING), ("relation", ASCENDING)]
+    )
+    await db["contradictions"].create_index([("script_id", ASCENDING), ("resolved", ASCENDING)])
+    # Flag fingerprint (contradiction_store.py); documents from before migration 007 have no hash yet
+    await db["contradictions"].create_index(
+        [("script_id", ASCENDING), ("sentence_hash", ASCENDING), ("reason_tag", ASCENDING),
+         ("conflict_hash", ASCENDING)],
+        unique=True, partialFilterExpression={"sentence_hash": {"$exists": True}},
+    )
+    await db["contradictions"].create_index([("audit_id", ASCENDING), ("audit_chapter", ASCENDING)])
+    await db["audit_jobs"].create_index([("status", ASCENDING), ("lease_until", ASCENDING)])
+    await db["audit_jobs"].create_index([("scope", ASCENDING), ("target_id", ASCENDING), ("status", ASCENDING)])
     await db["enhancements"].create_index([("script_id", ASCENDING)])
     await db["style_fingerprints"].create_index([("user_id", ASCENDING)])
     print("[INFO] Indexes created successfully.")
\ No newline at end of file
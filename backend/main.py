@@ -1,16 +1,30 @@
-from fastapi import FastAPI, WebSocket
+import asyncio
+from fastapi import FastAPI, WebSocket, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from config.db import connect_db, close_db
+from services.nlp_executor import nlp_executor, NLPBackpressureError, NLPTimeoutError
+from ai.audit import audit_runner
+from ai.llm_gateway import llm_gateway, LLMError, LLMTimeoutError, LLMUnavailableError
 
 # Lifespan handles startup and shutdown events — modern FastAPI pattern
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Runs when app starts — opens DB connection
     await connect_db()
+    # Load spaCy engines in the background: `/` is served right away and
+    # `/ready` flips once every NLP worker has its models in memory
+    warmup = asyncio.create_task(nlp_executor.warm_up())
+    # Consistency audits interrupted by the last shutdown carry on from their checkpoints
+    await audit_runner.resume()
     yield
-    # Runs when app stops — closes DB connection cleanly
+    # Runs when app stops — closes DB connection cleanly and stops NLP workers
+    warmup.cancel()
+    await audit_runner.shutdown()
+    await llm_gateway.aclose()
     await close_db()
+    nlp_executor.shutdown()
 
 from routers import users, scripts, analysis, media
 
@@ -38,11 +52,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# NLP pool saturation is a temporary condition — tell the client to retry instead of a 500
+@app.exception_handler(NLPBackpressureError)
+async def nlp_backpressure_handler(request: Request, exc: NLPBackpressureError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "2"})
+
+@app.exception_handler(NLPTimeoutError)
+async def nlp_timeout_handler(request: Request, exc: NLPTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+# LLM failures are errors, not replies — the gateway has already retried what was worth retrying
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    retry_after = str(max(1, round(exc.retry_after or 5)))
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": retry_after})
+
+@app.exception_handler(LLMTimeoutError)
+async def llm_timeout_handler(request: Request, exc: LLMTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+@app.exception_handler(LLMError)
+async def llm_error_handler(request: Request, exc: LLMError):
+    return JSONResponse(status_code=502, content={"detail": str(exc)})
+
 @app.get("/")
 async def health_check():
     """Health check endpoint to verify backend is running."""
     return {"status": "ok", "message": "Kalam AI Backend is running"}
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe for load balancers / rolling restarts.
+    Returns 503 until every NLP engine has been loaded by the warm-up task.
+    """
+    engines = nlp_executor.readiness()
+    ready = bool(engines) and all(e["state"] == "ready" for e in engines.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "engines": engines, "executor": nlp_executor.stats()},
+    )
+
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(scripts.router, prefix="/api", tags=["Projects & Scripts"])
 app.include_router(analysis.router, prefix="/api", tags=["AI Engine"])
@@ -0,0 +1,95 @@
+"""
+Migration 001 — collapse per-sentence KG links into aggregated edges.
+
+Story bibles written before edge aggregation hold one link per ordered entity
+pair per sentence, each with its own copy of the sentence. This rewrites every
+`story_bibles` and `kg_paragraphs` document into the aggregated layout:
+one link per (source, target, relation) with count / scenes / evidence ids,
+plus an {id: sentence} evidence map. Already-migrated documents are skipped,
+so the script is safe to re-run.
+
+RUN WITH: python migrations/001_aggregate_kg_edges.py [--dry-run] (from inside backend/)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.db import connect_db, close_db, get_database
+from services.kg_incremental import evidence_id, merge_link
+
+# Legacy links carry the sentence inline; aggregated ones never do
+LEGACY_FILTER = {"links.sentence": {"$exists": True}}
+
+
+def aggregate_legacy_links(legacy_links: list[dict]) -> tuple[list[dict], dict]:
+    """
+    Convert per-sentence links to aggregated edges.
+    The old extractor wrote both (A, B) and (B, A) for every sentence, so each
+    sentence is counted once per unordered pair and relation.
+    """
+    links: dict = {}
+    evidence: dict = {}
+    seen = set()
+
+    for link in legacy_links:
+        if "count" in link:
+            # Already aggregated (mixed document) — keep as is
+            merge_link(links, link)
+            continue
+
+        source, target = sorted((link["source"], link["target"]))
+        relation = link.get("relation", "")
+        sentence = (link.get("sentence") or "").strip()
+        sid = evidence_id(sentence) if sentence else None
+
+        if (source, target, relation, sid) in seen:
+            continue
+        seen.add((source, target, relation, sid))
+
+        merged = merge_link(links, {
+            "source": source,
+            "target": target,
+            "relation": relation,
+            "scenes": [link["scene_id"]] if link.get("scene_id") else [],
+            "evidence": [sid] if sid else [],
+        })
+        if sid and sid in merged["evidence"]:
+            evidence[sid] = sentence
+
+    return list(links.values()), evidence
+
+
+async def migrate_collection(name: str, dry_run: bool) -> None:
+    db = get_database()
+    migrated = 0
+    links_before = links_after = 0
+
+    async for doc in db[name].find(LEGACY_FILTER, {"links": 1, "evidence": 1}):
+        links, evidence = aggregate_legacy_links(doc.get("links", []))
+        evidence = {**doc.get("evidence", {}), **evidence}
+        links_before += len(doc.get("links", []))
+        links_after += len(links)
+        migrated += 1
+        if not dry_run:
+            await db[name].update_one({"_id": doc["_id"]}, {"$set": {"links": links, "evidence": evidence}})
+
+    print(f"[{name}] {migrated} document(s): {links_before} links → {links_after} aggregated edges"
+          + (" (dry run, nothing written)" if dry_run else ""))
+
+
+async def main():
+    dry_run = "--dry-run" in sys.argv
+    await connect_db()
+    try:
+        await migrate_collection("story_bibles", dry_run)
+        await migrate_collection("kg_paragraphs", dry_run)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""
+Migration 002 — move story bibles out of one document into kg_nodes / kg_edges / kg_evidence.
+
+Every `story_bibles` document that still embeds `nodes` / `links` / `evidence`
+arrays is exploded into one document per item in the normalized collections
+(see services/kg_store.py) and reduced to its {script_id, version} header.
+Already-migrated headers are skipped, so the script is safe to re-run.
+
+Run migration 001 first: bibles that still carry per-sentence links are skipped.
+
+RUN WITH: python migrations/002_normalize_story_bibles.py [--dry-run] (from inside backend/)
+"""
+
+import sys
+import asyncio
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from pymongo import ReplaceOne
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.db import connect_db, close_db, get_database
+
+EMBEDDED_FILTER = {"$or": [{"nodes": {"$exists": True}}, {"links": {"$exists": True}}]}
+
+
+async def evidence_refs(script_id: str) -> Counter:
+    """Reference count per evidence sentence = number of stored paragraphs that cite it."""
+    refs = Counter()
+    async for doc in get_database()["kg_paragraphs"].find({"script_id": script_id}, {"evidence": 1}):
+        refs.update(doc.get("evidence", {}).keys())
+    return refs
+
+
+async def migrate_bible(bible: dict, dry_run: bool) -> tuple[int, int, int]:
+    db = get_database()
+    script_id = bible["script_id"]
+    nodes = bible.get("nodes", [])
+    links = bible.get("links", [])
+    evidence = bible.get("evidence", {})
+    refs = await evidence_refs(script_id)
+
+    node_ops = [
+        ReplaceOne({"script_id": script_id, "id": n["id"]}, {"script_id": script_id, **n}, upsert=True)
+        for n in nodes
+    ]
+    edge_ops = [
+        ReplaceOne(
+            {"script_id": script_id, "source": l["source"], "target": l["target"], "relation": l.get("relation", "")},
+            {"script_id": script_id, **l},
+            upsert=True,
+        )
+        for l in links
+    ]
+    evidence_ops = [
+        ReplaceOne(
+            {"script_id": script_id, "sid": sid},
+            {"script_id": script_id, "sid": sid, "text": text, "refs": max(1, refs[sid])},
+            upsert=True,
+        )
+        for sid, text in evidence.items()
+    ]
+
+    if not dry_run:
+        for name, ops in (("kg_nodes", node_ops), ("kg_edges", edge_ops), ("kg_evidence", evidence_ops)):
+            if ops:
+                await db[name].bulk_write(ops, ordered=False)
+        await db["story_bibles"].update_one(
+            {"_id": bible["_id"]},
+            {"$unset": {"nodes": "", "links": "", "evidence": ""},
+             "$set": {"version": bible.get("version", 0) + 1, "updated_at": datetime.utcnow()}},
+        )
+    return len(node_ops), len(edge_ops), len(evidence_ops)
+
+
+async def main():
+    dry_run = "--dry-run" in sys.argv
+    await connect_db()
+    try:
+        db = get_database()
+        migrated = skipped = 0
+        totals = Counter()
+        async for bible in db["story_bibles"].find(EMBEDDED_FILTER):
+            if any("sentence" in link for link in bible.get("links", [])):
+                print(f"[skip] {bible['script_id']}: per-sentence links — run 001_aggregate_kg_edges.py first")
+                skipped += 1
+                continue
+            n, e, s = await migrate_bible(bible, dry_run)
+            totals.update(nodes=n, edges=e, evidence=s)
+            migrated += 1
+
+        print(f"[story_bibles] {migrated} migrated, {skipped} skipped: {totals['nodes']} nodes, "
+              f"{totals['edges']} edges, {totals['evidence']} evidence sentences"
+              + (" (dry run, nothing written)" if dry_run else ""))
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+Migration 003 — fold duplicate entities ("Arjun" / "Arjun Mehta" / "Mr. Mehta") together.
+
+Bibles built before the alias table (services/kg_aliases.py) keyed nodes by
+raw entity text. For every paragraph-tracked script this rebuilds the alias
+table from the stored kg_paragraphs contributions, then rebuilds kg_nodes /
+kg_edges / kg_evidence through the normal merge path (kg_store.apply_merge
+with reset), so duplicate nodes and their edges are folded onto one
+canonical id. The header version is bumped, so API processes reload their
+cached bibles.
+
+Safe to re-run: the rebuild is a pure function of kg_paragraphs (and the
+aliases a writer pinned). Re-running it also re-keys rows written before
+gendered honorifics were kept in the alias key.
+
+RUN WITH: python migrations/003_compact_entity_aliases.py [--dry-run] (from inside backend/)
+"""
+
+import sys
+import asyncio
+from collections import Counter
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.db import connect_db, close_db, get_database
+from services.bible_cache import bible_cache
+from services.kg_aliases import AliasTable
+from services.kg_store import apply_merge, bible_stats
+
+
+async def compact_script(script_id: str, dry_run: bool) -> tuple[int, int]:
+    """Returns (nodes before, nodes after) — after is a projection on a dry run."""
+    db = get_database()
+    before = await db["kg_nodes"].count_documents({"script_id": script_id})
+    paragraphs = await db["kg_paragraphs"].find(
+        {"script_id": script_id}, {"hash": 1, "occurrences": 1, "nodes": 1}
+    ).to_list(length=None)
+
+    # Splits the writer made (kg_store.split_alias) survive the rebuild
+    pinned = {
+        doc["alias"]: {"canonical": doc["canonical"], "type": doc.get("type"), "honorific": doc.get("honorific")}
+        async for doc in db["kg_aliases"].find({"script_id": script_id, "pinned": True})
+    }
+
+    if dry_run:
+        table = AliasTable(pinned)
+        resolved = table.resolve_contributions([(p, p.get("occurrences", 1)) for p in paragraphs])
+        return before, len({n["id"] for contribution, _ in resolved for n in contribution.get("nodes", [])})
+
+    # Aliases are append-only during normal merges — start the table over so
+    # every surface is resolved with the whole manuscript in view
+    await db["kg_aliases"].delete_many({"script_id": script_id, "pinned": {"$ne": True}})
+    bible_cache.invalidate(script_id)
+    occurrences = {p["hash"]: p.get("occurrences", 1) for p in paragraphs}
+    await apply_merge(script_id, occurrences, {}, reset=True)
+    return before, (await bible_stats(script_id))["nodes"]
+
+
+async def main():
+    dry_run = "--dry-run" in sys.argv
+    await connect_db()
+    try:
+        db = get_database()
+        totals = Counter()
+        for script_id in await db["kg_paragraphs"].distinct("script_id"):
+            before, after = await compact_script(script_id, dry_run)
+            totals.update(scripts=1, before=before, after=after)
+            if before != after:
+                print(f"[{script_id}] {before} → {after} nodes")
+
+        print(f"[kg_aliases] {totals['scripts']} scripts compacted: {totals['before']} → {totals['after']} nodes"
+              + (" (dry run, nothing written)" if dry_run else ""))
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
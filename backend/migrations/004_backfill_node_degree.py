@@ -0,0 +1,59 @@
+"""
+Migration 004 — store each entity's degree on its kg_nodes document.
+
+Windowed story-bible reads rank nodes by `degree` (the number of kg_edges
+touching them) through the (script_id, [type,] degree, id) indexes, and
+kg_merge keeps it current as edges appear and vanish. Nodes written before
+that have no degree: this counts every script's edges once and sets it.
+
+Safe to re-run: degrees are recomputed from kg_edges, not incremented.
+
+RUN WITH: python migrations/004_backfill_node_degree.py (from inside backend/)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pymongo import UpdateMany, UpdateOne
+
+from config.db import connect_db, close_db, get_database
+
+BATCH = 1000
+
+
+async def backfill_script(script_id: str) -> int:
+    """Sets degree on every node of one script; returns how many have edges."""
+    db = get_database()
+    pipeline = [
+        {"$match": {"script_id": script_id}},
+        {"$project": {"ends": ["$source", "$target"]}},
+        {"$unwind": "$ends"},
+        {"$group": {"_id": "$ends", "degree": {"$sum": 1}}},
+    ]
+    ops = [UpdateMany({"script_id": script_id}, {"$set": {"degree": 0}})]
+    async for row in db["kg_edges"].aggregate(pipeline):
+        ops.append(UpdateOne({"script_id": script_id, "id": row["_id"]}, {"$set": {"degree": row["degree"]}}))
+    for start in range(0, len(ops), BATCH):
+        await db["kg_nodes"].bulk_write(ops[start:start + BATCH], ordered=True)
+    return len(ops) - 1
+
+
+async def main():
+    await connect_db()
+    try:
+        db = get_database()
+        scripts = await db["kg_nodes"].distinct("script_id")
+        connected = 0
+        for script_id in scripts:
+            connected += await backfill_script(script_id)
+        print(f"[kg_nodes] degree set for {len(scripts)} scripts ({connected} connected entities)")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
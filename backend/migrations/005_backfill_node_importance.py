@@ -0,0 +1,39 @@
+"""
+Migration 005 — store each entity's importance score on its kg_nodes document.
+
+Prompt summaries take the most important entities first (services/kg_importance.py),
+and kg_merge keeps `importance` current from then on. Nodes written before
+that get it computed here from their stored count and degree — run
+migration 004 (degree) first. Cached bibles need no reload: previews
+compute the score for nodes that don't carry it yet.
+
+Safe to re-run: the score is recomputed, not incremented.
+
+RUN WITH: python migrations/005_backfill_node_importance.py (from inside backend/)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.db import connect_db, close_db, get_database
+from services.kg_importance import DEGREE_WEIGHT
+
+
+async def main():
+    await connect_db()
+    try:
+        result = await get_database()["kg_nodes"].update_many({}, [{"$set": {"importance": {"$add": [
+            {"$ifNull": ["$count", 1]},
+            {"$multiply": [DEGREE_WEIGHT, {"$ifNull": ["$degree", 0]}]},
+        ]}}}])
+        print(f"[kg_nodes] importance set on {result.modified_count} of {result.matched_count} nodes")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
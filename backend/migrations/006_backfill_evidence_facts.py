@@ -0,0 +1,66 @@
+"""
+Migration 006 — store fact features (subject, verb lemma, polarity) on kg_evidence.
+
+The contradiction check looks stored facts up by (entity, verb lemma) and
+reads their polarity from kg_evidence (services/kg_facts.py) instead of
+re-parsing them; the KG builder records the features when a sentence first
+becomes evidence. Sentences stored before that are parsed here, once, and
+each touched script's version is bumped so API processes reload their
+cached bibles. Until then the detector parses those sentences itself.
+
+Safe to re-run: only documents without features are parsed.
+
+RUN WITH: python migrations/006_backfill_evidence_facts.py (from inside backend/)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pymongo import UpdateOne
+
+from config.db import connect_db, close_db, get_database
+from services.kg_facts import fact_features, relation_lemma
+from services.kg_store import bump_version
+from services.nlp_registry import get_nlp
+
+BATCH = 1000
+
+
+async def backfill_script(nlp, script_id: str) -> int:
+    """Parses and updates the script's evidence without features; returns how many."""
+    db = get_database()
+    docs = await db["kg_evidence"].find(
+        {"script_id": script_id, "negated": {"$exists": False}}, {"_id": 0, "sid": 1, "text": 1}
+    ).to_list(length=None)
+    for start in range(0, len(docs), BATCH):
+        batch = docs[start:start + BATCH]
+        ops = [
+            UpdateOne({"script_id": script_id, "sid": doc["sid"]}, {"$set": fact_features(parsed, relation_lemma(parsed))})
+            for doc, parsed in zip(batch, nlp.pipe(doc["text"] for doc in batch))
+        ]
+        await db["kg_evidence"].bulk_write(ops, ordered=False)
+    if docs:
+        await bump_version(script_id)
+    return len(docs)
+
+
+async def main():
+    nlp = get_nlp("Migration006")
+    await connect_db()
+    try:
+        db = get_database()
+        scripts = await db["kg_evidence"].distinct("script_id", {"negated": {"$exists": False}})
+        parsed = 0
+        for script_id in scripts:
+            parsed += await backfill_script(nlp, script_id)
+        print(f"[kg_evidence] fact features set on {parsed} sentences in {len(scripts)} scripts")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
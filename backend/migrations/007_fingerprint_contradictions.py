@@ -0,0 +1,108 @@
+"""
+Migration 007 — fingerprint stored contradictions and drop the duplicates.
+
+Flags are now upserted by (script_id, sentence_hash, reason_tag,
+conflict_hash) (services/contradiction_store.py) behind a unique index that
+only covers documents with a sentence_hash. Documents inserted before that
+have no hashes, and the chat Fact Check stored a new copy each time the same
+question was asked; documents fingerprinted before conflict_hash was part of
+the key have a sentence_hash only. This gives every old document its hashes
+(conflict_hash from the evidence sentence quoted in its detail) and keeps one
+document per fingerprint: one that is already fingerprinted if there is one,
+else the oldest. The survivor counts as resolved only if every copy was — if
+any copy was still open, the writer was still seeing the flag. The unique
+index on the old three-field fingerprint is dropped, so one sentence can be
+flagged against several facts.
+
+Safe to re-run: only documents without a conflict_hash are read.
+
+RUN WITH: python migrations/007_fingerprint_contradictions.py (from inside backend/)
+"""
+
+import re
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pymongo import DeleteMany, UpdateOne
+
+from config.db import connect_db, close_db, get_database
+from services.contradiction_store import fingerprint
+from services.kg_incremental import evidence_id
+
+# contradiction_detector._flag's detail quotes the evidence sentence the flag conflicts with
+_CONTEXT = re.compile(r"Existing context: '(.*)'$", re.DOTALL)
+OLD_FINGERPRINT = [("script_id", 1), ("sentence_hash", 1), ("reason_tag", 1)]
+
+
+def conflict_id(detail) -> str:
+    """Evidence id of the sentence quoted in a stored flag's detail (None if it quotes none)."""
+    match = _CONTEXT.search(detail or "")
+    return evidence_id(match.group(1)) if match else None
+
+
+async def fingerprint_script(script_id: str) -> tuple:
+    """Hashes the script's unfingerprinted flags; returns (kept, deleted)."""
+    db = get_database()
+    legacy = await db["contradictions"].find(
+        {"script_id": script_id, "conflict_hash": {"$exists": False}},
+        {"_id": 1, "sentence": 1, "reason_tag": 1, "conflict_with": 1, "resolved": 1},
+    ).sort("_id", 1).to_list(length=None)
+
+    groups = {}
+    for doc in legacy:
+        key = fingerprint(script_id, {"conflicting_sentence": doc.get("sentence"), "reason_tag": doc.get("reason_tag"),
+                                      "evidence_id": conflict_id(doc.get("conflict_with"))})
+        groups.setdefault((key["sentence_hash"], key["reason_tag"], key["conflict_hash"]), []).append(doc)
+
+    ops, kept, deleted = [], 0, 0
+    for (sentence_hash, reason_tag, conflict_hash), docs in groups.items():
+        resolved = all(doc.get("resolved") for doc in docs)
+        current = await db["contradictions"].find_one(
+            {"script_id": script_id, "sentence_hash": sentence_hash, "reason_tag": reason_tag,
+             "conflict_hash": {"$exists": True, "$eq": conflict_hash}},
+            {"_id": 1, "resolved": 1},
+        )
+        if current:
+            survivor, duplicates = current["_id"], [doc["_id"] for doc in docs]
+            resolved = resolved and bool(current.get("resolved"))
+        else:
+            survivor, duplicates = docs[0]["_id"], [doc["_id"] for doc in docs[1:]]
+            ops.append(UpdateOne(
+                {"_id": survivor}, {"$set": {"sentence_hash": sentence_hash, "conflict_hash": conflict_hash}}
+            ))
+            kept += 1
+        ops.append(UpdateOne({"_id": survivor}, {"$set": {"resolved": resolved}}))
+        if duplicates:
+            ops.append(DeleteMany({"_id": {"$in": duplicates}}))
+            deleted += len(duplicates)
+    if ops:
+        # Ordered: a survivor is hashed before any other document could claim its fingerprint
+        await db["contradictions"].bulk_write(ops, ordered=True)
+    return kept, deleted
+
+
+async def main():
+    await connect_db()
+    try:
+        db = get_database()
+        for name, spec in (await db["contradictions"].index_information()).items():
+            if spec["key"] == OLD_FINGERPRINT:
+                await db["contradictions"].drop_index(name)
+                print(f"[contradictions] dropped the three-field fingerprint index {name}")
+        scripts = await db["contradictions"].distinct("script_id", {"conflict_hash": {"$exists": False}})
+        kept = deleted = 0
+        for script_id in scripts:
+            script_kept, script_deleted = await fingerprint_script(script_id)
+            kept += script_kept
+            deleted += script_deleted
+        print(f"[contradictions] fingerprinted {kept} flags, deleted {deleted} duplicates in {len(scripts)} scripts")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
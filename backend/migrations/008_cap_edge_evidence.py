@@ -0,0 +1,40 @@
+"""
+Migration 008 — cap the evidence ids stored on each kg_edges document.
+
+kg_merge used to $addToSet every supporting sentence id onto an edge, so an
+edge that recurs through a long manuscript grew without bound (reads only
+ever showed the first READ_EVIDENCE_PER_EDGE). Merges now $push with a $slice
+at MAX_EVIDENCE_PER_EDGE; this trims the edges written before that to the same
+first ids. The sentences themselves stay in kg_evidence.
+
+Safe to re-run: only edges still over the cap are touched.
+
+RUN WITH: python migrations/008_cap_edge_evidence.py (from inside backend/)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.db import connect_db, close_db, get_database
+from services.kg_incremental import MAX_EVIDENCE_PER_EDGE
+
+
+async def main():
+    await connect_db()
+    try:
+        result = await get_database()["kg_edges"].update_many(
+            # An element at index MAX_EVIDENCE_PER_EDGE means the list is over the cap
+            {f"evidence.{MAX_EVIDENCE_PER_EDGE}": {"$exists": True}},
+            [{"$set": {"evidence": {"$slice": ["$evidence", MAX_EVIDENCE_PER_EDGE]}}}],
+        )
+        print(f"[kg_edges] evidence capped at {MAX_EVIDENCE_PER_EDGE} ids on {result.modified_count} edges")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+Migration 009 — store the types of both ends on each kg_edges document.
+
+Type-filtered story-bible windows (bible_window.edge_filter) match links on
+`source_type` / `target_type` instead of listing every node id of the wanted
+types; kg_merge sets both when it inserts an edge. Edges written before that
+have neither: this copies each script's node types onto them.
+
+Safe to re-run: only edges still missing an end type are touched.
+
+RUN WITH: python migrations/009_backfill_edge_end_types.py (from inside backend/)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pymongo import UpdateMany
+
+from config.db import connect_db, close_db, get_database
+
+BATCH = 1000
+
+
+async def backfill_script(script_id: str) -> int:
+    """Sets end types on one script's edges; returns how many edges were updated."""
+    db = get_database()
+    by_type = {}
+    async for node in db["kg_nodes"].find({"script_id": script_id}, {"_id": 0, "id": 1, "type": 1}):
+        by_type.setdefault(node.get("type"), []).append(node["id"])
+
+    ops = []
+    for node_type, ids in by_type.items():
+        for start in range(0, len(ids), BATCH):
+            chunk = ids[start:start + BATCH]
+            for end in ("source", "target"):
+                ops.append(UpdateMany(
+                    {"script_id": script_id, end: {"$in": chunk}, f"{end}_type": {"$exists": False}},
+                    {"$set": {f"{end}_type": node_type}},
+                ))
+    if not ops:
+        return 0
+    result = await db["kg_edges"].bulk_write(ops, ordered=False)
+    return result.modified_count
+
+
+async def main():
+    await connect_db()
+    try:
+        db = get_database()
+        scripts = await db["kg_edges"].distinct("script_id", {"$or": [
+            {"source_type": {"$exists": False}}, {"target_type": {"$exists": False}},
+        ]})
+        updated = 0
+        for script_id in scripts:
+            updated += await backfill_script(script_id)
+        print(f"[kg_edges] end types set for {len(scripts)} scripts ({updated} edge updates)")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""
+Migration 010 — store each kg_paragraphs document's scene-free `text_hash`.
+
+Paragraph keys include their scene (kg_incremental.paragraph_hash), so text
+analysed without its heading — a chapter body, a selection — was cut into the
+opening scene, missed every stored key and was extracted a second time. Such
+text is now matched on `text_hash` (the paragraph hashed without a scene),
+which apply_merge stores when it claims a paragraph. Paragraphs stored before
+that are matched here against their script's saved text; any not found there
+no longer exist in it and go with the next full-manuscript analysis.
+
+Safe to re-run: only documents without a text_hash are touched.
+
+RUN WITH: python migrations/010_backfill_paragraph_text_hashes.py (from inside backend/)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the parent directory (backend root) to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from config.db import connect_db, close_db, get_database
+from ai.audit import plain_text
+from services.kg_incremental import paragraph_hash
+from services.kg_scenes import split_scenes
+
+BATCH = 1000
+
+
+async def backfill_script(script_id: str) -> int:
+    """Sets text hashes on one script's paragraphs found in its saved text; returns how many."""
+    db = get_database()
+    script = None
+    if ObjectId.is_valid(script_id):
+        script = await db["scripts"].find_one({"_id": ObjectId(script_id)}, {"content": 1})
+    if not script:
+        return 0
+    text_hash_of = {
+        paragraph_hash(paragraph, scene["scene"]): paragraph_hash(paragraph)
+        for scene in split_scenes(plain_text(script.get("content", "")))
+        for paragraph in scene["paragraphs"]
+    }
+    missing = await db["kg_paragraphs"].distinct(
+        "hash", {"script_id": script_id, "text_hash": {"$exists": False}}
+    )
+    ops = [
+        UpdateOne({"script_id": script_id, "hash": h}, {"$set": {"text_hash": text_hash_of[h]}})
+        for h in missing if h in text_hash_of
+    ]
+    updated = 0
+    for start in range(0, len(ops), BATCH):
+        result = await db["kg_paragraphs"].bulk_write(ops[start:start + BATCH], ordered=False)
+        updated += result.modified_count
+    return updated
+
+
+async def main():
+    await connect_db()
+    try:
+        db = get_database()
+        scripts = await db["kg_paragraphs"].distinct("script_id", {"text_hash": {"$exists": False}})
+        updated = 0
+        for script_id in scripts:
+            updated += await backfill_script(script_id)
+        print(f"[kg_paragraphs] text hashes set on {updated} paragraphs across {len(scripts)} scripts")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,49 +1,34 @@
-from fastapi import APIRouter, HTTPException
+from typing import List, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from config.db_helpers import find_many, update_document, insert_document
 from config.db import get_database
+from config.db_helpers import find_many, update_document
 
-# Import our AI Engines
-from services.knowledge_graph import KnowledgeGraphEngine
-from services.contradiction_detector import ContradictionDetector
-from services.persona_generator import PersonaGenerator
+# AI Engines run in the NLP process pool — handlers await them instead of blocking the loop
+from services.nlp_executor import nlp_executor, NLPBackpressureError, NLPTimeoutError
 # from services.style_transformer import StyleTransformer
-from services.enhancement_service import EnhancementService
 from ai.groq_service import generate_chat_reply
+from ai.llm_gateway import llm_gateway, LLMError
 from ai.writing_tools import handle_ai_action, ai_tweak_plot, ai_auto_suggest
 from ai.fact_checker import fact_check_with_rag
-from ai.flow import orchestrate_analysis
+from ai.flow import check_contradictions, orchestrate_analysis, update_knowledge_graph
+from ai.audit import audit_events, audit_runner, cancel_audit, create_audit, get_audit, plain_text
+from services.kg_store import (
+    load_bible, load_window, load_k_hop, load_path, load_hubs, export_bible, evidence_texts, list_scenes,
+    bible_stats, bible_version, cached_bible, format_bible_summary, split_alias,
+)
+from services.bible_cache import bible_cache
+from services.kg_incremental import paragraph_spans
+from services.contradiction_store import save_flags
 
 router = APIRouter()
 
-# Initialize models once at startup (module level) to avoid reloading spaCy per request
-kg_engine = None
-detector = None
-persona_gen = None
-enhancement_service = None
-
-try:
-    kg_engine = KnowledgeGraphEngine()
-except Exception as e:
-    print(f"Error loading KnowledgeGraphEngine: {e}")
-
-try:
-    detector = ContradictionDetector()
-except Exception as e:
-    print(f"Error loading ContradictionDetector: {e}")
-
-try:
-    persona_gen = PersonaGenerator()
-except Exception as e:
-    print(f"Error loading PersonaGenerator: {e}")
-
-try:
-    enhancement_service = EnhancementService()
-except Exception as e:
-    print(f"Error loading EnhancementService: {e}")
-
 class AnalyzeRequest(BaseModel):
     text: str
+    full_manuscript: bool = False  # `text` is the whole script — lets the analysis retract what's gone from it
 
 class PersonaRequest(BaseModel):
     content: str
@@ -61,6 +46,7 @@ class ChatRequest(BaseModel):
     scriptId: str = ""
     context: str = ""
     mode: str = "Standard"
+    cursor: Optional[int] = None  # Caret offset in `context` — narrows story-bible context to nearby scenes
 
 class TweakPlotRequest(BaseModel):
     script_id: str
@@ -70,90 +56,33 @@ class TweakPlotRequest(BaseModel):
 class AutoSuggestRequest(BaseModel):
     script_id: str
     recent_text: str  # Last ~500 words the user has typed
+    cursor: Optional[int] = None  # Caret offset in the manuscript — narrows story-bible context to nearby scenes
 
 class OrchestrateRequest(BaseModel):
     text: str
     run_suggestions: bool = True
     user_message: str = ""  # Raw chat message — used as intent context for suggestions
+    full_manuscript: bool = False  # See AnalyzeRequest
 
 @router.post("/scripts/{script_id}/analyze")
 async def analyze_script(script_id: str, request: AnalyzeRequest):
 
-    db = get_database()
-    
-    # 1. Fetch current graph to detect contradictions against
-    existing_bible = await db["story_bibles"].find_one({"script_id": script_id})
-    existing_nodes = existing_bible.get("nodes", []) if existing_bible else []
-    existing_links = existing_bible.get("links", []) if existing_bible else []
-
-    # 2. Contradiction Detection
-    # Run the new text against the existing graph to find logic errors
-    flags = detector.check_sentence(request.text, existing_nodes=existing_nodes, existing_links=existing_links)
-
-    # 3. Knowledge Graph Update
-    # Process the ENTIRE new text to extract entities and relationships (Stateless)
-    graph_data = kg_engine.process_text(request.text, scene_id="current_scene")
-
-    # 4. Merge the new graph data with the existing graph
-    # Create dicts for faster lookup
-    existing_nodes_dict = {n["id"]: n for n in existing_nodes}
-    
-    # Merge Nodes
-    for new_node in graph_data.get("nodes", []):
-        node_id = new_node["id"]
-        if node_id in existing_nodes_dict:
-            # Merge mentions if the node exists
-            existing_mentions = set(existing_nodes_dict[node_id].get("mentions", []))
-            new_mentions = set(new_node.get("mentions", []))
-            existing_nodes_dict[node_id]["mentions"] = list(existing_mentions.union(new_mentions))
-            existing_nodes_dict[node_id]["count"] = new_node.get("count", 1)
-        else:
-            existing_nodes_dict[node_id] = new_node
-            
-    merged_nodes = list(existing_nodes_dict.values())
-    
-    # Merge Links
-    # To prevent duplicates, we uniquely identify a link by (source, target, relation)
-    merged_links = list(existing_links)
-    existing_links_set = {(link["source"], link["target"], link.get("relation", "")) for link in existing_links}
-    
-    for new_link in graph_data.get("links", []):
-        link_signature = (new_link["source"], new_link["target"], new_link.get("relation", ""))
-        if link_signature not in existing_links_set:
-            merged_links.append(new_link)
-            existing_links_set.add(link_signature)
-
-    # 5. Save the merged Story Bible to MongoDB
-    bible_data = {
-        "script_id": script_id,
-        "nodes": merged_nodes,
-        "links": merged_links
-    }
-    
-    await db["story_bibles"].update_one(
-        {"script_id": script_id},
-        {"$set": bible_data},
-        upsert=True
-    )
+    # 1–3. Incremental KG update: only new/edited paragraphs are extracted and
+    # checked for contradictions; the merged Story Bible is saved by the flow
+    kg_update = await update_knowledge_graph(script_id, request.text, full_manuscript=request.full_manuscript)
+    flags = kg_update["flags"]
 
-    # 4. Save any contradictions found
-    saved_flags = []
-    for flag in flags:
-        new_contra = {
-            "script_id": script_id,
-            "sentence": flag.get("conflicting_sentence"),
-            "conflict_with": flag.get("reason_detail"),
-            "reason_tag": flag.get("reason_tag"),
-            "resolved": False
-        }
-        contra_id = await insert_document("contradictions", new_contra)
-        saved_flags.append(contra_id)
+    # 4. Save any contradictions found (one upsert per fingerprint, one round-trip)
+    saved_flags = await save_flags(script_id, flags)
 
     return {
         "status": "success", 
         "message": "Analysis complete", 
         "script_id": script_id,
-        "contradictions_found": len(saved_flags)
+        "contradictions_found": len(saved_flags),
+        "paragraphs": kg_update["paragraphs"],
+        # Minimal change to the story bible — the graph view patches itself with it
+        "kg_delta": kg_update["kg_delta"]
     }
 
 @router.post("/scripts/{script_id}/orchestrate")
@@ -173,18 +102,160 @@ async def orchestrate_script(script_id: str, request: OrchestrateRequest):
             text=request.text,
             run_suggestions=request.run_suggestions,
             user_message=request.user_message,
+            full_manuscript=request.full_manuscript,
         )
         return result
+    except (NLPBackpressureError, NLPTimeoutError):
+        # Mapped to 503/504 by the app-level handlers in main.py
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/nlp/models")
+async def get_loaded_models():
+    """Loaded spaCy pipelines and the services sharing each one (as seen by one NLP worker)."""
+    stats = await nlp_executor.run("worker_stats")
+    return {"pid": stats["pid"], "models": stats["models"]}
+
+@router.get("/nlp/doc-cache")
+async def get_doc_cache_stats():
+    """Hit/miss counters and size of the parsed-Doc cache (as seen by one NLP worker)."""
+    stats = await nlp_executor.run("worker_stats")
+    return {"pid": stats["pid"], **stats["doc_cache"]}
+
+@router.get("/nlp/executor")
+async def get_executor_stats():
+    """In-flight, rejected and timed-out counts for the NLP process pool."""
+    return nlp_executor.stats()
+
+@router.get("/llm/gateway")
+async def get_llm_gateway_stats():
+    """Calls, retries, latency and token usage per purpose for the LLM gateway (this API process)."""
+    return llm_gateway.stats()
+
+@router.get("/kg/bible-cache")
+async def get_bible_cache_stats():
+    """Hit ratio, entry count and approximate memory use of the story-bible cache (this API process)."""
+    return bible_cache.stats()
+
 @router.get("/scripts/{script_id}/story_bible")
-async def get_story_bible(script_id: str):
-    bibles = await find_many("story_bibles", {"script_id": script_id})
-    if not bibles:
-        return {"nodes": [], "links": []}
-    return bibles[0]
+async def get_story_bible(
+    script_id: str,
+    entity: Optional[List[str]] = Query(None),
+    top_k: Optional[int] = Query(None, ge=1, le=2000),
+    type: Optional[List[str]] = Query(None),
+    scene_from: Optional[int] = Query(None, ge=0),
+    scene_to: Optional[int] = Query(None, ge=0),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=2000),
+    fields: Optional[List[str]] = Query(None),
+    with_evidence: bool = False,
+):
+    """
+    The whole bible, or — with any window parameter — one page of it read
+    through indexed queries: links around `entity`, among the `top_k`
+    best-connected nodes, filtered by `type` / a `scene_from`..`scene_to`
+    range of scene ordinals (GET .../scenes), paged with `cursor`
+    (the previous page's next_cursor), projected to `fields`. Windows leave
+    out evidence text unless `with_evidence` is set.
+    """
+    version = await bible_version(script_id)
+    window_params = (entity, top_k, type, scene_from, scene_to, cursor, limit, fields)
+    windowed = any(p is not None for p in window_params) or with_evidence
+    if not windowed:
+        return {"script_id": script_id, "version": version, **await load_bible(script_id)}
+    try:
+        window = await load_window(
+            script_id, entity, top_k, type, scene_from, scene_to, cursor, limit or 200, fields, with_evidence
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"script_id": script_id, "version": version, **window}
+
+@router.get("/scripts/{script_id}/story_bible/export")
+async def export_story_bible(script_id: str, request: Request):
+    """
+    The bible as interned string tables + integer columns (services/bible_export.py),
+    without evidence text. ETag is the bible version, so an unchanged graph costs a 304.
+    """
+    from services.bible_export import MEDIA_TYPE  # NumPy-backed; loaded on first export
+
+    version, payload = await export_bible(script_id)
+    etag = f'"{script_id}-v{version}"'
+    headers = {"ETag": etag, "X-Bible-Version": str(version), "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type=MEDIA_TYPE, headers=headers)
+
+@router.get("/scripts/{script_id}/story_bible/evidence")
+async def get_story_bible_evidence(script_id: str, sid: List[str] = Query(...)):
+    """Evidence sentences by id, for the links the viewer opens."""
+    if len(sid) > 200:
+        raise HTTPException(status_code=400, detail="At most 200 evidence ids per request")
+    return {"script_id": script_id, "evidence": await evidence_texts(script_id, sid)}
+
+@router.get("/scripts/{script_id}/story_bible/neighbourhood")
+async def get_story_bible_neighbourhood(
+    script_id: str,
+    entity: List[str] = Query(...),
+    hops: int = Query(1, ge=1, le=4),
+    relation: Optional[List[str]] = Query(None),
+    min_count: int = Query(1, ge=1),
+    max_nodes: int = Query(200, ge=1, le=2000),
+):
+    """Entities within `hops` of the given ones (ids or aliases), with the links among them."""
+    subgraph = await load_k_hop(script_id, entity, hops, relation, min_count, max_nodes)
+    return {"script_id": script_id, **subgraph}
+
+@router.get("/scripts/{script_id}/story_bible/path")
+async def get_story_bible_path(
+    script_id: str,
+    source: str,
+    target: str,
+    relation: Optional[List[str]] = Query(None),
+    min_count: int = Query(1, ge=1),
+):
+    """Shortest chain of relationships connecting two entities."""
+    found = await load_path(script_id, source, target, relation, min_count)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"No connection between '{source}' and '{target}'")
+    return {"script_id": script_id, **found}
+
+@router.get("/scripts/{script_id}/story_bible/hubs")
+async def get_story_bible_hubs(
+    script_id: str,
+    top: int = Query(10, ge=1, le=200),
+    type: Optional[str] = None,
+    relation: Optional[List[str]] = Query(None),
+    min_count: int = Query(1, ge=1),
+):
+    """The best-connected entities, by how many others they're linked to (optionally over some relations only)."""
+    hubs = await load_hubs(script_id, top, type, relation, min_count)
+    return {"script_id": script_id, **hubs}
+
+@router.get("/scripts/{script_id}/scenes")
+async def get_scenes(script_id: str):
+    """Chapters / scenes found at the last analysis, in manuscript order (ids used in mentions and links)."""
+    return {"script_id": script_id, "scenes": await list_scenes(script_id)}
+
+@router.delete("/scripts/{script_id}/aliases")
+async def delete_alias(script_id: str, name: str = Query(..., min_length=1)):
+    """
+    Split `name` back out of the entity it was folded into ("Mrs. Mehta" is not "Arjun Mehta").
+    The paragraphs behind that entity are re-extracted from the saved script.
+    """
+    split = await split_alias(script_id, name)
+    if split is None:
+        raise HTTPException(status_code=404, detail=f"'{name}' is not mapped onto another entity")
+    script = None
+    if ObjectId.is_valid(script_id):
+        script = await get_database()["scripts"].find_one({"_id": ObjectId(script_id)}, {"content": 1})
+    text = plain_text(script.get("content", "")) if script else ""
+    kg_delta = None
+    if text.strip():
+        kg_delta = (await update_knowledge_graph(script_id, text, full_manuscript=True))["kg_delta"]
+    return {"script_id": script_id, **split, "kg_delta": kg_delta}
 
 @router.get("/scripts/{script_id}/contradictions")
 async def get_contradictions(script_id: str):
@@ -197,6 +268,53 @@ async def resolve_contradiction(contra_id: str):
         raise HTTPException(status_code=400, detail="Failed to resolve contradiction")
     return {"status": "success"}
 
+@router.post("/scripts/{script_id}/audit")
+async def start_script_audit(script_id: str):
+    """
+    Queue a background consistency audit of every chapter of the script.
+    Follow it with GET /audits/{id}/events; flags also land in /contradictions.
+    """
+    if not ObjectId.is_valid(script_id) or not await get_database()["scripts"].find_one({"_id": ObjectId(script_id)}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Script not found")
+    return await create_audit("script", script_id, [script_id])
+
+@router.post("/projects/{project_id}/audit")
+async def start_project_audit(project_id: str):
+    """Queue a background consistency audit of every script in the project, oldest first."""
+    db = get_database()
+    if not ObjectId.is_valid(project_id) or not await db["projects"].find_one({"_id": ObjectId(project_id)}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Project not found")
+    scripts = await db["scripts"].find({"project_id": project_id}, {"_id": 1}).sort("created_at", 1).to_list(length=None)
+    return await create_audit("project", project_id, [str(s["_id"]) for s in scripts])
+
+@router.get("/audits/runner")
+async def get_audit_runner_stats():
+    """Audits running in this API process."""
+    return audit_runner.stats()
+
+@router.get("/audits/{job_id}")
+async def get_audit_status(job_id: str):
+    job = await get_audit(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Audit not found")
+    return job
+
+@router.get("/audits/{job_id}/events")
+async def stream_audit_events(job_id: str, last_event_id: Optional[str] = Header(None)):
+    """Server-sent events: `progress`, one `contradiction` per flag found, then `end`."""
+    if not await get_audit(job_id):
+        raise HTTPException(status_code=404, detail="Audit not found")
+    return StreamingResponse(
+        audit_events(job_id, last_event_id), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/audits/{job_id}/cancel")
+async def cancel_audit_job(job_id: str):
+    if not await cancel_audit(job_id):
+        raise HTTPException(status_code=400, detail="Audit is not queued or running")
+    return {"status": "success"}
+
 @router.get("/scripts/{script_id}/enhancements")
 async def get_enhancements(script_id: str):
     return await find_many("enhancements", {"script_id": script_id, "accepted": None})
@@ -214,9 +332,11 @@ async def extract_personas(script_id: str, request: PersonaRequest):
     Generate character personas from text using the PersonaGenerator.
     """
     try:
-        personas_data = persona_gen.generate_personas(request.content)
+        personas_data = await nlp_executor.run("personas", request.content)
         # Note: We aren't saving to DB here per frontend needs, just returning the extraction
         return personas_data
+    except (NLPBackpressureError, NLPTimeoutError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -225,7 +345,7 @@ async def enhance_content(request: AIActionRequest):
     """
     Endpoint for sentence/paragraph logic/flow enhancement.
     """
-    result = enhancement_service.enhance_paragraph(request.content)
+    result = await nlp_executor.run("enhance", request.content)
     
     # Format to match frontend AIResponse interface
     return {
@@ -276,6 +396,9 @@ async def tweak_plot(request: TweakPlotRequest):
             script_id=request.script_id,
         )
         return result
+    except LLMError:
+        # Mapped to 502/503/504 by the app-level handlers in main.py
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -288,29 +411,13 @@ async def auto_suggest_tweaks(request: AutoSuggestRequest):
     Returns up to 4 specific suggestions (potential contradictions, continuity
     opportunities, timeline gaps) to surface while the user is still writing.
     """
-    db = get_database()
-
     # Build story bible summary to pass as grounding context to Groq
     story_bible_summary = ""
     if request.script_id:
-        bible = await db["story_bibles"].find_one({"script_id": request.script_id})
-        if bible:
-            nodes = bible.get("nodes", [])
-            links = bible.get("links", [])
-
-            node_lines = [
-                f"- {n.get('type', 'Entity')}: {n['id']}"
-                for n in nodes[:40]
-            ]
-            link_lines = [
-                f"- {l['source']} [{l.get('relation', 'related to')}] {l['target']}"
-                for l in links[:60]
-            ]
-
-            if node_lines:
-                story_bible_summary += "Entities:\n" + "\n".join(node_lines) + "\n"
-            if link_lines:
-                story_bible_summary += "Relationships:\n" + "\n".join(link_lines)
+        preview = await load_bible(
+            request.script_id, max_nodes=40, max_links=60, with_evidence=False, cursor=request.cursor
+        )
+        story_bible_summary = format_bible_summary(preview, await bible_stats(request.script_id))
 
     try:
         result = await ai_auto_suggest(
@@ -318,6 +425,8 @@ async def auto_suggest_tweaks(request: AutoSuggestRequest):
             story_bible_summary=story_bible_summary,
         )
         return result
+    except LLMError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -327,44 +436,6 @@ async def chat_interaction(request: ChatRequest):
     """
     Endpoint for conversing with the Groq-powered AI writing assistant.
     """
-    db = get_database()
-    
-    story_bible_summary = ""
-    if request.scriptId:
-        bible = await db["story_bibles"].find_one({"script_id": request.scriptId})
-        if bible:
-            nodes = bible.get("nodes", [])
-            links = bible.get("links", [])
-            
-            # Format nodes (capped to avoid token limit errors)
-            MAX_NODES = 50
-            MAX_LINKS = 100
-            
-            node_summaries = []
-            for n in nodes[:MAX_NODES]:
-                mentions = n.get("mentions", [])
-                mentions_preview = mentions[:5]
-                if len(mentions) > 5:
-                    mentions_preview.append("...")
-                m_str = ", ".join(mentions_preview)
-                node_summaries.append(f"- {n.get('type', 'Entity')}: {n['id']} (Scenes: {m_str})")
-            if len(nodes) > MAX_NODES:
-                node_summaries.append(f"... (and {len(nodes) - MAX_NODES} more entities)")
-                
-            # Format links (capped to avoid token limit errors)
-            link_summaries = []
-            for link in links[:MAX_LINKS]:
-                rel = link.get("relation", "interacted with")
-                link_summaries.append(f"- {link['source']} [{rel}] {link['target']}")
-            if len(links) > MAX_LINKS:
-                link_summaries.append(f"... (and {len(links) - MAX_LINKS} more relationships)")
-                
-            story_bible_summary = "STORY BIBLE CONTEXT:\n"
-            if node_summaries:
-                story_bible_summary += "Entities/Characters:\n" + "\n".join(node_summaries) + "\n\n"
-            if link_summaries:
-                story_bible_summary += "Relationships/Events:\n" + "\n".join(link_summaries) + "\n"
-                
     # Fact Check mode — use RAG pipeline with knowledge graph retrieval
     if request.mode == "Fact Check":
         # Extract the last user message for fact checking
@@ -377,23 +448,15 @@ async def chat_interaction(request: ChatRequest):
         # Also run the rule-based contradiction detector
         programmatic_flags = []
         if request.scriptId:
-            bible = await db["story_bibles"].find_one({"script_id": request.scriptId})
-            if bible:
-                nodes = bible.get("nodes", [])
-                links = bible.get("links", [])
-                flags = detector.check_sentence(last_user_msg, existing_nodes=nodes, existing_links=links)
+            bible = await cached_bible(request.scriptId)
+            if bible["nodes"]:
+                # Offsets are within the chat message, not the manuscript — not stored
+                flags = await check_contradictions(request.scriptId, paragraph_spans(last_user_msg))
                 
-                # Save any contradictions found to DB for the UI panel
-                for flag in flags:
-                    new_contra = {
-                        "script_id": request.scriptId,
-                        "sentence": flag.get("conflicting_sentence"),
-                        "conflict_with": flag.get("reason_detail"),
-                        "reason_tag": flag.get("reason_tag"),
-                        "resolved": False
-                    }
-                    await insert_document("contradictions", new_contra)
-                    programmatic_flags.append(flag)
+                # Save any contradictions found to DB for the UI panel — asking again
+                # updates the same documents instead of adding copies
+                await save_flags(request.scriptId, flags, with_offsets=False)
+                programmatic_flags.extend(flags)
 
         reply = await fact_check_with_rag(
             user_message=last_user_msg,
@@ -401,10 +464,24 @@ async def chat_interaction(request: ChatRequest):
             editor_content=request.context,
             conversation_history=request.messages,
             programmatic_flags=programmatic_flags,
+            cursor=request.cursor,
         )
         return {"reply": reply}
 
-    # Standard / Advanced modes — use the regular chat reply
+    # Standard / Advanced modes — use the regular chat reply, grounded in the bible
+    # (Fact Check retrieves its own context, so only these modes build the summary)
+    story_bible_summary = ""
+    if request.scriptId:
+        stats = await bible_stats(request.scriptId)
+        if stats["nodes"] or stats["links"]:
+            # Capped preview to avoid token limit errors; totals come from the counts
+            MAX_NODES = 50
+            MAX_LINKS = 100
+            preview = await load_bible(
+                request.scriptId, max_nodes=MAX_NODES, max_links=MAX_LINKS, with_evidence=False, cursor=request.cursor
+            )
+            story_bible_summary = format_bible_summary(preview, stats, detailed=True)
+
     reply = await generate_chat_reply(request.messages, request.context, story_bible_summary, request.mode)
     return {
         "reply": reply
@@ -0,0 +1,172 @@
+"""
+bible_cache.py — Per-script, versioned LRU cache of loaded story bibles.
+
+Chat, Fact Check, auto-suggest and every analysis read the bible for the same
+script again and again between edits. Entries are keyed by script id and tagged
+with the story_bibles header version they were loaded at; a reader passes the
+current version, so a bible written by another worker or a migration is never
+served stale. Writes made in this process go through `put` / `invalidate`
+(see kg_store.apply_merge), so the next read after an analysis is still a hit.
+
+Structures derived from a bible (retrieval indexes, adjacency matrices) are
+memoized on its entry via `derived`, so they are built once per version and
+dropped together with it. An entry patched forward by a merge also keeps the
+last BIBLE_DELTA_LOG merge deltas that led to it (`deltas`), which is how NLP
+workers bring their own copy of the bible up to date (bible_replica.py).
+
+Bounded by entry count and by approximate size (the BSON size of the bible,
+which tracks the in-memory footprint closely enough for eviction).
+Cached bibles are shared — callers must treat them as read-only.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import bson
+
+BIBLE_CACHE_MAX_ENTRIES = int(os.getenv("BIBLE_CACHE_MAX_ENTRIES", "64"))
+BIBLE_CACHE_MAX_BYTES = int(os.getenv("BIBLE_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+BIBLE_DELTA_LOG = int(os.getenv("BIBLE_DELTA_LOG", "8"))
+
+
+def estimate_bytes(bible: dict) -> int:
+    return len(bson.encode({"bible": bible}))
+
+
+class _Entry:
+    __slots__ = ("version", "bible", "nbytes", "derived", "deltas")
+
+    def __init__(self, version: int, bible: dict, nbytes: int, deltas: Tuple[dict, ...] = ()):
+        self.version = version
+        self.bible = bible
+        self.nbytes = nbytes
+        self.derived: Dict[str, Any] = {}
+        self.deltas = deltas
+
+
+class BibleCache:
+    def __init__(self, max_entries: int = BIBLE_CACHE_MAX_ENTRIES, max_bytes: int = BIBLE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        # One in-flight load per (script, version): concurrent misses share it
+        self._loading: Dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get(self, script_id: str, version: int, load: Callable[[], Awaitable[dict]]) -> dict:
+        """Return the bible for `script_id` at `version`, calling `load()` only on a miss."""
+        entry = self._entries.get(script_id)
+        if entry is not None and entry.version == version:
+            self._entries.move_to_end(script_id)
+            self.hits += 1
+            return entry.bible
+
+        self.misses += 1
+        key = (script_id, version)
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._loading[key] = pending
+        try:
+            bible = await load()
+        except BaseException as e:
+            pending.set_exception(e)
+            # Nobody else may be waiting — don't leave "exception never retrieved" behind
+            pending.exception()
+            raise
+        else:
+            pending.set_result(bible)
+        finally:
+            del self._loading[key]
+
+        self.put(script_id, version, bible)
+        return bible
+
+    def peek(self, script_id: str, version: Optional[int] = None) -> Optional[dict]:
+        """Cached bible without touching LRU order or counters (None if absent / other version)."""
+        entry = self._entries.get(script_id)
+        if entry is None or (version is not None and entry.version != version):
+            return None
+        return entry.bible
+
+    def derived(self, script_id: str, version: int, bible: dict, name: str, build: Callable[[dict], Any]) -> Any:
+        """
+        `build(bible)`, memoized on the cache entry for this script and version.
+        Built uncached when the entry is gone (evicted, oversized or replaced).
+        """
+        entry = self._entries.get(script_id)
+        if entry is None or entry.version != version or entry.bible is not bible:
+            return build(bible)
+        if name not in entry.derived:
+            entry.derived[name] = build(bible)
+        return entry.derived[name]
+
+    def deltas(self, script_id: str, version: int) -> Tuple[dict, ...]:
+        """The merge deltas (oldest first) that led to the cached bible at `version`; () if not cached."""
+        entry = self._entries.get(script_id)
+        if entry is None or entry.version != version:
+            return ()
+        return entry.deltas
+
+    def put(self, script_id: str, version: int, bible: dict, delta: Optional[dict] = None) -> None:
+        """Cache `bible` at `version`; `delta` is the merge that produced it from the cached version."""
+        current = self._entries.get(script_id)
+        # Never replace a newer bible with one loaded before a concurrent write
+        if current is not None and current.version > version:
+            return
+        deltas: Tuple[dict, ...] = ()
+        if delta is not None and current is not None and current.version == delta["base_version"]:
+            deltas = (current.deltas + (delta,))[-BIBLE_DELTA_LOG:]
+        nbytes = estimate_bytes(bible)
+        self._drop(script_id)
+        # A single huge bible should not flush the whole cache
+        if nbytes > self.max_bytes:
+            return
+        self._entries[script_id] = _Entry(version, bible, nbytes, deltas)
+        self._bytes += nbytes
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def invalidate(self, script_id: str) -> None:
+        if self._drop(script_id):
+            self.invalidations += 1
+
+    def _drop(self, script_id: str) -> bool:
+        entry = self._entries.pop(script_id, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.nbytes
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "derived": sum(len(entry.derived) for entry in self._entries.values()),
+        }
+
+
+# Process-wide singleton (the API process; NLP workers never read bibles from MongoDB)
+bible_cache = BibleCache()
@@ -0,0 +1,150 @@
+"""
+bible_export.py — Compact columnar encoding of a story bible for the graph viewer.
+
+The JSON story_bible route sends every string once per use and the evidence
+text of every link. The export sends each distinct string once and everything
+else as integer columns the browser can view as typed arrays without parsing:
+
+    "QKG1" | u32 header length | header JSON | columns (each 4-byte aligned)
+
+The header holds the string tables (entity ids, types, relations, scenes) and
+the column directory ({name, dtype, length}). Columns are little-endian:
+
+    node_type, node_count                          one per node (type = index into types)
+    node_mentions_offsets / node_mentions          scene lists, CSR style
+    edge_source, edge_target, edge_relation        integer triples (node / relation indexes)
+    edge_count
+    edge_scenes_offsets / edge_scenes              scene lists, CSR style
+    edge_evidence_offsets / edge_evidence          indexes into evidence_sids
+    evidence_sids                                  8 raw bytes per sentence id (hex-decoded;
+                                                   ids of any other shape go in a "sids" string table)
+
+Evidence text is not included — the viewer fetches it by id when a link is
+opened (GET /scripts/{id}/story_bible/evidence).
+"""
+
+import json
+import re
+import struct
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+MAGIC = b"QKG1"
+MEDIA_TYPE = "application/vnd.qalam.kg"
+_ALIGN = 4
+_SID_BYTES = 8
+_SID_RE = re.compile(r"[0-9a-f]{16}")
+
+
+def _intern(values) -> Tuple[List[str], Dict[str, int]]:
+    table = list(dict.fromkeys(values))
+    return table, {value: i for i, value in enumerate(table)}
+
+
+def _csr(lists: List[List[str]], codes: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(lists) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(items) for items in lists])
+    values = np.fromiter((codes[item] for items in lists for item in items), dtype="<u4", count=int(offsets[-1]))
+    return offsets, values
+
+
+def encode_bible(bible: dict, version: int) -> bytes:
+    nodes = bible.get("nodes", [])
+    ids, id_codes = _intern(n["id"] for n in nodes)
+    # Links to entities the bible doesn't list can't be drawn
+    links = [l for l in bible.get("links", []) if l["source"] in id_codes and l["target"] in id_codes]
+
+    types, type_codes = _intern(n.get("type") or "" for n in nodes)
+    relations, relation_codes = _intern(l.get("relation", "") for l in links)
+    scenes, scene_codes = _intern(
+        [s for n in nodes for s in n.get("mentions", [])] + [s for l in links for s in l.get("scenes", [])]
+    )
+    sids, sid_codes = _intern(sid for l in links for sid in l.get("evidence", []))
+    binary_sids = all(_SID_RE.fullmatch(sid) for sid in sids)
+
+    def column(values, count):
+        return np.fromiter(values, dtype="<u4", count=count)
+
+    n, e = len(nodes), len(links)
+    node_mentions_offsets, node_mentions = _csr([n.get("mentions", []) for n in nodes], scene_codes)
+    edge_scenes_offsets, edge_scenes = _csr([l.get("scenes", []) for l in links], scene_codes)
+    edge_evidence_offsets, edge_evidence = _csr([l.get("evidence", []) for l in links], sid_codes)
+    columns = {
+        "node_type": column((type_codes[n.get("type") or ""] for n in nodes), n),
+        "node_count": column((n.get("count", 1) for n in nodes), n),
+        "node_mentions_offsets": node_mentions_offsets,
+        "node_mentions": node_mentions,
+        "edge_source": column((id_codes[l["source"]] for l in links), e),
+        "edge_target": column((id_codes[l["target"]] for l in links), e),
+        "edge_relation": column((relation_codes[l.get("relation", "")] for l in links), e),
+        "edge_count": column((l.get("count", 1) for l in links), e),
+        "edge_scenes_offsets": edge_scenes_offsets,
+        "edge_scenes": edge_scenes,
+        "edge_evidence_offsets": edge_evidence_offsets,
+        "edge_evidence": edge_evidence,
+        "evidence_sids": np.frombuffer(
+            b"".join(bytes.fromhex(sid) for sid in sids) if binary_sids else b"", dtype=np.uint8
+        ),
+    }
+
+    strings = {"ids": ids, "types": types, "relations": relations, "scenes": scenes}
+    if not binary_sids:
+        strings["sids"] = sids
+    header = json.dumps({
+        "version": version,
+        "strings": strings,
+        "columns": [{"name": name, "dtype": "u1" if values.dtype == np.uint8 else "u4", "length": len(values)}
+                    for name, values in columns.items()],
+    }, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % _ALIGN)
+
+    parts = [MAGIC, struct.pack("<I", len(header)), header]
+    for values in columns.values():
+        raw = values.tobytes()
+        parts += [raw, b"\0" * (-len(raw) % _ALIGN)]
+    return b"".join(parts)
+
+
+def decode_bible(payload: bytes) -> dict:
+    """Inverse of encode_bible (without evidence text) — what the viewer's decoder does."""
+    if payload[:4] != MAGIC:
+        raise ValueError("Not a story-bible export")
+    (header_length,) = struct.unpack_from("<I", payload, 4)
+    offset = 8 + header_length
+    header = json.loads(payload[8:offset])
+
+    columns = {}
+    for col in header["columns"]:
+        dtype = np.uint8 if col["dtype"] == "u1" else np.dtype("<u4")
+        columns[col["name"]] = np.frombuffer(payload, dtype=dtype, count=col["length"], offset=offset)
+        size = col["length"] * (1 if col["dtype"] == "u1" else 4)
+        offset += size + (-size % _ALIGN)
+
+    strings = header["strings"]
+    ids, scenes = strings["ids"], strings["scenes"]
+    sids = strings.get("sids")
+    if sids is None:
+        raw_sids = columns["evidence_sids"].tobytes()
+        sids = [raw_sids[i:i + _SID_BYTES].hex() for i in range(0, len(raw_sids), _SID_BYTES)]
+
+    def lists(name, table):
+        bounds, values = columns[f"{name}_offsets"].tolist(), columns[name].tolist()
+        return [[table[v] for v in values[a:b]] for a, b in zip(bounds, bounds[1:])]
+
+    node_mentions = lists("node_mentions", scenes)
+    edge_scenes = lists("edge_scenes", scenes)
+    edge_evidence = lists("edge_evidence", sids)
+    nodes = [
+        {"id": ids[i], "type": strings["types"][t], "count": c, "mentions": node_mentions[i]}
+        for i, (t, c) in enumerate(zip(columns["node_type"].tolist(), columns["node_count"].tolist()))
+    ]
+    links = [
+        {"source": ids[s], "target": ids[t], "relation": strings["relations"][r], "count": c,
+         "scenes": edge_scenes[i], "evidence": edge_evidence[i]}
+        for i, (s, t, r, c) in enumerate(zip(
+            columns["edge_source"].tolist(), columns["edge_target"].tolist(),
+            columns["edge_relation"].tolist(), columns["edge_count"].tolist(),
+        ))
+    ]
+    return {"version": header["version"], "nodes": nodes, "links": links}
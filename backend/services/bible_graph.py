@@ -0,0 +1,189 @@
+"""
+bible_graph.py — Compact sparse-matrix view of one story-bible version.
+
+Nodes get integer ids (their position in the bible), edges become NumPy
+arrays (source, target, relation code, count) and the undirected adjacency a
+SciPy CSR matrix whose weights are the summed co-occurrence counts. Built once
+per cached bible version (see kg_store.bible_graph) and used for the queries
+Python list scans can't answer cheaply:
+
+    k_hop          every entity within k hops of some seeds
+    shortest_path  the chain of relationships linking two characters
+    degree / top_by_degree   optionally restricted by relation, count or type
+
+Relation / min-count filters mask the edge arrays and build their own CSR
+matrix, a few of which are kept per graph.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import breadth_first_order
+
+# Filtered adjacency matrices kept per graph (the unfiltered one is always kept)
+MAX_CACHED_FILTERS = 8
+
+_UNREACHABLE = -9999  # scipy's predecessor marker
+
+
+class BibleGraph:
+    def __init__(self, bible: dict):
+        nodes = bible.get("nodes", [])
+        self.ids: List[str] = [node["id"] for node in nodes]
+        self.index: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.types = np.array([node.get("type") or "" for node in nodes], dtype=object)
+
+        self.links: List[dict] = [
+            link for link in bible.get("links", []) if link["source"] in self.index and link["target"] in self.index
+        ]
+        self.relations: List[str] = list(dict.fromkeys(link.get("relation", "") for link in self.links))
+        self._relation_codes = {relation: code for code, relation in enumerate(self.relations)}
+
+        n_edges = len(self.links)
+        self.edge_src = np.fromiter((self.index[l["source"]] for l in self.links), dtype=np.int32, count=n_edges)
+        self.edge_dst = np.fromiter((self.index[l["target"]] for l in self.links), dtype=np.int32, count=n_edges)
+        self.edge_rel = np.fromiter(
+            (self._relation_codes[l.get("relation", "")] for l in self.links), dtype=np.int32, count=n_edges
+        )
+        self.edge_count = np.fromiter((l.get("count", 1) for l in self.links), dtype=np.int32, count=n_edges)
+
+        self._filtered: "OrderedDict[tuple, csr_matrix]" = OrderedDict()
+        self._pairs: Optional[Dict[Tuple[int, int], List[int]]] = None
+        self.matrix = self._build(np.ones(n_edges, dtype=bool))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ── Adjacency ────────────────────────────────────────────────────────────
+
+    def _build(self, mask: np.ndarray) -> csr_matrix:
+        src, dst, weight = self.edge_src[mask], self.edge_dst[mask], self.edge_count[mask]
+        n = len(self.ids)
+        # Symmetric: co-occurrence has no direction. Parallel relations sum into one weight.
+        matrix = csr_matrix(
+            (np.concatenate([weight, weight]), (np.concatenate([src, dst]), np.concatenate([dst, src]))),
+            shape=(n, n),
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    def adjacency(self, relations: Optional[Iterable[str]] = None, min_count: int = 1) -> csr_matrix:
+        """CSR adjacency over the edges with one of `relations` (all if None) and count ≥ min_count."""
+        relations = frozenset(relations) if relations else None
+        if relations is None and min_count <= 1:
+            return self.matrix
+        key = (relations, min_count)
+        matrix = self._filtered.get(key)
+        if matrix is None:
+            mask = self.edge_count >= min_count
+            if relations is not None:
+                codes = [self._relation_codes[r] for r in relations if r in self._relation_codes]
+                mask &= np.isin(self.edge_rel, codes)
+            matrix = self._filtered[key] = self._build(mask)
+            if len(self._filtered) > MAX_CACHED_FILTERS:
+                self._filtered.popitem(last=False)
+        else:
+            self._filtered.move_to_end(key)
+        return matrix
+
+    # ── Queries ──────────────────────────────────────────────────────────────
+
+    def degree(self, relations: Optional[Iterable[str]] = None, min_count: int = 1) -> np.ndarray:
+        """Distinct neighbours per node (indexed like `ids`)."""
+        return np.diff(self.adjacency(relations, min_count).indptr)
+
+    def top_by_degree(
+        self,
+        k: int,
+        relations: Optional[Iterable[str]] = None,
+        min_count: int = 1,
+        node_type: Optional[str] = None,
+    ) -> List[Tuple[str, int]]:
+        """The k best-connected entities as (id, degree), optionally of one type."""
+        degree = self.degree(relations, min_count)
+        candidates = np.flatnonzero(self.types == node_type) if node_type else np.arange(len(self.ids))
+        if not len(candidates) or k <= 0:
+            return []
+        if k < len(candidates):
+            candidates = candidates[np.argpartition(-degree[candidates], k - 1)[:k]]
+        # Highest degree first, bible order breaks ties
+        candidates = candidates[np.lexsort((candidates, -degree[candidates]))]
+        return [(self.ids[i], int(degree[i])) for i in candidates]
+
+    def k_hop(
+        self,
+        seeds: Iterable[str],
+        k: int,
+        relations: Optional[Iterable[str]] = None,
+        min_count: int = 1,
+        max_nodes: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """{entity id: hop distance} for everything within k hops of the seeds, nearest first."""
+        matrix = self.adjacency(relations, min_count)
+        distance = np.full(len(self.ids), -1, dtype=np.int32)
+        frontier = np.array(sorted({self.index[s] for s in seeds if s in self.index}), dtype=np.int32)
+        distance[frontier] = 0
+        reached = len(frontier)
+
+        for hop in range(1, k + 1):
+            if not len(frontier) or (max_nodes is not None and reached >= max_nodes):
+                break
+            neighbours = np.unique(matrix[frontier].indices)
+            frontier = neighbours[distance[neighbours] < 0]
+            distance[frontier] = hop
+            reached += len(frontier)
+
+        found = np.flatnonzero(distance >= 0)
+        found = found[np.lexsort((found, distance[found]))][:max_nodes]
+        return {self.ids[i]: int(distance[i]) for i in found}
+
+    def shortest_path(
+        self,
+        source: str,
+        target: str,
+        relations: Optional[Iterable[str]] = None,
+        min_count: int = 1,
+    ) -> Optional[List[str]]:
+        """Fewest-hop chain of entities from `source` to `target`, or None if they aren't connected."""
+        if source not in self.index or target not in self.index:
+            return None
+        start, goal = self.index[source], self.index[target]
+        if start == goal:
+            return [source]
+        _, predecessors = breadth_first_order(
+            self.adjacency(relations, min_count), start, directed=True, return_predecessors=True
+        )
+        if predecessors[goal] == _UNREACHABLE:
+            return None
+        path = [goal]
+        while path[-1] != start:
+            path.append(int(predecessors[path[-1]]))
+        return [self.ids[i] for i in reversed(path)]
+
+    def path_links(
+        self, path: List[str], relations: Optional[Iterable[str]] = None, min_count: int = 1
+    ) -> List[dict]:
+        """The strongest link (passing the same filters) behind each step of a path."""
+        relations = set(relations) if relations else None
+        if self._pairs is None:
+            self._pairs = {}
+            for i, (a, b) in enumerate(zip(self.edge_src.tolist(), self.edge_dst.tolist())):
+                self._pairs.setdefault((min(a, b), max(a, b)), []).append(i)
+        steps = []
+        for a, b in zip(path, path[1:]):
+            i, j = self.index[a], self.index[b]
+            edges = [
+                e for e in self._pairs.get((min(i, j), max(i, j)), [])
+                if self.edge_count[e] >= min_count and (relations is None or self.relations[self.edge_rel[e]] in relations)
+            ]
+            if edges:
+                steps.append(self.links[max(edges, key=lambda e: self.edge_count[e])])
+        return steps
+
+    def subgraph_links(self, node_ids: Iterable[str]) -> List[dict]:
+        """Links with both ends inside `node_ids`."""
+        inside = np.zeros(len(self.ids), dtype=bool)
+        inside[[self.index[n] for n in node_ids if n in self.index]] = True
+        return [self.links[i] for i in np.flatnonzero(inside[self.edge_src] & inside[self.edge_dst])]
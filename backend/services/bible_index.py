@@ -0,0 +1,112 @@
+"""
+bible_index.py — Retrieval index over one version of a story bible.
+
+Built once per cached bible version (see kg_store.bible_index) and reused by
+every Fact Check / plot-tweak lookup until the next merge:
+
+    tokens     normalized token → ids of the nodes whose name contains it
+    adjacency  node id → the links touching it
+    aliases    alias key → canonical id (from the script's alias table)
+
+Entity matching walks only the postings of the query's tokens, and a 1-hop
+neighbourhood touches only the matched nodes' links, so retrieval cost follows
+the size of the answer rather than the size of the graph.
+
+Pure Python — no I/O here.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from services.kg_aliases import alias_key, name_key, normalize_tokens
+
+
+class BibleIndex:
+    def __init__(self, bible: dict):
+        self.bible = bible
+        self.nodes_by_id: Dict[str, dict] = {node["id"]: node for node in bible.get("nodes", [])}
+        self.tokens: Dict[str, Set[str]] = defaultdict(set)
+        self.token_counts: Dict[str, int] = {}
+        self.adjacency: Dict[str, List[dict]] = defaultdict(list)
+        self.aliases: Dict[str, str] = {
+            key: entry["canonical"] for key, entry in bible.get("aliases", {}).items()
+            if entry["canonical"] in self.nodes_by_id
+        }
+
+        for node_id in self.nodes_by_id:
+            node_tokens = set(normalize_tokens(node_id))
+            self.token_counts[node_id] = len(node_tokens)
+            for token in node_tokens:
+                self.tokens[token].add(node_id)
+
+        for link in bible.get("links", []):
+            self.adjacency[link["source"]].append(link)
+            if link["target"] != link["source"]:
+                self.adjacency[link["target"]].append(link)
+
+    def __len__(self) -> int:
+        return len(self.nodes_by_id)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Exact node id, or the canonical id of a known alias."""
+        if name in self.nodes_by_id:
+            return name
+        return self.aliases.get(alias_key(name)) or self.aliases.get(name_key(name))
+
+    def match(self, query_entities: Iterable[str]) -> List[str]:
+        """
+        Node ids matching any query entity at token level: the node's name
+        contains every token of the query ("Arjun" → "Arjun Mehta") or the query
+        contains every token of the node's name ("Arjun's sister" → "Arjun").
+        Whole tokens only, so "Ann" does not match "Annual". A known alias
+        ("Mr. Mehta") also matches its canonical entity.
+        """
+        matched: Dict[str, None] = {}
+        for entity in query_entities:
+            canonical = self.aliases.get(alias_key(entity)) or self.aliases.get(name_key(entity))
+            if canonical is not None:
+                matched[canonical] = None
+            query = set(normalize_tokens(entity))
+            if not query:
+                continue
+            postings = [self.tokens.get(token, set()) for token in query]
+
+            # Query ⊆ node: intersect the postings, smallest first
+            contains_query = set.intersection(*sorted(postings, key=len))
+
+            # Node ⊆ query: every one of the node's tokens was hit
+            hits: Dict[str, int] = defaultdict(int)
+            for posting in postings:
+                for node_id in posting:
+                    hits[node_id] += 1
+            within_query = {node_id for node_id, n in hits.items() if n == self.token_counts[node_id]}
+
+            for node_id in sorted(contains_query | within_query):
+                matched[node_id] = None
+        return list(matched)
+
+    def neighbourhood(self, entity_ids: List[str]) -> dict:
+        """
+        The matched nodes, every link touching them and their 1-hop neighbours,
+        in the bible's API shape ({"nodes", "links", "evidence"}).
+        """
+        wanted = set(entity_ids)
+        links: List[dict] = []
+        seen: Set[int] = set()
+        neighbours: List[str] = []
+        for node_id in entity_ids:
+            for link in self.adjacency.get(node_id, ()):
+                if id(link) in seen:
+                    continue
+                seen.add(id(link))
+                links.append(link)
+                neighbours.append(link["target"] if link["source"] in wanted else link["source"])
+
+        # Matched entities first, then neighbours in the order their edges were found
+        ordered = dict.fromkeys(list(entity_ids) + neighbours)
+        nodes = [self.nodes_by_id[node_id] for node_id in ordered if node_id in self.nodes_by_id]
+
+        all_evidence = self.bible.get("evidence", {})
+        evidence = {sid: all_evidence[sid] for link in links for sid in link.get("evidence", [])
+                    if sid in all_evidence}
+        return {"nodes": nodes, "links": links, "evidence": evidence}
@@ -0,0 +1,91 @@
+"""
+bible_replica.py — A worker process's copy of one script's story bible.
+
+The contradiction detector runs in the NLP process pool, and every check used
+to pickle the script's nodes, fact index and whole evidence map across to the
+worker, which then re-synced its lexical index against all of it. Workers now
+keep a replica per script, tagged with the bible version it reflects:
+
+    version   the story_bibles header version the replica was built or
+              advanced to; a check names the version it wants
+    advance   the merge deltas since that version (bible_cache keeps the last
+              few per script) are applied in place — nodes, links, evidence
+              and facts by key, the lexical index through `sync` — so a
+              check after an edit costs the size of the edit
+    snapshot  when the deltas don't reach (a worker that never saw the
+              script, a reset, a write from another API process) the check
+              raises nlp_executor.StaleReplicaError and the caller resends the
+              whole bible
+
+The fact index is rebuilt from the replica's links only after a delta
+changed them or their evidence. Access is serialized with `lock`.
+
+Pure Python — no I/O here.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from services.kg_facts import FactKey, build_fact_index
+from services.kg_merge import EdgeKey, edge_key
+from services.lexical_index import LexicalIndex
+
+
+class BibleReplica:
+    def __init__(self, version: int, bible: dict):
+        self.version = version
+        self.nodes: Dict[str, dict] = {node["id"]: node for node in bible["nodes"]}
+        self.links: Dict[EdgeKey, dict] = {edge_key(link): link for link in bible["links"]}
+        self.evidence: Dict[str, str] = dict(bible["evidence"])
+        self.facts: Dict[str, dict] = dict(bible.get("facts", {}))
+        self.index = LexicalIndex()
+        self.index.sync(self.evidence)
+        self.lock = threading.Lock()
+        self._fact_index: Optional[Dict[FactKey, List[dict]]] = None
+
+    @property
+    def fact_index(self) -> Dict[FactKey, List[dict]]:
+        if self._fact_index is None:
+            self._fact_index = build_fact_index({"links": list(self.links.values()), "facts": self.facts})
+        return self._fact_index
+
+    def advance(self, deltas: Iterable[dict]) -> bool:
+        """
+        Apply the merge deltas that follow this replica's version, in order.
+        False when they don't chain on from it (or a link cites evidence the
+        replica never held); the replica must then be rebuilt from a snapshot.
+        """
+        for delta in deltas:
+            if delta["version"] <= self.version:
+                continue
+            if delta["reset"] or delta["base_version"] != self.version or not self._apply(delta):
+                return False
+        return True
+
+    def _apply(self, delta: dict) -> bool:
+        removed, added = delta["evidence"]["removed"], delta["evidence"]["added"]
+        for sid in removed:
+            self.evidence.pop(sid, None)
+            self.facts.pop(sid, None)
+        self.evidence.update(added)
+        self.facts.update(delta.get("facts", {}).get("added", {}))
+        self.index.sync(added, removed)
+
+        for node_id in delta["nodes"]["removed"]:
+            self.nodes.pop(node_id, None)
+        for node in delta["nodes"]["updated"] + delta["nodes"]["added"]:
+            self.nodes[node["id"]] = node
+
+        links = delta["links"]
+        for link in links["removed"]:
+            self.links.pop(edge_key(link), None)
+        # Updated links keep their place (dict order), so the fact index lists sentences as a fresh load would
+        for link in links["updated"] + links["added"]:
+            if any(sid not in self.evidence for sid in link.get("evidence", [])):
+                return False
+            self.links[edge_key(link)] = link
+        if removed or added or any(links.values()):
+            self._fact_index = None
+
+        self.version = delta["version"]
+        return True
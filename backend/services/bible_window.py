@@ -0,0 +1,123 @@
+"""
+bible_window.py — Query builders for windowed story-bible reads.
+
+GET /scripts/{id}/story_bible with window parameters reads a slice of the
+normalized collections straight from MongoDB instead of the whole cached
+bible (kg_store.load_window runs the queries built here):
+
+    entity    links touching the given entities (ids or aliases) — the
+              (script_id, source) / (script_id, target) indexes
+    top_k     the k best-connected nodes and the links among them — the
+              stored `degree` and the (script_id, [type,] degree, id) indexes
+    type      only nodes of these types; links need both ends to pass, read
+              from the end types each edge stores (source_type / target_type)
+              rather than a list of every node id of those types
+    scene     a range of scene ordinals (scene_from..scene_to, as in
+              kg_scenes): resolved to scene ids through the (script_id,
+              ordinal) index, then only links seen / nodes mentioned there
+    cursor    keyset pagination over links in (source, target, relation)
+              order — the unique edge index, so page N costs the same as page 1
+    fields    projection; key fields are always returned and evidence text
+              only on request (with_evidence)
+
+Pure Python — no I/O here.
+"""
+
+import base64
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.kg_merge import READ_EVIDENCE_PER_EDGE, EdgeKey
+
+NODE_FIELDS = ("type", "count", "mentions", "degree")
+LINK_FIELDS = ("count", "scenes", "evidence")
+EDGE_ORDER = [("source", 1), ("target", 1), ("relation", 1)]
+DEGREE_ORDER = [("degree", -1), ("id", 1)]
+
+
+def projections(fields: Optional[Iterable[str]]) -> Tuple[dict, dict]:
+    """(node projection, link projection) for the requested fields (all when None)."""
+    if fields is None:
+        wanted = set(NODE_FIELDS) | set(LINK_FIELDS)
+    else:
+        wanted = set(fields)
+        unknown = wanted - set(NODE_FIELDS) - set(LINK_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+
+    nodes = {"_id": 0, "id": 1, **{f: 1 for f in NODE_FIELDS if f in wanted}}
+    links = {"_id": 0, "source": 1, "target": 1, "relation": 1, **{f: 1 for f in LINK_FIELDS if f in wanted}}
+    if "evidence" in links:
+        links["evidence"] = {"$slice": READ_EVIDENCE_PER_EDGE}
+    return nodes, links
+
+
+def encode_cursor(link: dict) -> str:
+    key = [link["source"], link["target"], link.get("relation", "")]
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> EdgeKey:
+    try:
+        source, target, relation = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor") from None
+    if not all(isinstance(part, str) for part in (source, target, relation)):
+        raise ValueError("Invalid cursor")
+    return source, target, relation
+
+
+def _after(key: EdgeKey) -> dict:
+    """Edges strictly after `key` in EDGE_ORDER."""
+    source, target, relation = key
+    return {"$or": [
+        {"source": {"$gt": source}},
+        {"source": source, "target": {"$gt": target}},
+        {"source": source, "target": target, "relation": {"$gt": relation}},
+    ]}
+
+
+def scene_range(script_id: str, first: Optional[int] = None, last: Optional[int] = None) -> dict:
+    """kg_scenes with `first` <= ordinal <= `last` (either bound open when None)."""
+    ordinal: Dict = {}
+    if first is not None:
+        ordinal["$gte"] = first
+    if last is not None:
+        ordinal["$lte"] = last
+    return {"script_id": script_id, "ordinal": ordinal} if ordinal else {"script_id": script_id}
+
+
+def node_filter(script_id: str, types: Optional[List[str]] = None, scenes: Optional[List[str]] = None) -> dict:
+    query: Dict = {"script_id": script_id}
+    if types:
+        query["type"] = {"$in": types}
+    if scenes:
+        query["mentions"] = {"$in": scenes}
+    return query
+
+
+def edge_filter(
+    script_id: str,
+    touching: Optional[List[str]] = None,
+    within: Optional[List[str]] = None,
+    types: Optional[List[str]] = None,
+    scenes: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+) -> dict:
+    """
+    Links with at least one end in `touching` and both ends in `within`
+    (either constraint skipped when None), both ends of one of `types`,
+    seen in one of `scenes`, after `cursor`.
+    """
+    clauses: List[dict] = [{"script_id": script_id}]
+    if within is not None:
+        clauses.append({"source": {"$in": within}, "target": {"$in": within}})
+    if types:
+        clauses.append({"source_type": {"$in": types}, "target_type": {"$in": types}})
+    if touching is not None:
+        clauses.append({"$or": [{"source": {"$in": touching}}, {"target": {"$in": touching}}]})
+    if scenes:
+        clauses.append({"scenes": {"$in": scenes}})
+    if cursor:
+        clauses.append(_after(decode_cursor(cursor)))
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -1,93 +1,170 @@
-import spacy
-from typing import List, Dict, Any
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from spacy.language import Language
+from services.nlp_registry import get_nlp
+from services.doc_cache import parse, parse_many
+from services.kg_facts import FactKey, fact_features
+from services.lexical_index import LexicalIndex
+from services.bible_replica import BibleReplica
+from services.nlp_executor import StaleReplicaError
+
+# Per-script bible replicas kept by each worker's detector (least recently checked dropped first)
+LEXICAL_INDEX_MAX_SCRIPTS = int(os.getenv("LEXICAL_INDEX_MAX_SCRIPTS", "16"))
+
+# TF-IDF cosine above which a same-verb, opposite-polarity fact is flagged
+SIMILARITY_THRESHOLD = 0.15
 
 class ContradictionDetector:
-    def __init__(self):
+    def __init__(self, nlp: Optional[Language] = None):
         """
-        Initialize the Contradiction Detector.
+        Initialize the Contradiction Detector on the shared spaCy pipeline.
         """
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            raise RuntimeError("spaCy model 'en_core_web_sm' not found.")
+        self.nlp = nlp or get_nlp("ContradictionDetector")
         
-        self.vectorizer = TfidfVectorizer()
+        # script_id -> that script's bible and lexical index at some version (bible_replica.py)
+        self._replicas: "OrderedDict[str, BibleReplica]" = OrderedDict()
+        self._lock = threading.Lock()
 
-    def check_sentence(self, sentence: str, existing_nodes: List[Dict], existing_links: List[Dict]) -> List[Dict[str, str]]:
+    def check_document(
+        self,
+        paragraphs: List[Tuple[int, str]],
+        existing_nodes: List[Dict],
+        fact_index: Dict[FactKey, List[Dict]],
+        evidence: Optional[Dict[str, str]] = None,
+        index: Optional[LexicalIndex] = None,
+    ) -> List[Dict[str, Any]]:
         """
-        Checks a new sentence against the existing Story Bible for contradictions.
-        Returns a list of flags if contradictions are found.
+        Checks every sentence of a document against the Story Bible.
+        `paragraphs` are (character offset, paragraph) pairs, as from
+        kg_incremental.paragraph_spans or kg_scenes.split_scenes; each flag
+        also carries its sentence's `start` / `end` offset in the document.
+
+        All paragraphs are parsed in one batched pipe pass (shared with the KG
+        engine through the Doc cache), each sentence gets its own subject, verb
+        and polarity, and every sentence with candidate facts is scored against
+        them in one sparse matrix product.
         """
-        doc = self.nlp(sentence)
+        evidence = evidence or {}
+        docs = parse_many(self.nlp, [paragraph for _, paragraph in paragraphs])
+
+        # 1. Per-sentence facts → candidate evidence of opposite polarity
+        sentences: List[Tuple[int, int, str, List[str]]] = []
+        targets: Dict[str, Optional[str]] = {}
+        for (offset, _), doc in zip(paragraphs, docs):
+            for sent in doc.sents:
+                verbs = [tok for tok in sent if tok.pos_ == "VERB"]
+                if not verbs:
+                    continue
+                features = fact_features(sent, verbs[0].lemma_)
+                subject = features["subject"]
+                if not subject:
+                    continue
+                if subject not in targets:
+                    targets[subject] = self._target_entity(subject, existing_nodes)
+                if not targets[subject]:
+                    continue
+                sids = self._candidates(targets[subject], features["lemma"], features["negated"], fact_index, evidence)
+                if sids:
+                    sentences.append((offset + sent.start_char, offset + sent.end_char, sent.text, sids))
+        if not sentences:
+            return []
+
+        # 2. One similarity matrix: candidate sentences × every evidence sentence they compete with
+        columns = list(dict.fromkeys(sid for *_, sids in sentences for sid in sids))
+        column_of = {sid: j for j, sid in enumerate(columns)}
+        texts = [text for _, _, text, _ in sentences]
+        scores = self._score(index, evidence, columns, lambda index: index.pairwise(texts, columns))
+
         flags = []
-        
-        # 1. Extract subjects and basic facts from the incoming sentence
-        subjects = [tok for tok in doc if ("subj" in tok.dep_)]
-        verbs = [tok for tok in doc if tok.pos_ == "VERB"]
-        negations = [tok for tok in doc if tok.dep_ == "neg"]
-        
-        is_negated = len(negations) > 0
-        
-        if not subjects or not verbs:
-            return flags # Not enough information to check for contradiction
-            
-        subj_text = subjects[0].text
-        verb_lemma = verbs[0].lemma_
-        
-        # Find matching entities in the Knowledge Graph
-        # We look at all nodes to see if our subject matches any existing entity
-        target_entity = None
+        for i, (start, end, text, sids) in enumerate(sentences):
+            row = dict(zip(scores.indices[scores.indptr[i]:scores.indptr[i + 1]],
+                           scores.data[scores.indptr[i]:scores.indptr[i + 1]]))
+            for sid in sids:
+                if row.get(column_of[sid], 0.0) > SIMILARITY_THRESHOLD:
+                    flags.append({**self._flag(text, sid, evidence[sid]), "start": start, "end": end})
+        return flags
+
+    @staticmethod
+    def _target_entity(subject: str, existing_nodes: List[Dict]) -> Optional[str]:
         for node in existing_nodes:
             node_id = node.get("id", "")
-            if subj_text in node_id or node_id in subj_text:
-                target_entity = node_id
-                break
-                
-        if not target_entity:
-            return flags # Entity not in the graph yet, so it can't contradict existing facts
-            
-        # 2. Retrieve existing facts (edges) for this entity
-        # We look for links where the entity is the source
-        existing_edges = [link for link in existing_links if link.get("source") == target_entity]
-        
-        if not existing_edges:
-            return flags
-            
-        # 3. Rule-based + Semantic check
-        # We compare the new sentence against the source sentences of existing edges
-        existing_sentences = [edge.get('sentence', '') for edge in existing_edges]
-        if not existing_sentences:
-            return flags
-            
-        # Compute TF-IDF similarity
-        all_texts = [sentence] + existing_sentences
-        tfidf_matrix = self.vectorizer.fit_transform(all_texts)
-        cosine_sims = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:]).flatten()
-        
-        # Check if there is highly similar existing fact
-        for idx, similarity in enumerate(cosine_sims):
-            if similarity > 0.15: # Threshold for semantic overlap
-                existing_fact = existing_sentences[idx]
-                existing_edge_data = existing_edges[idx]
-                existing_verb = existing_edge_data.get('relation', '')
-                
-                # Check for direct contradictions (e.g., opposite polarity or mutually exclusive states)
-                # This is a simplified rule: if they are semantically similar but one is negated and the other isn't
-                # Or if they use antonym-like verbs
-                
-                existing_doc = self.nlp(existing_fact)
-                existing_negations = [tok for tok in existing_doc if tok.dep_ == "neg"]
-                existing_is_negated = len(existing_negations) > 0
-                
-                if (is_negated != existing_is_negated) and (verb_lemma == existing_verb):
-                    flags.append({
-                        "reason_tag": "CONTINUITY ERROR",
-                        "reason_detail": f"This contradicts an established fact. Existing context: '{existing_fact}'",
-                        "conflicting_sentence": sentence
-                    })
-                
-                # Further constraint rules can be added here (e.g., location conflicts, state conflicts)
-                
-        return flags
+            if subject in node_id or node_id in subject:
+                return node_id
+        return None
+
+    def _candidates(
+        self, entity: str, lemma: str, negated: bool, fact_index: Dict[FactKey, List[Dict]], evidence: Dict[str, str]
+    ) -> List[str]:
+        """Evidence ids of the entity's facts with this verb and the opposite polarity."""
+        return [
+            fact["sid"] for fact in fact_index.get((entity, lemma), [])
+            if evidence.get(fact["sid"]) and self._is_negated(fact, evidence) != negated
+        ]
+
+    def check_script(
+        self,
+        paragraphs: List[Tuple[int, str]],
+        script_id: str,
+        version: int,
+        deltas: Iterable[dict] = (),
+        snapshot: Optional[dict] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        check_document against this worker's replica of the script's bible
+        at `version` (or later): advanced with `deltas`, or rebuilt from
+        `snapshot` ({"nodes", "links", "evidence", "facts"}). Raises
+        StaleReplicaError when neither gets it there.
+        """
+        replica = self._replica(script_id, version, deltas, snapshot)
+        with replica.lock:
+            return self.check_document(
+                paragraphs, list(replica.nodes.values()), replica.fact_index, replica.evidence, replica.index
+            )
+
+    @staticmethod
+    def _score(index: Optional[LexicalIndex], evidence: Dict[str, str], sids: List[str], score: Callable):
+        """Run `score` on `index` (a throwaway one over `sids` without one)."""
+        if index is None:
+            index = LexicalIndex()
+            index.add({sid: evidence[sid] for sid in sids})
+        return score(index)
+
+    @staticmethod
+    def _flag(sentence: str, sid: str, existing_fact: str) -> Dict[str, str]:
+        return {
+            "reason_tag": "CONTINUITY ERROR",
+            "reason_detail": f"This contradicts an established fact. Existing context: '{existing_fact}'",
+            "conflicting_sentence": sentence,
+            # The evidence sentence it conflicts with — one sentence can contradict several
+            "evidence_id": sid,
+        }
+
+    def _is_negated(self, fact: Dict, evidence: Dict[str, str]) -> bool:
+        """Stored polarity; evidence written before features were recorded is parsed instead."""
+        if fact.get("negated") is not None:
+            return fact["negated"]
+        existing_doc = parse(self.nlp, evidence[fact["sid"]])
+        return any(tok.dep_ == "neg" for tok in existing_doc)
+
+    def _replica(
+        self, script_id: str, version: int, deltas: Iterable[dict], snapshot: Optional[dict]
+    ) -> BibleReplica:
+        with self._lock:
+            replica = self._replicas.get(script_id)
+            if replica is not None and replica.version < version:
+                with replica.lock:
+                    if not replica.advance(deltas):
+                        replica = None
+            if replica is None or replica.version < version:
+                if snapshot is None:
+                    if replica is None:
+                        self._replicas.pop(script_id, None)
+                    raise StaleReplicaError(f"No replica of script {script_id} at version {version}")
+                replica = BibleReplica(version, snapshot)
+            self._replicas[script_id] = replica
+            self._replicas.move_to_end(script_id)
+            while len(self._replicas) > LEXICAL_INDEX_MAX_SCRIPTS:
+                self._replicas.popitem(last=False)
+            return replica
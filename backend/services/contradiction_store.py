@@ -0,0 +1,108 @@
+"""
+contradiction_store.py — Deduplicated storage of contradiction flags.
+
+/analyze, orchestrate_analysis and the chat Fact Check each inserted one
+`contradictions` document per flag — one round-trip each — and the same
+flag again every time the same text was checked. A flag is now identified by
+its fingerprint,
+
+    (script_id, sentence_hash, reason_tag, conflict_hash)    unique index, see config/db.py
+
+where sentence_hash is the flagged sentence's evidence id
+(kg_incremental.evidence_id) and conflict_hash the id of the stored evidence
+sentence it contradicts — one sentence can conflict with several facts, and
+each is its own flag. A batch of flags is written with one bulk_write of
+upserts. A flag seen
+before updates its document (latest detail and position) and keeps its
+`resolved` state, so a contradiction the writer dismissed stays dismissed.
+Documents stored before fingerprints existed are fingerprinted and
+deduplicated by migration 007.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from config.db import get_database
+from services.kg_incremental import evidence_id
+
+
+def fingerprint(script_id: str, flag: Dict) -> Dict[str, str]:
+    """The unique key of a detector flag's stored document."""
+    return {
+        "script_id": script_id,
+        "sentence_hash": evidence_id(flag.get("conflicting_sentence") or ""),
+        "reason_tag": flag.get("reason_tag"),
+        "conflict_hash": flag.get("evidence_id"),
+    }
+
+
+async def save_flags(
+    script_id: str,
+    flags: List[Dict],
+    with_offsets: bool = True,
+    fields: Optional[Dict] = None,
+    new_only: bool = False,
+) -> List[Dict]:
+    """
+    Upsert detector flags in one bulk_write. `with_offsets` stores each flag's
+    start / end (manuscript offsets only — not positions in a chat message);
+    `fields` are set on every document (e.g. the audit that found them).
+
+    Returns the flags still open, as issues:
+        [{ _id, sentence, conflict_with, reason_tag, start, end }]
+    or with `new_only` just those whose fingerprint this write inserted (a
+    count of what was found that a repeated check doesn't inflate).
+    """
+    if not flags:
+        return []
+    db = get_database()
+    now = datetime.utcnow()
+
+    # The same sentence can be flagged twice against one fact in one text; the last one wins, as in the DB
+    by_key = {}
+    for flag in flags:
+        key = fingerprint(script_id, flag)
+        issue = {
+            "sentence": flag.get("conflicting_sentence"),
+            "conflict_with": flag.get("reason_detail"),
+            "reason_tag": flag.get("reason_tag"),
+            "start": flag.get("start") if with_offsets else None,
+            "end": flag.get("end") if with_offsets else None,
+        }
+        by_key[key["sentence_hash"], key["reason_tag"], key["conflict_hash"]] = (key, issue)
+
+    ops = []
+    for key, issue in by_key.values():
+        update = {"conflict_with": issue["conflict_with"], "updated_at": now, **(fields or {})}
+        if with_offsets:
+            update.update(start=issue["start"], end=issue["end"])
+        ops.append(UpdateOne(
+            key,
+            {"$set": update, "$setOnInsert": {"sentence": issue["sentence"], "resolved": False, "created_at": now}},
+            upsert=True,
+        ))
+    result = await db["contradictions"].bulk_write(ops, ordered=False)
+
+    # New documents' ids come back with the write; flags seen before are looked up (and may be resolved)
+    ids = dict(result.upserted_ids)
+    resolved = set()
+    if len(ids) < len(ops) and not new_only:
+        existing = await db["contradictions"].find(
+            {"script_id": script_id, "sentence_hash": {"$in": [key["sentence_hash"] for key, _ in by_key.values()]}},
+            {"_id": 1, "sentence_hash": 1, "reason_tag": 1, "conflict_hash": 1, "resolved": 1},
+        ).to_list(length=None)
+        stored = {(doc["sentence_hash"], doc.get("reason_tag"), doc.get("conflict_hash")): doc for doc in existing}
+        for position, (key, _) in enumerate(by_key.values()):
+            doc = stored.get((key["sentence_hash"], key["reason_tag"], key["conflict_hash"]))
+            if position not in ids and doc:
+                ids[position] = doc["_id"]
+                if doc.get("resolved"):
+                    resolved.add(position)
+
+    return [
+        {"_id": str(ids[position]), **issue}
+        for position, (_, issue) in enumerate(by_key.values())
+        if position in ids and position not in resolved
+    ]
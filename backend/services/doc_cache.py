@@ -0,0 +1,152 @@
+"""
+doc_cache.py — Content-addressed cache of parsed spaCy Docs.
+
+One /orchestrate call or Fact Check turn used to run the same text through
+spaCy several times (contradiction check, KG extraction, query entities).
+Parsed Docs are stored here as DocBin bytes, keyed by a hash of the text plus
+the pipeline that produced them, so unchanged text is only parsed once.
+
+Docs are serialized rather than kept live because a live Doc pins its whole
+tensor/vocab state; DocBin bytes are compact and give every caller its own
+independent Doc on a hit.
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from spacy.language import Language
+from spacy.tokens import Doc, DocBin
+
+from services.nlp_registry import disabled_components, run_profile
+
+DOC_CACHE_MAX_ENTRIES = int(os.getenv("DOC_CACHE_MAX_ENTRIES", "512"))
+DOC_CACHE_MAX_BYTES = int(os.getenv("DOC_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def pipeline_fingerprint(nlp: Language, profile: str = "full") -> str:
+    """Identifies the model + active components — a Doc is only reusable for the same pipeline."""
+    meta = nlp.meta
+    disabled = set(disabled_components(nlp, profile))
+    active = [name for name in nlp.pipe_names if name not in disabled]
+    return f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}|{','.join(active)}"
+
+
+class DocCache:
+    def __init__(self, max_entries: int = DOC_CACHE_MAX_ENTRIES, max_bytes: int = DOC_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # Engines are called from executor threads, so LRU bookkeeping must be atomic
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(nlp: Language, text: str, profile: str = "full") -> str:
+        digest = hashlib.sha256()
+        digest.update(pipeline_fingerprint(nlp, profile).encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def parse(self, nlp: Language, text: str, profile: str = "full") -> Doc:
+        """Return a Doc for `text`, parsing only if this exact text/pipeline was not seen recently."""
+        key = self.make_key(nlp, text, profile)
+
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if payload is not None:
+            return next(DocBin().from_bytes(payload).get_docs(nlp.vocab))
+
+        # Parse outside the lock — this is the expensive part and must not serialize callers
+        doc = run_profile(nlp, text, profile)
+        payload = DocBin(docs=[doc]).to_bytes()
+        self._store(key, payload)
+        return doc
+
+    def parse_many(self, nlp: Language, texts: List[str], profile: str = "full") -> List[Doc]:
+        """
+        Batch version of `parse`: cached texts are deserialized, the rest go
+        through a single `nlp.pipe` call, which is much faster than one call each.
+        """
+        keys = [self.make_key(nlp, text, profile) for text in texts]
+        docs: List[Optional[Doc]] = [None] * len(texts)
+        missing: List[int] = []
+
+        with self._lock:
+            payloads = []
+            for i, key in enumerate(keys):
+                payload = self._entries.get(key)
+                if payload is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    missing.append(i)
+                payloads.append(payload)
+
+        for i, payload in enumerate(payloads):
+            if payload is not None:
+                docs[i] = next(DocBin().from_bytes(payload).get_docs(nlp.vocab))
+
+        if missing:
+            disabled = disabled_components(nlp, profile)
+            for i, doc in zip(missing, nlp.pipe((texts[i] for i in missing), disable=disabled)):
+                docs[i] = doc
+                self._store(keys[i], DocBin(docs=[doc]).to_bytes())
+        return docs
+
+    def _store(self, key: str, payload: bytes) -> None:
+        # A single huge document should not flush the whole cache
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# One cache per process, shared by every service that parses text
+doc_cache = DocCache()
+
+
+def parse(nlp: Language, text: str, profile: str = "full") -> Doc:
+    """Drop-in replacement for `nlp(text)` that goes through the shared cache."""
+    return doc_cache.parse(nlp, text, profile)
+
+
+def parse_many(nlp: Language, texts: List[str], profile: str = "full") -> List[Doc]:
+    """Batched `parse` — uncached texts share one `nlp.pipe` pass."""
+    return doc_cache.parse_many(nlp, texts, profile)
@@ -0,0 +1,69 @@
+"""
+engines.py — Process-wide NLP engine singletons, built lazily.
+
+Routers and flow.py used to build their own KnowledgeGraphEngine /
+ContradictionDetector instances at import time. Every engine now lives here,
+is created on first use (or by an explicit warm-up), and shares the
+registry's spaCy pipeline. Load state per engine is tracked for /ready.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict
+
+from services.knowledge_graph import KnowledgeGraphEngine
+from services.contradiction_detector import ContradictionDetector
+from services.persona_generator import PersonaGenerator
+from services.enhancement_service import EnhancementService
+
+logger = logging.getLogger(__name__)
+
+_FACTORIES = {
+    "kg": KnowledgeGraphEngine,
+    "detector": ContradictionDetector,
+    "personas": PersonaGenerator,
+    "enhancement": EnhancementService,
+}
+
+_instances: Dict[str, Any] = {}
+_status: Dict[str, dict] = {name: {"state": "cold"} for name in _FACTORIES}
+# Two requests arriving during a cold start must not both build the same engine
+_lock = threading.Lock()
+
+
+def get_engine(name: str):
+    """
+    Return the named engine, building it on first use.
+    Returns None if it failed to load — a missing model must not stop the API from booting.
+    """
+    with _lock:
+        if name in _instances:
+            return _instances[name]
+        if _status[name]["state"] == "failed":
+            return None
+
+        engine_cls = _FACTORIES[name]
+        _status[name] = {"state": "loading"}
+        started = time.perf_counter()
+        try:
+            engine = engine_cls()
+        except Exception as e:
+            logger.error(f"Error loading {engine_cls.__name__}: {e}")
+            _status[name] = {"state": "failed", "error": str(e)}
+            return None
+
+        _instances[name] = engine
+        _status[name] = {"state": "ready", "seconds": round(time.perf_counter() - started, 3)}
+        return engine
+
+
+def warm_all() -> Dict[str, dict]:
+    """Build every engine now (used by the background warm-up) and report their state."""
+    for name in _FACTORIES:
+        get_engine(name)
+    return status()
+
+
+def status() -> Dict[str, dict]:
+    return {name: dict(state) for name, state in _status.items()}
@@ -1,23 +1,23 @@
-import spacy
 import logging
-from typing import List, Dict
-
-
+from typing import Optional, List, Dict
+from spacy.language import Language
+from services.nlp_registry import get_nlp
+from services.doc_cache import parse
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 class EnhancementService:
-    def __init__(self):
+    def __init__(self, nlp: Optional[Language] = None):
         """
         Initializes the Enhancement Service with spaCy.
         """
         logger.info("Initializing Enhancement Service...")
 
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            logger.error("spaCy model 'en_core_web_sm' not found.")
+            self.nlp = nlp or get_nlp("EnhancementService")
+        except RuntimeError as e:
+            logger.error(str(e))
             self.nlp = None
 
     def enhance_paragraph(self, text: str) -> dict:
@@ -62,7 +62,8 @@ class EnhancementService:
         if not self.nlp:
             return tags
             
-        doc = self.nlp(text)
+        # Dependency labels and sentence lengths only — NER/lemmas are not needed
+        doc = parse(self.nlp, text, profile="parse-only")
         
         # Detect passive voice (auxiliary passive 'auxpass' or nominal subject passive 'nsubjpass')
         strong_passive_evidence = False
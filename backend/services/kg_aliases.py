@@ -0,0 +1,185 @@
+"""
+kg_aliases.py — Per-script alias table: surface form → canonical entity id.
+
+NER keys nodes by the raw entity text, so "Arjun", "Arjun Mehta" and
+"Mr. Mehta" used to become three nodes with three sets of edges. Every
+surface form is now resolved once to a canonical id and the mapping stored in
+`kg_aliases` ({script_id, alias, canonical, type}):
+
+1. The alias key is the case-folded name without possessives or neutral
+   titles ("Dr. Mehta's" → "mehta"). Gendered honorifics stay in it
+   ("Mr. Mehta" → "mr mehta"), so "Mr. Mehta" and "Mrs. Mehta" are two keys.
+   A known key resolves immediately.
+2. An unknown PERSON name joins the one existing PERSON canonical whose name
+   tokens (honorifics aside) it contains or is contained in ("Arjun" /
+   "Mr. Mehta" → "Arjun Mehta") — unless the canonical is already known under
+   the other gender's honorific. No candidate or several (two Mehtas) → the
+   name becomes a canonical itself.
+
+Mappings are append-only: a surface keeps the canonical it was first given,
+so retracting a paragraph always subtracts from the same nodes it added to.
+Rows written before honorifics were kept in the key (entries without an
+"honorific" field) are still found by the honorific-free key. A wrong
+mapping is undone with kg_store.split_alias, which retracts the paragraphs
+behind it, pins the surface to itself and lets them be extracted again.
+Within one merge, longer names are resolved first so the fullest form
+becomes the canonical id.
+
+Pure Python — no I/O here (kg_store.py loads and writes the table).
+"""
+
+import re
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Titles that say which person is meant ("Mr." / "Mrs. Mehta") stay in the alias key; the rest are dropped
+GENDERED_HONORIFICS = {"mr": "m", "sir": "m", "lord": "m", "shri": "m", "sri": "m",
+                       "mrs": "f", "ms": "f", "miss": "f", "madam": "f", "lady": "f", "smt": "f"}
+NEUTRAL_HONORIFICS = {"mx", "dr", "prof", "professor"}
+HONORIFICS = set(GENDERED_HONORIFICS) | NEUTRAL_HONORIFICS
+
+_TOKEN_RE = re.compile(r"\w+")
+_POSSESSIVE_RE = re.compile(r"['’]s\b")
+
+# Only person names are merged by token overlap — "York" is not "New York"
+FUZZY_TYPES = {"PERSON"}
+
+
+def normalize_tokens(name: str) -> List[str]:
+    """Case-folded word tokens of an entity name, possessives dropped ("Arjun's" → ["arjun"])."""
+    return _TOKEN_RE.findall(_POSSESSIVE_RE.sub("", name.casefold()))
+
+
+def alias_key(surface: str) -> str:
+    return " ".join(t for t in normalize_tokens(surface) if t not in NEUTRAL_HONORIFICS)
+
+
+def name_key(surface: str) -> str:
+    """The name without any honorific — also the alias key of rows written before gendered ones were kept."""
+    return " ".join(t for t in normalize_tokens(surface) if t not in HONORIFICS)
+
+
+def honorific(key: str) -> Optional[str]:
+    """The gendered honorific in an alias key, if any ("mrs mehta" → "mrs")."""
+    return next((t for t in key.split() if t in GENDERED_HONORIFICS), None)
+
+
+def lookup(aliases: Dict[str, dict], surface: str) -> Optional[dict]:
+    """The stored entry for `surface`: by its alias key, else a pre-honorific row under its name key."""
+    entry = aliases.get(alias_key(surface))
+    if entry is None:
+        legacy = aliases.get(name_key(surface))
+        if legacy is not None and "honorific" not in legacy:
+            entry = legacy
+    return entry
+
+
+class AliasTable:
+    def __init__(self, aliases: Optional[Dict[str, dict]] = None):
+        # alias key → {"canonical": id, "type": label, "honorific": gendered honorific or None}
+        self.aliases: Dict[str, dict] = dict(aliases or {})
+        self.added: Dict[str, dict] = {}
+        # (type, token) → canonical ids, for the fuzzy PERSON match
+        self._by_token: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        self._tokens: Dict[str, Set[str]] = {}
+        # canonical id → genders of the honorifics it is known by
+        self._genders: Dict[str, Set[str]] = defaultdict(set)
+        for key, entry in self.aliases.items():
+            self._register(entry["canonical"], entry.get("type"), honorific(key))
+
+    def _register(self, canonical: str, entity_type: Optional[str], title: Optional[str] = None) -> None:
+        if title:
+            self._genders[canonical].add(GENDERED_HONORIFICS[title])
+        if canonical in self._tokens:
+            return
+        tokens = set(name_key(canonical).split())
+        self._tokens[canonical] = tokens
+        own = honorific(alias_key(canonical))
+        if own:
+            self._genders[canonical].add(GENDERED_HONORIFICS[own])
+        for token in tokens:
+            self._by_token[(entity_type, token)].add(canonical)
+
+    def canonical(self, surface: str) -> str:
+        """Canonical id for a known surface form, else the surface itself."""
+        entry = lookup(self.aliases, surface)
+        return entry["canonical"] if entry else surface
+
+    def resolve(self, surface: str, entity_type: Optional[str]) -> str:
+        """Canonical id for `surface`, recording a new alias when it was unknown."""
+        key = alias_key(surface)
+        tokens = set(name_key(surface).split())
+        if not tokens:
+            return surface
+        entry = lookup(self.aliases, surface)
+        if entry:
+            return entry["canonical"]
+
+        canonical = surface
+        title = honorific(key)
+        if entity_type in FUZZY_TYPES:
+            candidates = set()
+            for token in tokens:
+                candidates |= self._by_token.get((entity_type, token), set())
+            candidates = {c for c in candidates if tokens <= self._tokens[c] or self._tokens[c] <= tokens}
+            if title:
+                # "Mrs. Mehta" never joins an entity already known as "Mr. Mehta"
+                candidates = {c for c in candidates if self._genders[c] <= {GENDERED_HONORIFICS[title]}}
+            if len(candidates) == 1:
+                canonical = candidates.pop()
+
+        entry = {"canonical": canonical, "type": entity_type, "honorific": title}
+        self.aliases[key] = entry
+        self.added[key] = entry
+        self._register(canonical, entity_type, title)
+        return canonical
+
+    def resolve_contributions(self, deltas: List[Tuple[dict, int]]) -> List[Tuple[dict, int]]:
+        """
+        Resolve every unknown surface in the positive contributions (longest
+        names first), then rewrite all contributions onto canonical ids.
+        """
+        surfaces: Dict[str, Optional[str]] = {}
+        for contribution, multiplier in deltas:
+            if multiplier > 0:
+                for node in contribution.get("nodes", []):
+                    surfaces.setdefault(node["id"], node.get("type"))
+        for surface in sorted(surfaces, key=lambda s: -len(name_key(s).split())):
+            self.resolve(surface, surfaces[surface])
+        return [(canonicalize(contribution, self.canonical), multiplier) for contribution, multiplier in deltas]
+
+
+def canonicalize(contribution: dict, canonical: Callable[[str], str]) -> dict:
+    """
+    Rewrite a paragraph contribution onto canonical ids: nodes sharing a
+    canonical id are folded together, links re-keyed (and sorted), links
+    between two aliases of one entity dropped along with evidence only they cited.
+    """
+    nodes: Dict[str, dict] = {}
+    for node in contribution.get("nodes", []):
+        node_id = canonical(node["id"])
+        merged = nodes.get(node_id)
+        if merged is None:
+            nodes[node_id] = {**node, "id": node_id, "mentions": list(node.get("mentions", []))}
+            continue
+        merged["count"] = merged.get("count", 1) + node.get("count", 1)
+        merged["mentions"] += [m for m in node.get("mentions", []) if m not in merged["mentions"]]
+
+    links: Dict[Tuple[str, str, str], dict] = {}
+    for link in contribution.get("links", []):
+        source, target = sorted((canonical(link["source"]), canonical(link["target"])))
+        if source == target:
+            continue
+        key = (source, target, link.get("relation", ""))
+        merged = links.get(key)
+        if merged is None:
+            links[key] = {**link, "source": source, "target": target,
+                          "scenes": list(link.get("scenes", [])), "evidence": list(link.get("evidence", []))}
+            continue
+        merged["count"] = merged.get("count", 1) + link.get("count", 1)
+        for field in ("scenes", "evidence"):
+            merged[field] += [x for x in link.get(field, []) if x not in merged[field]]
+
+    cited = {sid for link in links.values() for sid in link["evidence"]}
+    evidence = {sid: text for sid, text in contribution.get("evidence", {}).items() if sid in cited}
+    return {**contribution, "nodes": list(nodes.values()), "links": list(links.values()), "evidence": evidence}
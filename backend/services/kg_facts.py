@@ -0,0 +1,70 @@
+"""
+kg_facts.py — Per-sentence fact features and the (entity, lemma) fact index.
+
+The contradiction check compares a new sentence's polarity with that of
+stored evidence sentences that share its verb. It used to re-parse every
+similar evidence sentence just to find its negation, and scanned every link
+for the ones touching the sentence's subject. Both are now precomputed:
+
+    facts       {sid: {"subject", "lemma", "negated"}} — recorded by the KG
+                builder when a sentence becomes evidence, stored on its
+                kg_evidence document and carried in the cached bible
+    fact index  {(entity, lemma): [{"sid", "negated", "subject"}, ...]} — one
+                entry per evidence sentence of every link touching the entity,
+                built once per cached bible version (kg_store.fact_index)
+
+`lemma` is the sentence's main verb lemma, which is also the relation label
+of every edge the sentence supports, so the index can be keyed from links
+alone. Evidence stored before features were recorded has `negated` None
+until migration 006 backfills it; the detector parses those sentences.
+
+Pure Python — no I/O here.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+FactKey = Tuple[str, str]
+
+# Relation label of a sentence without a verb
+NO_VERB_RELATION = "interacts with"
+
+
+def relation_lemma(tokens: Iterable) -> str:
+    """The sentence's main verb / root lemma — the KG builder's relation label."""
+    for tok in tokens:
+        if tok.pos_ == "VERB" or tok.dep_ == "ROOT":
+            return tok.lemma_
+    return NO_VERB_RELATION
+
+
+def fact_features(tokens: Iterable, lemma: str) -> dict:
+    """Subject text and polarity of a parsed sentence (any iterable of spaCy tokens)."""
+    subject, negated = "", False
+    for tok in tokens:
+        if not subject and "subj" in tok.dep_:
+            subject = tok.text
+        if tok.dep_ == "neg":
+            negated = True
+    return {"subject": subject, "lemma": lemma, "negated": negated}
+
+
+def build_fact_index(bible: dict) -> Dict[FactKey, List[dict]]:
+    """
+    (entity, lemma) → the evidence sentences of links touching the entity with
+    that relation, each listed once per key, in link order.
+    """
+    facts = bible.get("facts", {})
+    index: Dict[FactKey, List[dict]] = {}
+    seen = set()
+    for link in bible.get("links", []):
+        relation = link.get("relation", "")
+        for sid in link.get("evidence", []):
+            fact = facts.get(sid, {})
+            for entity in (link["source"], link["target"]):
+                if (entity, relation, sid) in seen:
+                    continue
+                seen.add((entity, relation, sid))
+                index.setdefault((entity, relation), []).append(
+                    {"sid": sid, "negated": fact.get("negated"), "subject": fact.get("subject", "")}
+                )
+    return index
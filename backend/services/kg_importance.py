@@ -0,0 +1,50 @@
+"""
+kg_importance.py — How much an entity matters to the story, for prompt context.
+
+Summary builders (chat, auto-suggest, orchestrate, the fact-check fallback)
+can only send a few dozen entities and relationships. They used to send the
+first ones extracted; they now send the most important ones:
+
+    importance = count + DEGREE_WEIGHT × degree
+
+`count` is how often the entity is mentioned and `degree` how many
+relationship edges touch it, so a character who is mentioned often and
+interacts with many others outranks a place named a hundred times in passing.
+Both terms are stored on kg_nodes and kept current by every merge
+(kg_merge.plan_merge), so the score is too — no graph-wide recomputation.
+
+Pure Python — no I/O here.
+"""
+
+from typing import Dict, List
+
+# One relationship counts as much as this many extra mentions
+DEGREE_WEIGHT = 2
+
+
+def importance(count: int, degree: int) -> int:
+    return count + DEGREE_WEIGHT * degree
+
+
+def node_importance(node: dict) -> int:
+    """Stored score, or computed for nodes written before it was stored."""
+    if "importance" in node:
+        return node["importance"]
+    return importance(node.get("count", 1), node.get("degree", 0))
+
+
+def rank_bible(bible: dict) -> Dict[str, List[dict]]:
+    """
+    Nodes by importance and links by count (then by their ends' importance),
+    highest first, ties in bible order. Built once per cached bible version
+    (kg_store.load_bible) so a top-k preview is a slice.
+    """
+    nodes = bible.get("nodes", [])
+    scores = {node["id"]: node_importance(node) for node in nodes}
+    links = bible.get("links", [])
+    return {
+        "nodes": sorted(nodes, key=lambda n: -scores[n["id"]]),
+        "links": sorted(links, key=lambda l: (
+            -l.get("count", 1), -(scores.get(l["source"], 0) + scores.get(l["target"], 0))
+        )),
+    }
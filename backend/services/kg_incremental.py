@@ -0,0 +1,117 @@
+"""
+kg_incremental.py — Paragraph-level bookkeeping for incremental story-bible updates.
+
+Analysis used to push the whole manuscript through the KG engine on every
+call. Instead, each paragraph is hashed; only paragraphs whose hash is new get
+extracted, and every paragraph's nodes/links are stored separately (in the
+`kg_paragraphs` collection) so its contribution can be dropped exactly when
+the paragraph is edited or deleted.
+
+Edges are aggregated: one record per (source, target, relation) with a count,
+the scenes it appears in and a capped list of evidence-sentence ids; the
+sentence texts live once in a separate {id: sentence} evidence map.
+
+Everything here is pure Python — storage is handled by ai/flow.py and
+services/kg_store.py.
+"""
+
+import os
+import re
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+# Sentences kept per edge as evidence — edges repeat across a novel, evidence needn't
+MAX_EVIDENCE_PER_EDGE = int(os.getenv("KG_MAX_EVIDENCE_PER_EDGE", "5"))
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    Split editor text into paragraphs. The editor's innerText separates blocks
+    with one or more newlines, so any newline run is a paragraph boundary.
+    """
+    return [p.strip() for p in re.split(r"\n+", text or "") if p.strip()]
+
+
+def paragraph_spans(text: str) -> List[Tuple[int, str]]:
+    """split_paragraphs with each paragraph's character offset in `text`."""
+    spans = []
+    for match in re.finditer(r"[^\n]+", text or ""):
+        paragraph = match.group().strip()
+        if paragraph:
+            spans.append((match.start() + match.group().index(paragraph[0]), paragraph))
+    return spans
+
+
+def paragraph_hash(paragraph: str, scene: Optional[str] = None) -> str:
+    """
+    Key of a paragraph's stored contribution. With a scene (kg_scenes.py) the
+    scene is part of the key, so a paragraph that moves to another scene is
+    re-extracted with the right scene tags. Without one it is the paragraph's
+    `text_hash`, stored alongside so text analysed out of its scene (a chapter
+    without its heading) can still be matched.
+    """
+    if scene is not None:
+        paragraph = f"{scene}\n{paragraph}"
+    return hashlib.sha1(paragraph.encode("utf-8")).hexdigest()
+
+
+def evidence_id(sentence: str) -> str:
+    """Stable short id for an evidence sentence (same text → same id across paragraphs)."""
+    return hashlib.sha1(sentence.encode("utf-8")).hexdigest()[:16]
+
+
+def diff_paragraphs(
+    paragraphs: List[str],
+    stored: Dict[str, int],
+    scenes: Optional[List[str]] = None,
+    known_texts: Optional[Set[str]] = None,
+) -> Tuple[Dict[str, str], Dict[str, int], List[str]]:
+    """
+    Compare the current paragraphs with the stored {hash: occurrences} map.
+    `scenes` gives each paragraph's scene id (hashed into its key, see paragraph_hash).
+    `known_texts` are text hashes of paragraphs stored under any scene: a
+    paragraph among them is not new even if its scene differs (for partial
+    text, whose scenes are cut without the headings before it).
+
+    Returns:
+        new        — {hash: text} for paragraphs that must be extracted
+        recounted  — {hash: occurrences} for already-stored paragraphs whose repeat count changed
+        removed    — hashes no longer present in the text
+    """
+    hashes = [paragraph_hash(p, scene) for p, scene in zip(paragraphs, scenes or [None] * len(paragraphs))]
+    occurrences = Counter(hashes)
+    new: Dict[str, str] = {}
+    for p, h in zip(paragraphs, hashes):
+        if h not in stored and h not in new and not (known_texts and paragraph_hash(p) in known_texts):
+            new[h] = p
+
+    recounted = {h: n for h, n in occurrences.items() if h in stored and stored[h] != n}
+    removed = [h for h in stored if h not in occurrences]
+    return new, recounted, removed
+
+
+def merge_link(links: Dict[Tuple[str, str, str], dict], link: dict, multiplier: int = 1) -> dict:
+    """Add one aggregated edge into `links` (keyed by signature), in place."""
+    signature = (link["source"], link["target"], link.get("relation", ""))
+    existing = links.get(signature)
+    if existing is None:
+        existing = links[signature] = {
+            "source": link["source"],
+            "target": link["target"],
+            "relation": link.get("relation", ""),
+            "count": 0,
+            "scenes": [],
+            "evidence": [],
+        }
+
+    existing["count"] += link.get("count", 1) * multiplier
+    for scene in link.get("scenes", []):
+        if scene not in existing["scenes"]:
+            existing["scenes"].append(scene)
+    for sid in link.get("evidence", []):
+        if len(existing["evidence"]) >= MAX_EVIDENCE_PER_EDGE:
+            break
+        if sid not in existing["evidence"]:
+            existing["evidence"].append(sid)
+    return existing
@@ -0,0 +1,269 @@
+"""
+kg_merge.py — The one place story-bible merges are computed.
+
+Input is a list of signed paragraph contributions ((graph, multiplier) pairs:
+positive adds a paragraph's extraction, negative retracts it) plus the current
+state of just the nodes / edges / evidence those contributions touch.
+Output is a minimal delta:
+
+    {
+        "nodes":    {"added": [node...], "updated": [node...], "removed": [id...]},
+        "links":    {"added": [link...], "updated": [link...], "removed": [{source, target, relation}...]},
+        "evidence": {"added": {sid: text}, "removed": [sid...]},
+        "facts":    {"added": {sid: {subject, lemma, negated}}},
+    }
+
+(kg_store.apply_merge adds {"aliases": {"added": {alias: entry}}} for new alias-table rows.)
+
+Added/updated items carry their full new state, so a client patches its view by
+replacing items by key. The same computation also yields the MongoDB writes
+($inc / $addToSet / capped $push upserts, deletes) that kg_store.py applies atomically,
+including each node's `degree` (number of edges touching it) and
+`importance` score (kg_importance.py), and each new edge's end types.
+
+Pure Python — no I/O here.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import DeleteOne, UpdateOne
+
+from services.kg_importance import importance
+from services.kg_incremental import MAX_EVIDENCE_PER_EDGE
+
+# Evidence ids shown per edge — storage keeps up to MAX_EVIDENCE_PER_EDGE (the first ones found)
+READ_EVIDENCE_PER_EDGE = min(int(os.getenv("KG_READ_EVIDENCE_PER_EDGE", "5")), MAX_EVIDENCE_PER_EDGE)
+
+EdgeKey = Tuple[str, str, str]
+
+
+def edge_key(link: dict) -> EdgeKey:
+    return (link["source"], link["target"], link.get("relation", ""))
+
+
+def fold_contributions(deltas: List[Tuple[dict, int]]) -> Tuple[Dict, Dict, Dict]:
+    """
+    Collapse (contribution, multiplier) pairs into one delta per node / edge /
+    evidence sentence.
+    """
+    nodes: Dict[str, dict] = {}
+    edges: Dict[EdgeKey, dict] = {}
+    evidence: Dict[str, dict] = {}
+
+    for contribution, multiplier in deltas:
+        if not multiplier:
+            continue
+        for node in contribution.get("nodes", []):
+            delta = nodes.setdefault(node["id"], {"type": node.get("type"), "count": 0, "mentions": set()})
+            delta["count"] += node.get("count", 1) * multiplier
+            if multiplier > 0:
+                delta["mentions"].update(node.get("mentions", []))
+
+        for link in contribution.get("links", []):
+            delta = edges.setdefault(edge_key(link), {"count": 0, "scenes": set(), "evidence": set()})
+            delta["count"] += link.get("count", 1) * multiplier
+            if multiplier > 0:
+                delta["scenes"].update(link.get("scenes", []))
+                delta["evidence"].update(link.get("evidence", []))
+
+        # Evidence is reference-counted per paragraph, not per repeat of it
+        refs = 1 if multiplier > 0 else -1
+        facts = contribution.get("facts", {})
+        for sid, text in contribution.get("evidence", {}).items():
+            delta = evidence.setdefault(sid, {"text": text, "refs": 0, "fact": None})
+            delta["refs"] += refs
+            delta["fact"] = delta["fact"] or facts.get(sid)
+
+    return nodes, edges, evidence
+
+
+def _merge_list(current: List[str], added: set, dropped: set = frozenset()) -> List[str]:
+    """Current order first, new items appended (sorted for determinism), dropped ones filtered."""
+    merged = [x for x in current if x not in dropped]
+    known = set(current)
+    merged += sorted(x for x in added if x not in known and x not in dropped)
+    return merged
+
+
+def _node_type(node_id: str, node_deltas: Dict[str, dict], current_nodes: Dict[str, dict]) -> Optional[str]:
+    """The type a node has (stored) or will have once this merge inserts it."""
+    stored = current_nodes.get(node_id)
+    if stored:
+        return stored.get("type")
+    return node_deltas.get(node_id, {}).get("type")
+
+
+def plan_merge(
+    script_id: str,
+    folded: Tuple[Dict, Dict, Dict],
+    current_nodes: Dict[str, dict],
+    current_edges: Dict[EdgeKey, dict],
+    current_evidence: Dict[str, dict],
+) -> Tuple[dict, Dict[str, list]]:
+    """
+    Compute the client delta and the per-collection write operations.
+    `current_*` hold the stored documents for the touched keys only (missing = new);
+    `current_nodes` also covers the ends of every touched edge, whose degree may change.
+    """
+    node_deltas, edge_deltas, evidence_deltas = folded
+    delta = {
+        "nodes": {"added": [], "updated": [], "removed": []},
+        "links": {"added": [], "updated": [], "removed": []},
+        "evidence": {"added": {}, "removed": []},
+        "facts": {"added": {}},
+    }
+    writes: Dict[str, list] = {"kg_nodes": [], "kg_edges": [], "kg_evidence": []}
+
+    # ── Evidence first: edges need to know which sentences died ──────────────
+    dead_sids = set()
+    for sid, change in evidence_deltas.items():
+        if not change["refs"]:
+            continue
+        stored = current_evidence.get(sid)
+        refs = (stored["refs"] if stored else 0) + change["refs"]
+        selector = {"script_id": script_id, "sid": sid}
+        if refs <= 0:
+            dead_sids.add(sid)
+            if stored:
+                delta["evidence"]["removed"].append(sid)
+                writes["kg_evidence"].append(DeleteOne(selector))
+            continue
+        if not stored:
+            delta["evidence"]["added"][sid] = change["text"]
+        update = {"$inc": {"refs": change["refs"]}, "$setOnInsert": {"text": change["text"]}}
+        # Features are recorded once — also for sentences stored before they existed
+        if change["fact"] and (not stored or "negated" not in stored):
+            update["$set"] = change["fact"]
+            delta["facts"]["added"][sid] = change["fact"]
+        writes["kg_evidence"].append(UpdateOne(selector, update, upsert=True))
+
+    # ── Edges (before nodes: degrees follow edges appearing / vanishing) ─────
+    degrees: Dict[str, int] = {}
+    for key, change in edge_deltas.items():
+        source, target, relation = key
+        stored = current_edges.get(key)
+        count = (stored.get("count", 0) if stored else 0) + change["count"]
+        selector = {"script_id": script_id, "source": source, "target": target, "relation": relation}
+        if count <= 0:
+            if stored:
+                delta["links"]["removed"].append({"source": source, "target": target, "relation": relation})
+                writes["kg_edges"].append(DeleteOne(selector))
+                for node_id in {source, target}:
+                    degrees[node_id] = degrees.get(node_id, 0) - 1
+            continue
+        if stored is None:
+            for node_id in {source, target}:
+                degrees[node_id] = degrees.get(node_id, 0) + 1
+
+        stored_evidence = stored.get("evidence", []) if stored else []
+        scenes = _merge_list(stored.get("scenes", []) if stored else [], change["scenes"])
+        evidence = _merge_list(stored_evidence, change["evidence"], dead_sids)[:MAX_EVIDENCE_PER_EDGE]
+        lost_evidence = any(sid in dead_sids for sid in stored_evidence)
+        if stored and not change["count"] and not lost_evidence \
+                and scenes == stored.get("scenes", []) and evidence == stored_evidence[:MAX_EVIDENCE_PER_EDGE]:
+            continue
+
+        update = {"$inc": {"count": change["count"]}}
+        if stored is None:
+            # End types ride on the edge so type-filtered windows need no node lookup
+            update["$setOnInsert"] = {"source_type": _node_type(source, node_deltas, current_nodes),
+                                      "target_type": _node_type(target, node_deltas, current_nodes)}
+        if change["scenes"]:
+            update["$addToSet"] = {"scenes": {"$each": sorted(change["scenes"])}}
+        if lost_evidence:
+            # Dropping dead sentences and adding new ones is one field rewrite — set the merged, capped list
+            update["$set"] = {"evidence": evidence}
+        else:
+            # Capped like merge_link: an edge recurring across a novel keeps its first few sentences
+            fresh = [sid for sid in evidence if sid not in stored_evidence]
+            if fresh:
+                update["$push"] = {"evidence": {"$each": fresh, "$slice": MAX_EVIDENCE_PER_EDGE}}
+        writes["kg_edges"].append(UpdateOne(selector, update, upsert=stored is None))
+
+        state = {"source": source, "target": target, "relation": relation, "count": count,
+                 "scenes": scenes, "evidence": evidence[:READ_EVIDENCE_PER_EDGE]}
+        delta["links"]["added" if stored is None else "updated"].append(state)
+
+    # ── Nodes ────────────────────────────────────────────────────────────────
+    no_change = {"type": None, "count": 0, "mentions": set()}
+    for node_id in list(node_deltas) + [n for n in degrees if n not in node_deltas]:
+        change = node_deltas.get(node_id, no_change)
+        stored = current_nodes.get(node_id)
+        count = (stored.get("count", 0) if stored else 0) + change["count"]
+        selector = {"script_id": script_id, "id": node_id}
+        if count <= 0:
+            if stored:
+                delta["nodes"]["removed"].append(node_id)
+                writes["kg_nodes"].append(DeleteOne(selector))
+            continue
+
+        mentions = _merge_list(stored.get("mentions", []) if stored else [], change["mentions"])
+        new_mentions = stored is None or len(mentions) != len(stored.get("mentions", []))
+        degree_change = degrees.get(node_id, 0)
+        if stored and not change["count"] and not new_mentions and not degree_change:
+            continue
+
+        degree = (stored.get("degree", 0) if stored else 0) + degree_change
+        update = {"$inc": {"count": change["count"], "degree": degree_change},
+                  "$set": {"importance": importance(count, degree)}}
+        if change["mentions"]:
+            update["$addToSet"] = {"mentions": {"$each": sorted(change["mentions"])}}
+        if stored is None:
+            update["$setOnInsert"] = {"type": change["type"]}
+        writes["kg_nodes"].append(UpdateOne(selector, update, upsert=stored is None))
+
+        state = {"id": node_id, "type": stored.get("type") if stored else change["type"],
+                 "count": count, "mentions": mentions, "degree": degree, "importance": importance(count, degree)}
+        delta["nodes"]["added" if stored is None else "updated"].append(state)
+
+    return delta, writes
+
+
+def empty_delta(version: int) -> dict:
+    """Delta for an analysis that changed nothing — the client keeps its view."""
+    return {
+        "nodes": {"added": [], "updated": [], "removed": []},
+        "links": {"added": [], "updated": [], "removed": []},
+        "evidence": {"added": {}, "removed": []},
+        "facts": {"added": {}},
+        "aliases": {"added": {}},
+        "base_version": version,
+        "version": version,
+        "reset": False,
+    }
+
+
+def apply_delta(bible: dict, delta: dict) -> Optional[dict]:
+    """
+    Patch a full bible ({"nodes", "links", "evidence", "facts", "aliases"}) with a
+    merge delta, returning a new bible (the input is left untouched).
+
+    Returns None when the result can't be trusted — an updated edge whose
+    evidence sample now shows a sentence the bible never held — and the
+    caller should reload instead.
+    """
+    removed_nodes = set(delta["nodes"]["removed"])
+    changed_nodes = {n["id"]: n for n in delta["nodes"]["updated"]}
+    nodes = [changed_nodes.get(n["id"], n) for n in bible["nodes"] if n["id"] not in removed_nodes]
+    nodes += delta["nodes"]["added"]
+
+    removed_links = {edge_key(l) for l in delta["links"]["removed"]}
+    changed_links = {edge_key(l): l for l in delta["links"]["updated"]}
+    links = [changed_links.get(edge_key(l), l) for l in bible["links"] if edge_key(l) not in removed_links]
+    links += delta["links"]["added"]
+
+    removed_evidence = set(delta["evidence"]["removed"])
+    evidence = {sid: text for sid, text in bible["evidence"].items() if sid not in removed_evidence}
+    evidence.update(delta["evidence"]["added"])
+    for link in delta["links"]["updated"]:
+        if any(sid not in evidence for sid in link.get("evidence", [])):
+            return None
+    patched = {"nodes": nodes, "links": links, "evidence": evidence}
+    if "facts" in bible:
+        facts = {sid: fact for sid, fact in bible["facts"].items() if sid not in removed_evidence}
+        facts.update(delta.get("facts", {}).get("added", {}))
+        patched["facts"] = facts
+    if "aliases" in bible:
+        patched["aliases"] = {**bible["aliases"], **delta.get("aliases", {}).get("added", {})}
+    return patched
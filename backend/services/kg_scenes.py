@@ -0,0 +1,85 @@
+"""
+kg_scenes.py — Chapter / scene segmentation of a manuscript for the story bible.
+
+Every mention and edge used to be tagged "current_scene". The manuscript is
+now cut at the headings DocumentParser._is_heading recognises ("Chapter 3",
+"ACT II", "Prologue", "IV."), and each paragraph is extracted with the id of
+the scene it sits in:
+
+    {"scene": "chapter-3", "ordinal": 4, "title": "Chapter 3", "start": 10412,
+     "paragraphs": ["...", ...], "offsets": [10423, ...]}
+
+`scene` is a slug of the heading (suffixed -2, -3 … when a heading repeats),
+so it stays the same when text is added before it; `ordinal` (position in the
+manuscript), `start` (character offset of the heading) and `offsets` (of
+each stripped paragraph, for reporting positions) are what move.
+Paragraphs before the first heading form the "opening" scene. Headings
+themselves are structure, not prose, and are not extracted.
+
+kg_store.py keeps one kg_scenes document per scene, indexed by
+(script_id, ordinal), so previews can be limited to the scenes around the
+writer's cursor.
+
+Pure Python — no I/O here.
+"""
+
+import os
+import re
+from typing import Dict, List
+
+from data.file_parser import DocumentParser
+
+OPENING_SCENE = "opening"
+
+# Scenes on either side of the cursor's scene used for cursor-local context
+NEARBY_SCENES = int(os.getenv("KG_NEARBY_SCENES", "1"))
+
+# _is_heading only looks at the first word, which prose shares ("Part of me knew.")
+MAX_HEADING_WORDS = 8
+_SENTENCE_END_RE = re.compile(r"[a-z][.!?]['\"’”]?$")
+
+_PARAGRAPH_RE = re.compile(r"[^\n]+")
+_SLUG_RE = re.compile(r"\W+")
+
+
+def is_heading(paragraph: str) -> bool:
+    """A chapter / scene heading: DocumentParser's patterns, short and not a sentence."""
+    return (
+        len(paragraph.split()) <= MAX_HEADING_WORDS
+        and not _SENTENCE_END_RE.search(paragraph)
+        and DocumentParser._is_heading(paragraph)
+    )
+
+
+def _slug(title: str) -> str:
+    return _SLUG_RE.sub("-", title.casefold()).strip("-") or "scene"
+
+
+def split_scenes(text: str) -> List[dict]:
+    """
+    Scenes in manuscript order. Paragraphs are split exactly like
+    kg_incremental.split_paragraphs (newline runs, stripped, blanks dropped).
+    """
+    scenes: List[dict] = []
+    seen: Dict[str, int] = {}
+    current = {"scene": OPENING_SCENE, "title": "", "start": 0, "paragraphs": [], "offsets": []}
+    for match in _PARAGRAPH_RE.finditer(text or ""):
+        paragraph = match.group().strip()
+        if not paragraph:
+            continue
+        if not is_heading(paragraph):
+            current["paragraphs"].append(paragraph)
+            current["offsets"].append(match.start() + match.group().index(paragraph[0]))
+            continue
+        if current["paragraphs"] or current["scene"] != OPENING_SCENE:
+            scenes.append(current)
+        slug = _slug(paragraph)
+        seen[slug] = seen.get(slug, 0) + 1
+        scene_id = slug if seen[slug] == 1 else f"{slug}-{seen[slug]}"
+        current = {"scene": scene_id, "title": paragraph, "start": match.start(), "paragraphs": [], "offsets": []}
+    if current["paragraphs"] or current["scene"] != OPENING_SCENE:
+        scenes.append(current)
+
+    for ordinal, scene in enumerate(scenes):
+        scene["ordinal"] = ordinal
+    return scenes
@@ -0,0 +1,729 @@
+"""
+kg_store.py — Normalized MongoDB storage for the story bible.
+
+The bible used to be one `story_bibles` document holding `nodes`, `links` and
+`evidence` arrays: every merge rewrote all of it, every read loaded all of it,
+and a long novel would eventually hit MongoDB's 16 MB document limit.
+It now lives in three collections, one document per item:
+
+    kg_nodes     {script_id, id, type, count, mentions, degree, importance}
+    kg_edges     {script_id, source, target, relation, source_type, target_type, count, scenes, evidence}
+    kg_evidence  {script_id, sid, text, refs, subject, lemma, negated} (see kg_facts.py)
+    kg_aliases   {script_id, alias, canonical, type, honorific, pinned} (see kg_aliases.py)
+    kg_scenes    {script_id, scene, ordinal, title, start} (see kg_scenes.py)
+
+`story_bibles` keeps a small header per script ({script_id, version, updated_at})
+whose version is bumped on every write. Reads are served from bible_cache.py,
+keyed by that version; apply_merge patches the cached copy with its delta.
+Windowed reads (load_window) go to the collections directly, through indexes.
+
+Writes are signed paragraph contributions: kg_merge.py turns them into a
+minimal delta plus $inc / $addToSet / capped $push upserts and deletes,
+applied here in one transaction together with the kg_paragraphs bookkeeping
+(diffed inside that transaction). Items whose count drops to zero are
+deleted; scene lists only grow.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import DeleteMany, ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure
+
+from config.db import get_database
+from services.bible_cache import bible_cache
+from services.bible_index import BibleIndex
+from services.bible_window import (
+    DEGREE_ORDER, EDGE_ORDER, edge_filter, encode_cursor, node_filter, projections, scene_range,
+)
+from services.kg_aliases import AliasTable, alias_key, honorific, lookup, name_key
+from services.kg_importance import rank_bible
+from services.kg_scenes import NEARBY_SCENES
+from services.kg_merge import READ_EVIDENCE_PER_EDGE, apply_delta, edge_key, fold_contributions, plan_merge
+
+logger = logging.getLogger(__name__)
+
+_NODE_FIELDS = {"_id": 0, "script_id": 0}
+_EDGE_FIELDS = {"_id": 0, "script_id": 0, "source_type": 0, "target_type": 0,
+                "evidence": {"$slice": READ_EVIDENCE_PER_EDGE}}
+
+# Flipped off the first time the server rejects a transaction (standalone mongod)
+_transactions_supported = True
+
+
+# ── Writes ────────────────────────────────────────────────────────────────────
+
+async def _current_state(script_id: str, folded, session) -> Tuple[Dict, Dict, Dict]:
+    """Stored documents for just the nodes / edges / evidence a merge touches."""
+    db = get_database()
+    node_deltas, edge_deltas, evidence_deltas = folded
+
+    # Ends of touched edges too — their degree (and importance) may change
+    touched = set(node_deltas) | {end for source, target, _ in edge_deltas for end in (source, target)}
+    nodes = {
+        doc["id"]: doc
+        async for doc in db["kg_nodes"].find(
+            {"script_id": script_id, "id": {"$in": list(touched)}}, _NODE_FIELDS, session=session
+        )
+    } if touched else {}
+
+    edges = {}
+    if edge_deltas:
+        sources = list({source for source, _, _ in edge_deltas})
+        async for doc in db["kg_edges"].find(
+            {"script_id": script_id, "source": {"$in": sources}}, {"_id": 0, "script_id": 0}, session=session
+        ):
+            key = edge_key(doc)
+            if key in edge_deltas:
+                edges[key] = doc
+
+    evidence = {
+        doc["sid"]: doc
+        async for doc in db["kg_evidence"].find(
+            {"script_id": script_id, "sid": {"$in": list(evidence_deltas)}},
+            {"_id": 0, "sid": 1, "refs": 1, "negated": 1},
+            session=session,
+        )
+    } if evidence_deltas else {}
+    return nodes, edges, evidence
+
+
+async def _read_aliases(script_id: str, session=None) -> Dict[str, dict]:
+    cursor = get_database()["kg_aliases"].find({"script_id": script_id}, {"_id": 0, "script_id": 0}, session=session)
+    aliases = {}
+    async for doc in cursor:
+        entry = {"canonical": doc["canonical"], "type": doc.get("type")}
+        # Absent on rows keyed before gendered honorifics were kept (kg_aliases.lookup)
+        if "honorific" in doc:
+            entry["honorific"] = doc["honorific"]
+        aliases[doc["alias"]] = entry
+    return aliases
+
+
+async def _alias_table(script_id: str, version: int, session) -> AliasTable:
+    """The alias table at `version` — from the bible cache when it holds that version."""
+    cached = bible_cache.peek(script_id, version)
+    if cached is not None and "aliases" in cached:
+        return AliasTable(cached["aliases"])
+    return AliasTable(await _read_aliases(script_id, session))
+
+
+async def apply_merge(
+    script_id: str,
+    occurrences: Dict[str, int],
+    extracted: Dict[str, dict],
+    full: bool = False,
+    reset: bool = False,
+) -> dict:
+    """
+    Bring the script's kg_paragraphs and normalized bible to `occurrences` in one atomic step.
+
+    occurrences — {paragraph hash: occurrences} for every paragraph of the analysed text
+                  (0 retracts and removes a stored paragraph)
+    extracted   — {paragraph hash: graph (with its "scene")} for paragraphs that were not
+                  stored when the caller diffed and so were sent to the NLP
+    full        — the text is the whole manuscript: stored paragraphs missing from it are removed
+    reset       — wipe the script's bible first and re-apply every paragraph in full (implies `full`)
+
+    The diff against kg_paragraphs is redone here, inside the merge session. New
+    paragraphs are claimed with an upsert, and only the call whose upsert inserted
+    the document adds its contribution — so two analyses of the same edit, or a
+    transaction retry, can't count it twice. Unless `full`, a paragraph whose
+    text (its extraction's "text_hash") is stored under another scene isn't
+    claimed either. A paragraph the caller thought stored
+    but that is gone by now (and so has no extraction) is skipped; the next
+    analysis extracts it.
+
+    Besides an explicit `reset`, the bible is rebuilt when no paragraph is stored
+    (a first build, or a bible from before paragraph tracking) or when a full
+    manuscript shares none with what is stored (a manuscript pasted over).
+
+    Runs inside a transaction when the deployment supports one (replica set /
+    mongos), otherwise as ordered bulk writes. Returns the kg_merge delta plus
+    {"base_version", "version", "reset"}.
+    """
+    global _transactions_supported
+    client = get_database().client
+    full = full or reset
+
+    async def merge(session) -> dict:
+        db = get_database()
+        paragraphs = db["kg_paragraphs"]
+        header = await db["story_bibles"].find_one({"script_id": script_id}, {"version": 1}, session=session)
+        base_version = header.get("version", 0) if header else 0
+
+        # Claim new paragraphs: an upsert that finds the document already there inserts nothing
+        claims = [h for h in extracted if occurrences.get(h, 0) > 0]
+        if claims and not full:
+            # Partial text: a paragraph stored meanwhile under another scene is not new either
+            text_hashes = [extracted[h]["text_hash"] for h in claims if extracted[h].get("text_hash")]
+            known = {
+                doc["text_hash"] async for doc in paragraphs.find(
+                    {"script_id": script_id, "text_hash": {"$in": text_hashes}}, {"text_hash": 1}, session=session
+                )
+            } if text_hashes else set()
+            claims = [h for h in claims if extracted[h].get("text_hash") not in known]
+        claimed = set()
+        if claims:
+            result = await paragraphs.bulk_write([
+                UpdateOne(
+                    {"script_id": script_id, "hash": h},
+                    {"$setOnInsert": {
+                        "scene": extracted[h].get("scene"),
+                        "text_hash": extracted[h].get("text_hash"),
+                        "occurrences": occurrences[h],
+                        "nodes": extracted[h].get("nodes", []),
+                        "links": extracted[h].get("links", []),
+                        "evidence": extracted[h].get("evidence", {}),
+                        "facts": extracted[h].get("facts", {}),
+                    }},
+                    upsert=True,
+                )
+                for h in claims
+            ], ordered=True, session=session)
+            claimed = {claims[index] for index in result.upserted_ids}
+
+        query = {"script_id": script_id}
+        if not full:
+            query["hash"] = {"$in": list(occurrences)}
+        stored = {
+            doc["hash"]: doc.get("occurrences", 1)
+            async for doc in paragraphs.find(query, {"hash": 1, "occurrences": 1}, session=session)
+            if doc["hash"] not in claimed
+        }
+        rebuild = reset or (
+            not stored and not await paragraphs.find_one(
+                {"script_id": script_id, "hash": {"$nin": list(claimed)}}, {"_id": 1}, session=session
+            )
+        ) or (full and not any(h in stored for h in occurrences))
+
+        # Occurrence changes of stored paragraphs; after a rebuild they all start from zero
+        reweighted = {}
+        paragraph_ops = []
+        for h, count in occurrences.items():
+            if h in stored and count > 0:
+                change = count - (0 if rebuild else stored[h])
+                if change:
+                    reweighted[h] = change
+                if count != stored[h]:
+                    paragraph_ops.append(
+                        UpdateOne({"script_id": script_id, "hash": h}, {"$set": {"occurrences": count}})
+                    )
+        removed = [h for h in stored if occurrences.get(h, 0) <= 0 and (full or h in occurrences)]
+        if not rebuild:
+            reweighted.update({h: -stored[h] for h in removed})
+        if removed:
+            paragraph_ops.append(DeleteMany({"script_id": script_id, "hash": {"$in": removed}}))
+
+        # Contributions being retracted or re-weighted, read before they're deleted
+        deltas = []
+        if reweighted:
+            async for doc in paragraphs.find(
+                {"script_id": script_id, "hash": {"$in": list(reweighted)}}, session=session
+            ):
+                deltas.append((doc, reweighted[doc["hash"]]))
+        deltas.extend((extracted[h], occurrences[h]) for h in claims if h in claimed)
+
+        # Map surface forms onto canonical entity ids, learning new aliases from the added text
+        aliases = await _alias_table(script_id, base_version, session)
+        deltas = aliases.resolve_contributions(deltas)
+
+        if rebuild:
+            # Start from a clean slate so the deltas below describe the whole bible
+            for name in ("kg_nodes", "kg_edges", "kg_evidence"):
+                await db[name].delete_many({"script_id": script_id}, session=session)
+
+        folded = fold_contributions(deltas)
+        current = await _current_state(script_id, folded, session)
+        delta, writes = plan_merge(script_id, folded, *current)
+        delta["aliases"] = {"added": aliases.added}
+        writes["kg_aliases"] = [
+            UpdateOne({"script_id": script_id, "alias": key}, {"$setOnInsert": entry}, upsert=True)
+            for key, entry in aliases.added.items()
+        ]
+
+        if paragraph_ops:
+            await paragraphs.bulk_write(paragraph_ops, ordered=True, session=session)
+        for name, ops in writes.items():
+            if ops:
+                await db[name].bulk_write(ops, ordered=True, session=session)
+
+        version = await bump_version(script_id, session=session)
+        return {**delta, "base_version": base_version, "version": version, "reset": rebuild}
+
+    result = None
+    if _transactions_supported:
+        try:
+            async with await client.start_session() as session:
+                result = await session.with_transaction(merge)
+        except (NotImplementedError, OperationFailure) as e:
+            # 20 = IllegalOperation: "Transaction numbers are only allowed on a replica set member or mongos".
+            # The first read fails, so nothing has been written yet.
+            if isinstance(e, OperationFailure) and e.code != 20:
+                raise
+            logger.info("MongoDB deployment has no transactions — applying KG merges without one")
+            _transactions_supported = False
+
+    if result is None:
+        result = await merge(None)
+    _write_through(script_id, result)
+    return result
+
+
+def _write_through(script_id: str, result: dict) -> None:
+    """
+    Move the cached bible to the merged version by applying the delta, when the
+    cache holds exactly the version the merge started from; drop it otherwise.
+    """
+    cached = None if result["reset"] else bible_cache.peek(script_id, result["base_version"])
+    patched = apply_delta(cached, result) if cached is not None else None
+    if patched is None:
+        bible_cache.invalidate(script_id)
+    else:
+        # What NLP workers need to patch their replicas (bible_replica.py)
+        delta = {key: result[key] for key in ("nodes", "links", "evidence", "facts", "base_version", "version",
+                                              "reset")}
+        bible_cache.put(script_id, result["version"], patched, delta)
+
+
+async def bump_version(script_id: str, session=None) -> int:
+    db = get_database()
+    header = await db["story_bibles"].find_one_and_update(
+        {"script_id": script_id},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+        session=session,
+    )
+    return header["version"]
+
+
+async def split_alias(script_id: str, surface: str) -> Optional[dict]:
+    """
+    Undo the mapping of `surface` onto another entity (a wrong fuzzy or honorific join).
+
+    Every stored paragraph that contributed to that entity, or still names the
+    surface, is retracted and removed. Their contributions were written under
+    the old mapping, and the stored paragraphs no longer say which surface was
+    which. The surface is then pinned to itself, so it won't be folded
+    again and migration 003 keeps the decision. The next full-manuscript
+    analysis extracts those paragraphs again. Returns None when `surface` maps to
+    nothing but itself.
+    """
+    db = get_database()
+    aliases = await _read_aliases(script_id)
+    entry = lookup(aliases, surface)
+    if entry is None or entry["canonical"] == surface:
+        return None
+
+    canonical = entry["canonical"]
+    affected = await db["kg_paragraphs"].distinct(
+        "hash", {"script_id": script_id, "nodes.id": {"$in": [canonical, surface]}}
+    )
+    await apply_merge(script_id, {h: 0 for h in affected}, {})
+
+    key = alias_key(surface)
+    await db["kg_aliases"].update_one(
+        {"script_id": script_id, "alias": key},
+        {"$set": {"canonical": surface, "type": entry.get("type"), "honorific": honorific(key), "pinned": True}},
+        upsert=True,
+    )
+    # Extraction folds surfaces with the cached table — move every process to a new version
+    await bump_version(script_id)
+    bible_cache.invalidate(script_id)
+    return {"alias": key, "previous": canonical, "canonical": surface, "paragraphs": len(affected)}
+
+
+async def bible_version(script_id: str) -> int:
+    header = await get_database()["story_bibles"].find_one({"script_id": script_id}, {"version": 1})
+    return header.get("version", 0) if header else 0
+
+
+# ── Reads ─────────────────────────────────────────────────────────────────────
+
+async def load_evidence(script_id: str, links: List[dict]) -> Dict[str, str]:
+    """Fetch the sentence texts referenced by `links`."""
+    sids = list({sid for link in links for sid in link.get("evidence", [])})
+    if not sids:
+        return {}
+    cursor = get_database()["kg_evidence"].find(
+        {"script_id": script_id, "sid": {"$in": sids}}, {"_id": 0, "sid": 1, "text": 1}
+    )
+    return {doc["sid"]: doc["text"] async for doc in cursor}
+
+
+async def _read_evidence(script_id: str, links: List[dict]) -> Tuple[Dict[str, str], Dict[str, dict]]:
+    """Texts and stored fact features (kg_facts.py) of the sentences referenced by `links`."""
+    sids = list({sid for link in links for sid in link.get("evidence", [])})
+    evidence, facts = {}, {}
+    if not sids:
+        return evidence, facts
+    cursor = get_database()["kg_evidence"].find(
+        {"script_id": script_id, "sid": {"$in": sids}},
+        {"_id": 0, "sid": 1, "text": 1, "subject": 1, "lemma": 1, "negated": 1},
+    )
+    async for doc in cursor:
+        evidence[doc["sid"]] = doc["text"]
+        if "negated" in doc:
+            facts[doc["sid"]] = {"subject": doc.get("subject", ""), "lemma": doc.get("lemma", ""),
+                                 "negated": doc["negated"]}
+    return evidence, facts
+
+
+async def _read_bible(script_id: str) -> dict:
+    db = get_database()
+    nodes = await db["kg_nodes"].find({"script_id": script_id}, _NODE_FIELDS).to_list(length=None)
+    links = await db["kg_edges"].find({"script_id": script_id}, _EDGE_FIELDS).to_list(length=None)
+    evidence, facts = await _read_evidence(script_id, links)
+    return {"nodes": nodes, "links": links, "evidence": evidence, "facts": facts,
+            "aliases": await _read_aliases(script_id)}
+
+
+async def _current_bible(script_id: str) -> Tuple[int, dict]:
+    version = await bible_version(script_id)
+    return version, await bible_cache.get(script_id, version, lambda: _read_bible(script_id))
+
+
+async def replica_source(script_id: str) -> Tuple[int, Tuple[dict, ...], dict]:
+    """
+    (version, the merge deltas that led to it, the full bible): what an NLP
+    worker needs to bring its replica of the bible up to date (bible_replica.py).
+    """
+    version, bible = await _current_bible(script_id)
+    return version, bible_cache.deltas(script_id, version), bible
+
+
+async def cached_bible(script_id: str) -> dict:
+    """
+    The full bible at its current version — one header lookup when cached.
+    Also holds the evidence sentences' fact features ("facts"), which the API
+    shape leaves out. Shared with other requests: do not mutate.
+    """
+    return (await _current_bible(script_id))[1]
+
+
+async def load_bible(
+    script_id: str,
+    max_nodes: Optional[int] = None,
+    max_links: Optional[int] = None,
+    with_evidence: bool = True,
+    cursor: Optional[int] = None,
+) -> dict:
+    """
+    Read the story bible in its API shape: {"nodes", "links", "evidence", "aliases"}.
+    Pass limits when only a preview is needed (summaries, fallbacks) — previews
+    hold the most important nodes and strongest links (kg_importance.py) and omit aliases.
+    With a `cursor` (character offset in the analysed manuscript) a preview is
+    taken from the scenes around it, falling back to the whole bible when they hold nothing.
+    """
+    if cursor is not None and (max_nodes is not None or max_links is not None):
+        scenes = await scenes_near(script_id, cursor)
+        if scenes:
+            preview = await _scene_preview(script_id, scenes, max_nodes, max_links, with_evidence)
+            if preview["nodes"] or preview["links"]:
+                return preview
+
+    version, bible = await _current_bible(script_id)
+    if max_nodes is None and max_links is None and with_evidence:
+        return {key: value for key, value in bible.items() if key != "facts"}
+
+    ranked = bible_cache.derived(script_id, version, bible, "ranking", rank_bible)
+    nodes = ranked["nodes"][:max_nodes]
+    links = ranked["links"][:max_links]
+    evidence = {}
+    if with_evidence:
+        evidence = {sid: bible["evidence"][sid] for link in links for sid in link.get("evidence", [])
+                    if sid in bible["evidence"]}
+    return {"nodes": nodes, "links": links, "evidence": evidence}
+
+
+async def bible_index(script_id: str) -> BibleIndex:
+    """Token → node-id index and adjacency map for the current bible version, built once per version."""
+    version, bible = await _current_bible(script_id)
+    return bible_cache.derived(script_id, version, bible, "index", BibleIndex)
+
+
+async def bible_graph(script_id: str) -> "BibleGraph":
+    """CSR adjacency (bible_graph.py) for multi-hop / path / degree queries, built once per version."""
+    # SciPy is only imported once a graph query actually needs it
+    from services.bible_graph import BibleGraph
+    version, bible = await _current_bible(script_id)
+    return bible_cache.derived(script_id, version, bible, "graph", BibleGraph)
+
+
+async def export_bible(script_id: str) -> Tuple[int, bytes]:
+    """(version, columnar binary encoding from bible_export.py), encoded once per version."""
+    from services.bible_export import encode_bible
+    version, bible = await _current_bible(script_id)
+    return version, bible_cache.derived(script_id, version, bible, "export", lambda b: encode_bible(b, version))
+
+
+async def load_hubs(
+    script_id: str,
+    top: int,
+    node_type: Optional[str] = None,
+    relations: Optional[List[str]] = None,
+    min_count: int = 1,
+) -> dict:
+    """
+    The `top` best-connected entities (optionally of one type), ranked by
+    distinct neighbours over the links with one of `relations` and count ≥
+    min_count — from the cached CSR graph, so repeat queries on a version
+    reuse its filtered adjacency.
+    """
+    index, graph = await bible_index(script_id), await bible_graph(script_id)
+    # Entities with no matching link at all aren't hubs, whatever `top` asks for
+    ranked = graph.top_by_degree(top, relations, min_count, node_type)
+    hubs = [(node_id, degree) for node_id, degree in ranked if degree]
+    return {
+        "nodes": [index.nodes_by_id[node_id] for node_id, _ in hubs],
+        "degrees": {node_id: degree for node_id, degree in hubs},
+    }
+
+
+async def evidence_texts(script_id: str, sids: List[str]) -> Dict[str, str]:
+    """Sentence texts by id — the cached bible's sample first, kg_evidence for the rest."""
+    cached = (await cached_bible(script_id))["evidence"]
+    found = {sid: cached[sid] for sid in sids if sid in cached}
+    missing = [sid for sid in sids if sid not in found]
+    if missing:
+        cursor = get_database()["kg_evidence"].find(
+            {"script_id": script_id, "sid": {"$in": missing}}, {"_id": 0, "sid": 1, "text": 1}
+        )
+        found.update({doc["sid"]: doc["text"] async for doc in cursor})
+    return found
+
+
+async def load_k_hop(
+    script_id: str,
+    entities: List[str],
+    hops: int,
+    relations: Optional[List[str]] = None,
+    min_count: int = 1,
+    max_nodes: Optional[int] = None,
+) -> dict:
+    """
+    Everything within `hops` of `entities` (ids or known aliases) and the links
+    among it, with {"hops": {id: distance}} — from the cached CSR graph.
+    """
+    index, graph = await bible_index(script_id), await bible_graph(script_id)
+    seeds = [node_id for node_id in map(index.resolve, entities) if node_id]
+    distance = graph.k_hop(seeds, hops, relations, min_count, max_nodes)
+    links = graph.subgraph_links(distance)
+    if relations or min_count > 1:
+        links = [l for l in links if (not relations or l.get("relation") in relations) and l.get("count", 1) >= min_count]
+    evidence = index.bible.get("evidence", {})
+    return {
+        "nodes": [index.nodes_by_id[node_id] for node_id in distance],
+        "links": links,
+        "evidence": {sid: evidence[sid] for l in links for sid in l.get("evidence", []) if sid in evidence},
+        "hops": distance,
+    }
+
+
+async def load_path(
+    script_id: str, source: str, target: str, relations: Optional[List[str]] = None, min_count: int = 1
+) -> Optional[dict]:
+    """Shortest chain of relationships between two entities, or None if unconnected / unknown."""
+    index, graph = await bible_index(script_id), await bible_graph(script_id)
+    source_id, target_id = index.resolve(source), index.resolve(target)
+    if not source_id or not target_id:
+        return None
+    path = graph.shortest_path(source_id, target_id, relations, min_count)
+    if path is None:
+        return None
+    links = graph.path_links(path, relations, min_count)
+    evidence = index.bible.get("evidence", {})
+    return {
+        "path": path,
+        "nodes": [index.nodes_by_id[node_id] for node_id in path],
+        "links": links,
+        "evidence": {sid: evidence[sid] for l in links for sid in l.get("evidence", []) if sid in evidence},
+    }
+
+
+async def bible_stats(script_id: str) -> Dict[str, int]:
+    bible = await cached_bible(script_id)
+    return {"nodes": len(bible["nodes"]), "links": len(bible["links"])}
+
+
+# ── Windowed reads ────────────────────────────────────────────────────────────
+
+async def _resolve_entities(script_id: str, names: List[str]) -> List[str]:
+    """Node ids for entity names: exact ids, else the canonical id of a known alias."""
+    db = get_database()
+    found = {
+        doc["id"] async for doc in db["kg_nodes"].find(
+            {"script_id": script_id, "id": {"$in": names}}, {"_id": 0, "id": 1}
+        )
+    }
+    keys = list({key for name in names if name not in found for key in (alias_key(name), name_key(name))} - {""})
+    if keys:
+        async for doc in db["kg_aliases"].find(
+            {"script_id": script_id, "alias": {"$in": keys}}, {"_id": 0, "canonical": 1}
+        ):
+            found.add(doc["canonical"])
+    return sorted(found)
+
+
+async def load_window(
+    script_id: str,
+    entities: Optional[List[str]] = None,
+    top_k: Optional[int] = None,
+    types: Optional[List[str]] = None,
+    scene_from: Optional[int] = None,
+    scene_to: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 200,
+    fields: Optional[List[str]] = None,
+    with_evidence: bool = False,
+) -> dict:
+    """
+    One page of the bible read through indexed queries (see bible_window.py):
+    the links around `entities`, among the `top_k` best-connected nodes, or
+    across the whole bible, {"nodes", "links", "evidence", "next_cursor"}.
+    `scene_from` / `scene_to` bound the scene ordinals (inclusive).
+
+    Nodes are the anchors (the entities / top-k ranking) plus the ends of the
+    page's links. Raises ValueError for unknown fields, a bad cursor or
+    entities combined with top_k.
+    """
+    if entities and top_k:
+        raise ValueError("Pass either entity or top_k, not both")
+    db = get_database()
+    node_fields, link_fields = projections(fields)
+    if with_evidence and "evidence" not in link_fields:
+        link_fields["evidence"] = {"$slice": READ_EVIDENCE_PER_EDGE}
+
+    scenes = None
+    if scene_from is not None or scene_to is not None:
+        found_scenes = db["kg_scenes"].find(scene_range(script_id, scene_from, scene_to), {"_id": 0, "scene": 1})
+        scenes = [doc["scene"] async for doc in found_scenes.sort("ordinal", 1)]
+        if not scenes:
+            return {"nodes": [], "links": [], "evidence": {}, "next_cursor": None}
+
+    anchors: List[str] = []
+    ranked, touching, within = None, None, None
+    if top_k:
+        ranked = await db["kg_nodes"].find(node_filter(script_id, types, scenes), node_fields) \
+            .sort(DEGREE_ORDER).limit(top_k).to_list(length=None)
+        within = [node["id"] for node in ranked]
+    elif entities:
+        anchors = touching = await _resolve_entities(script_id, entities)
+
+    links = await db["kg_edges"].find(edge_filter(script_id, touching, within, types, scenes, cursor), link_fields) \
+        .sort(EDGE_ORDER).limit(limit + 1).to_list(length=None)
+    next_cursor = encode_cursor(links[limit - 1]) if len(links) > limit else None
+    links = links[:limit]
+
+    if ranked is not None:
+        nodes = ranked
+    else:
+        wanted = list(dict.fromkeys(anchors + [end for link in links for end in (link["source"], link["target"])]))
+        found = {
+            doc["id"]: doc async for doc in db["kg_nodes"].find(
+                {"script_id": script_id, "id": {"$in": wanted}}, node_fields
+            )
+        }
+        nodes = [found[node_id] for node_id in wanted if node_id in found]
+
+    evidence = await load_evidence(script_id, links) if with_evidence else {}
+    if with_evidence and fields is not None and "evidence" not in fields:
+        for link in links:
+            link.pop("evidence", None)
+    return {"nodes": nodes, "links": links, "evidence": evidence, "next_cursor": next_cursor}
+
+
+# ── Scenes ────────────────────────────────────────────────────────────────────
+
+async def save_scenes(script_id: str, scenes: List[dict]) -> None:
+    """Store the manuscript's scene list (kg_scenes.split_scenes), writing only what changed."""
+    db = get_database()
+    stored = {
+        doc["scene"]: doc async for doc in db["kg_scenes"].find({"script_id": script_id}, {"_id": 0, "script_id": 0})
+    }
+    ops = []
+    for scene in scenes:
+        state = {"scene": scene["scene"], "ordinal": scene["ordinal"], "title": scene["title"], "start": scene["start"]}
+        if stored.get(scene["scene"]) != state:
+            ops.append(UpdateOne({"script_id": script_id, "scene": scene["scene"]}, {"$set": state}, upsert=True))
+    gone = [scene_id for scene_id in stored if scene_id not in {scene["scene"] for scene in scenes}]
+    if gone:
+        ops.append(DeleteMany({"script_id": script_id, "scene": {"$in": gone}}))
+    if ops:
+        await db["kg_scenes"].bulk_write(ops, ordered=True)
+
+
+async def list_scenes(script_id: str) -> List[dict]:
+    cursor = get_database()["kg_scenes"].find({"script_id": script_id}, {"_id": 0, "script_id": 0})
+    return await cursor.sort("ordinal", 1).to_list(length=None)
+
+
+async def scenes_near(script_id: str, cursor: int, radius: int = NEARBY_SCENES) -> List[str]:
+    """Ids of the scene containing `cursor` and the `radius` scenes either side, in order."""
+    scenes = get_database()["kg_scenes"]
+    # start grows with ordinal, so walking the ordinal index backwards finds the cursor's scene
+    current = await scenes.find_one(
+        {"script_id": script_id, "start": {"$lte": cursor}}, {"ordinal": 1}, sort=[("ordinal", -1)]
+    )
+    if current is None:
+        return []
+    nearby = scenes.find(
+        {"script_id": script_id, "ordinal": {"$gte": current["ordinal"] - radius, "$lte": current["ordinal"] + radius}},
+        {"_id": 0, "scene": 1},
+    ).sort("ordinal", 1)
+    return [doc["scene"] async for doc in nearby]
+
+
+async def _scene_preview(
+    script_id: str, scenes: List[str], max_nodes: Optional[int], max_links: Optional[int], with_evidence: bool
+) -> dict:
+    """The most important nodes mentioned and the strongest links seen in `scenes`."""
+    db = get_database()
+    nodes = db["kg_nodes"].find({"script_id": script_id, "mentions": {"$in": scenes}}, _NODE_FIELDS) \
+        .sort([("importance", -1), ("id", 1)])
+    links = db["kg_edges"].find({"script_id": script_id, "scenes": {"$in": scenes}}, _EDGE_FIELDS) \
+        .sort([("count", -1), ("source", 1), ("target", 1)])
+    nodes = await nodes.limit(max_nodes or 0).to_list(length=None)
+    links = await links.limit(max_links or 0).to_list(length=None)
+    evidence = await load_evidence(script_id, links) if with_evidence else {}
+    return {"nodes": nodes, "links": links, "evidence": evidence}
+
+
+def format_bible_summary(bible: dict, stats: Dict[str, int], detailed: bool = False) -> str:
+    """
+    Compact story-bible text used as grounding context for Groq prompts.
+    `bible` is a capped preview from load_bible(); `stats` gives the real totals.
+    """
+    nodes, links = bible.get("nodes", []), bible.get("links", [])
+    if not detailed:
+        node_lines = [f"- {n.get('type', 'Entity')}: {n['id']}" for n in nodes]
+        link_lines = [f"- {l['source']} [{l.get('relation', 'related to')}] {l['target']}" for l in links]
+        summary = ""
+        if node_lines:
+            summary += "Entities:\n" + "\n".join(node_lines) + "\n"
+        if link_lines:
+            summary += "Relationships:\n" + "\n".join(link_lines)
+        return summary
+
+    node_summaries = []
+    for n in nodes:
+        mentions = n.get("mentions", [])
+        mentions_preview = mentions[:5]
+        if len(mentions) > 5:
+            mentions_preview.append("...")
+        node_summaries.append(f"- {n.get('type', 'Entity')}: {n['id']} (Scenes: {', '.join(mentions_preview)})")
+    if stats["nodes"] > len(nodes):
+        node_summaries.append(f"... (and {stats['nodes'] - len(nodes)} more entities)")
+
+    link_summaries = [f"- {l['source']} [{l.get('relation', 'interacted with')}] {l['target']}" for l in links]
+    if stats["links"] > len(links):
+        link_summaries.append(f"... (and {stats['links'] - len(links)} more relationships)")
+
+    summary = "STORY BIBLE CONTEXT:\n"
+    if node_summaries:
+        summary += "Entities/Characters:\n" + "\n".join(node_summaries) + "\n\n"
+    if link_summaries:
+        summary += "Relationships/Events:\n" + "\n".join(link_summaries) + "\n"
+    return summary
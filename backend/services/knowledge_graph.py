@@ -1,24 +1,59 @@
-import spacy
 import networkx as nx
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple, Union
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Doc, Span
+from services.nlp_registry import get_nlp
+from services.doc_cache import parse, parse_many
+from services.kg_incremental import MAX_EVIDENCE_PER_EDGE, evidence_id
+from services.kg_aliases import AliasTable, canonicalize
+from services.kg_facts import fact_features, relation_lemma
 
 class KnowledgeGraphEngine:
-    def __init__(self):
-        # Load the English NLP model for Named Entity Recognition and Dependency Parsing
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            raise RuntimeError("spaCy model 'en_core_web_sm' not found. Please run: python -m spacy download en_core_web_sm")
+    def __init__(self, nlp: Optional[Language] = None):
+        # Shared English pipeline for Named Entity Recognition and Dependency Parsing
+        # (raises RuntimeError if the model is missing)
+        self.nlp = nlp or get_nlp("KnowledgeGraphEngine")
         
     def process_text(self, text: str, scene_id: str = "scene_1") -> Dict[str, Any]:
         """
         Process the text to extract entities and their relationships, 
         and add them to the knowledge graph.
         """
-        # Initialize the knowledge graph for this session
-        graph = nx.MultiDiGraph()
-        
-        doc = self.nlp(text)
+        return self._graph_from_doc(parse(self.nlp, text), scene_id)
+
+    def process_paragraphs(
+        self,
+        paragraphs: List[str],
+        scene_id: Union[str, List[str]] = "scene_1",
+        aliases: Optional[Dict[str, dict]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract one graph per paragraph so each paragraph's contribution can be
+        stored and later replaced on its own. All uncached paragraphs are parsed
+        in a single batched pipe pass.
+
+        `scene_id` is one scene for every paragraph, or a list giving each
+        paragraph's scene (see kg_scenes.py).
+
+        `aliases` is the script's alias table: known surface forms are folded
+        onto their canonical entity here; unknown ones are resolved at merge time.
+        """
+        docs = parse_many(self.nlp, paragraphs)
+        scene_ids = [scene_id] * len(docs) if isinstance(scene_id, str) else scene_id
+        graphs = [self._graph_from_doc(doc, scene) for doc, scene in zip(docs, scene_ids)]
+        if aliases:
+            table = AliasTable(aliases)
+            graphs = [canonicalize(graph, table.canonical) for graph in graphs]
+        return graphs
+
+    def _graph_from_doc(self, doc: Doc, scene_id: str) -> Dict[str, Any]:
+        # Initialize the knowledge graph for this session.
+        # Co-occurrence has no direction, so edges are undirected and keyed by relation:
+        # one record per (source, target, relation) however many sentences support it
+        graph = nx.MultiGraph()
+        evidence: Dict[str, str] = {} # Sentence id -> sentence text, for sentences kept as evidence
+        facts: Dict[str, dict] = {} # Sentence id -> subject / verb lemma / polarity (kg_facts.py)
         
         # 1. Extract Entities (Nodes)
         # We focus on characters (PERSON), locations (GPE, LOC, FAC), organizations (ORG), dates (DATE), and events (EVENT)
@@ -41,39 +76,43 @@ class KnowledgeGraphEngine:
                         graph.nodes[ent_text]["mentions"].append(scene_id)
                 
         # 2. Extract Relationships (Edges) - Co-occurrence within sentences
-        known_entity_names = list(entities.keys())
-        
-        for sent in doc.sents:
-            # Find which known global entities appear in this sentence
-            # We use this instead of `sent.ents` because spaCy often misses entities in complex sentences
-            sent_text = sent.text
-            found_ents_in_sent = []
-            for ent_name in known_entity_names:
-                if ent_name in sent_text:
-                    found_ents_in_sent.append(ent_name)
-            
-            # Find the main verb/action of the sentence for the relation label
-            main_verbs = [tok for tok in sent if tok.pos_ == "VERB" or tok.dep_ == "ROOT"]
-            relation_label = main_verbs[0].lemma_ if main_verbs else "interacts with"
-            
+        for sent, found_ents_in_sent in self._entities_per_sentence(doc, list(entities.keys())):
             # If there are at least 2 entities in the sentence, link them all together
-            if len(found_ents_in_sent) >= 2:
-                # Create edges between all unique pairs in the sentence
-                for i in range(len(found_ents_in_sent)):
-                    for j in range(len(found_ents_in_sent)):
-                        if i != j:
-                            source_text = found_ents_in_sent[i]
-                            target_text = found_ents_in_sent[j]
-                            
-                            # Only link if they are distinct entities
-                            if source_text != target_text:
-                                graph.add_edge(
-                                    source_text, 
-                                    target_text, 
-                                    relation=relation_label, 
-                                    scene_id=scene_id, 
-                                    sentence=sent.text.strip()
-                                )
+            if len(found_ents_in_sent) < 2:
+                continue
+
+            # Find the main verb/action of the sentence for the relation label
+            relation_label = relation_lemma(sent)
+            sentence_text = sent.text.strip()
+            sentence_id = evidence_id(sentence_text)
+
+            # One edge per unordered pair of distinct entities — k·(k−1)/2, not k·(k−1)
+            for i, first in enumerate(found_ents_in_sent):
+                for second in found_ents_in_sent[i + 1:]:
+                    source_text, target_text = sorted((first, second))
+                    if graph.has_edge(source_text, target_text, key=relation_label):
+                        edge = graph.edges[source_text, target_text, relation_label]
+                        edge["count"] += 1
+                    else:
+                        graph.add_edge(
+                            source_text, 
+                            target_text, 
+                            key=relation_label,
+                            relation=relation_label, 
+                            count=1,
+                            scenes=[],
+                            evidence=[],
+                        )
+                        edge = graph.edges[source_text, target_text, relation_label]
+
+                    if scene_id not in edge["scenes"]:
+                        edge["scenes"].append(scene_id)
+                    # Keep a capped sample of supporting sentences, stored once by id
+                    if len(edge["evidence"]) < MAX_EVIDENCE_PER_EDGE and sentence_id not in edge["evidence"]:
+                        edge["evidence"].append(sentence_id)
+                        evidence[sentence_id] = sentence_text
+                        if sentence_id not in facts:
+                            facts[sentence_id] = fact_features(sent, relation_label)
         
         # NetworkX 3.x changed the output format of node_link_data. 
         # To strictly enforce the schema our frontend and DB expects, we serialize it manually.
@@ -85,18 +124,54 @@ class KnowledgeGraphEngine:
             
         links_list = []
         for u, v, data in graph.edges(data=True):
-            link_data = {"source": u, "target": v}
+            # MultiGraph may yield an edge as (target, source) — restore the sorted order
+            source_text, target_text = sorted((u, v))
+            link_data = {"source": source_text, "target": target_text}
             link_data.update(data)
             links_list.append(link_data)
             
         return {
-            "directed": True,
+            "directed": False,
             "multigraph": True,
             "graph": {},
             "nodes": nodes_list,
-            "links": links_list
+            "links": links_list,
+            "evidence": evidence,
+            "facts": facts,
         }
                     
+    def _entities_per_sentence(self, doc: Doc, entity_names: List[str]) -> List[Tuple[Span, List[str]]]:
+        """
+        Find which known entities appear in each sentence.
+        We use this instead of `sent.ents` because spaCy often misses entities in complex sentences.
+
+        A PhraseMatcher is built once per document from the entity names and run
+        over the whole doc in one pass, instead of a substring scan per
+        (sentence, entity) pair. Matching is token-based, so "Ann" no longer
+        matches inside "Annual".
+        """
+        if not entity_names:
+            return []
+
+        matcher = PhraseMatcher(self.nlp.vocab)
+        for name, pattern in zip(entity_names, self.nlp.tokenizer.pipe(entity_names)):
+            matcher.add(name, [pattern])
+
+        sentences = list(doc.sents)
+        found: List[List[str]] = [[] for _ in sentences]
+        # Walk matches in token order so one forward pass maps them to sentences
+        sent_idx = 0
+        for match_id, start, _end in sorted(matcher(doc), key=lambda m: m[1]):
+            while start >= sentences[sent_idx].end:
+                sent_idx += 1
+            name = self.nlp.vocab.strings[match_id]
+            if name not in found[sent_idx]:
+                found[sent_idx].append(name)
+
+        # Keep the entity discovery order within a sentence, as the substring scan did
+        order = {name: i for i, name in enumerate(entity_names)}
+        return [(sent, sorted(names, key=order.get)) for sent, names in zip(sentences, found)]
+
     def _find_matching_entity(self, token_text: str, entities: Dict[str, str]) -> str:
         """
         Helper method to match a token from dependency parsing to an extracted entity.
@@ -107,5 +182,3 @@ class KnowledgeGraphEngine:
             if token_text in ent_name or ent_name in token_text:
                 return ent_name
         return None
-
-        return None
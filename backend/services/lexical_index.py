@@ -0,0 +1,199 @@
+"""
+lexical_index.py — Incremental TF-IDF index over a script's evidence sentences.
+
+ContradictionDetector used to refit a TfidfVectorizer on the new sentence plus
+every candidate evidence sentence on each call, and kept that vectorizer on
+the shared engine, so two concurrent checks could overwrite each other's
+vocabulary. Sentences are now hashed (HashingVectorizer: stateless, no
+vocabulary to fit) into one sparse term-count row each, kept per script:
+
+    rows      CSR arrays, one row per evidence id, appended in place (with
+              spare capacity) as edges gain evidence and masked out when it
+              is removed
+    df        document frequency per hashed term, updated on add / remove,
+              so IDF is always current without revisiting old rows
+
+Scoring a sentence against candidate rows is a sparse mat-vec with the
+query's tf·idf² weights, divided by the rows' tf·idf norms (a whole
+document's sentences: one sparse matrix product, `pairwise`) — the same
+cosine TfidfVectorizer's defaults give (smooth idf, l2 norm), with IDF taken
+over the script's whole evidence set instead of the candidates alone (query
+words no evidence sentence uses still count towards the query's norm).
+
+Evidence ids are content hashes (knowledge_graph.evidence_id), so an id that
+is already indexed never needs re-hashing. `sync` takes a merge's evidence
+delta (added sentences, removed ids), so keeping the index current costs the
+size of the change, not of the script. Not thread-safe: the owning
+bible_replica.BibleReplica serializes updates and scoring.
+
+Pure Python — no I/O here.
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# Hashed term space; collisions are negligible at evidence-set vocabulary sizes
+N_FEATURES = int(os.getenv("LEXICAL_INDEX_FEATURES", str(2 ** 18)))
+
+# Rebuild the matrix without removed rows once they outnumber live ones (and there are this many)
+MIN_COMPACT_ROWS = 256
+
+# Stateless — safe to share between threads and indexes
+_HASHER = HashingVectorizer(n_features=N_FEATURES, alternate_sign=False, norm=None)
+
+
+def term_counts(texts: List[str]) -> csr_matrix:
+    """Raw term counts, one row per text (TfidfVectorizer's default tokenization)."""
+    return _HASHER.transform(texts)
+
+
+def _reserve(array: np.ndarray, size: int) -> np.ndarray:
+    """`array`, grown (doubling) to hold at least `size` items."""
+    if len(array) >= size:
+        return array
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _unit_rows(matrix: csr_matrix) -> csr_matrix:
+    """Rows scaled to unit l2 norm (all-zero rows left as they are)."""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    return diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)) @ matrix
+
+
+class LexicalIndex:
+    def __init__(self):
+        self.row_of: Dict[str, int] = {}
+        self.df = np.zeros(N_FEATURES, dtype=np.int32)
+        # CSR arrays with spare capacity, so appending rows doesn't copy the index
+        self._data = np.zeros(0, dtype=np.float64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._indptr = np.zeros(1, dtype=np.int32)
+        self._n_rows = 0
+        self._alive = np.zeros(0, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self.row_of
+
+    # ── Updates ──────────────────────────────────────────────────────────────
+
+    def add(self, texts: Dict[str, str]) -> int:
+        """Index new evidence sentences (ids already present are skipped); returns how many were added."""
+        new = [sid for sid in texts if sid not in self.row_of]
+        if not new:
+            return 0
+        rows = term_counts([texts[sid] for sid in new])
+        for offset, sid in enumerate(new):
+            self.row_of[sid] = self._n_rows + offset
+        self._append(rows)
+        self.df += np.bincount(rows.indices, minlength=N_FEATURES).astype(np.int32)
+        return len(new)
+
+    def remove(self, sids: Iterable[str]) -> int:
+        """Drop sentences from the index; returns how many were indexed."""
+        rows = [self.row_of.pop(sid) for sid in sids if sid in self.row_of]
+        if not rows:
+            return 0
+        dropped = self.matrix[rows]
+        self.df -= np.bincount(dropped.indices, minlength=N_FEATURES).astype(np.int32)
+        self._alive[rows] = False
+        dead = self._n_rows - len(self.row_of)
+        if dead >= MIN_COMPACT_ROWS and dead > len(self.row_of):
+            self._compact()
+        return len(rows)
+
+    def sync(self, added: Optional[Dict[str, str]] = None, removed: Iterable[str] = ()) -> None:
+        """Apply an evidence delta ({sid: sentence} added, sids removed, as in a merge delta's "evidence")."""
+        self.remove(removed)
+        if added:
+            self.add(added)
+
+    def _append(self, rows: csr_matrix) -> None:
+        n_rows, nnz = self._n_rows + rows.shape[0], self._indptr[self._n_rows] + rows.nnz
+        self._data = _reserve(self._data, nnz)
+        self._indices = _reserve(self._indices, nnz)
+        self._indptr = _reserve(self._indptr, n_rows + 1)
+        self._alive = _reserve(self._alive, n_rows)
+
+        start = self._indptr[self._n_rows]
+        self._data[start:nnz] = rows.data
+        self._indices[start:nnz] = rows.indices
+        self._indptr[self._n_rows + 1:n_rows + 1] = rows.indptr[1:] + start
+        self._alive[self._n_rows:n_rows] = True
+        self._n_rows = n_rows
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._alive[:self._n_rows])
+        remap = np.full(self._n_rows, -1, dtype=np.int64)
+        remap[keep] = np.arange(len(keep))
+        kept = self.matrix[keep]
+        self._data, self._indices = kept.data.copy(), kept.indices.astype(np.int32)
+        self._indptr = kept.indptr.astype(np.int32)
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._n_rows = len(keep)
+        self.row_of = {sid: int(remap[row]) for sid, row in self.row_of.items()}
+
+    # ── Scoring ──────────────────────────────────────────────────────────────
+
+    @property
+    def matrix(self) -> csr_matrix:
+        """All rows, live and removed (removed ones are never scored) — a view, not a copy."""
+        nnz = self._indptr[self._n_rows]
+        return csr_matrix(
+            (self._data[:nnz], self._indices[:nnz], self._indptr[:self._n_rows + 1]),
+            shape=(self._n_rows, N_FEATURES), copy=False,
+        )
+
+    def idf(self) -> np.ndarray:
+        n_docs = len(self.row_of)
+        return np.log((1 + n_docs) / (1 + self.df)) + 1
+
+    def similarities(self, text: str, sids: List[str]) -> np.ndarray:
+        """Cosine similarity (tf·idf) of `text` to each indexed sentence in `sids` (0 for unknown ids)."""
+        scores = np.zeros(len(sids))
+        known = [i for i, sid in enumerate(sids) if sid in self.row_of]
+        if not known:
+            return scores
+
+        query = term_counts([text])
+        idf = self.idf()
+        query_weights = query.data * idf[query.indices]
+        query_norm = np.sqrt(np.dot(query_weights, query_weights))
+        if query_norm == 0:
+            return scores
+
+        # Row · query in tf·idf space is row_tf · (query_tf · idf²)
+        weights = np.zeros(N_FEATURES)
+        weights[query.indices] = query_weights * idf[query.indices]
+        rows = self.matrix[[self.row_of[sids[i]] for i in known]]
+        dots = rows @ weights
+        squared = rows.multiply(rows) @ (idf * idf)
+        norms = np.sqrt(squared) * query_norm
+        scores[known] = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+        return scores
+
+    def pairwise(self, texts: List[str], sids: List[str]) -> csr_matrix:
+        """
+        Cosine similarity of every text to every indexed sentence in `sids`
+        (a len(texts) × len(sids) sparse matrix; unknown ids score 0) — one
+        hashing pass over the texts and one sparse matrix product.
+        """
+        idf = self.idf()
+        known = [j for j, sid in enumerate(sids) if sid in self.row_of]
+        rows = self.matrix[[self.row_of[sids[j]] for j in known]]
+        # Scatter the candidate rows into their columns of the result
+        columns = csr_matrix(
+            (np.ones(len(known)), (np.arange(len(known)), known)), shape=(len(known), len(sids))
+        )
+        queries = _unit_rows(term_counts(texts) @ diags(idf))
+        candidates = _unit_rows(rows @ diags(idf))
+        return (queries @ candidates.T @ columns).tocsr()
+
@@ -0,0 +1,337 @@
+"""
+nlp_executor.py — Runs CPU-bound spaCy work off the asyncio event loop.
+
+The NLP engines are synchronous and can take seconds on a long chapter. Calling
+them inside `async def` handlers froze every other request on the worker
+(autosaves included), so handlers now `await nlp_executor.run(...)` and the
+work happens in a small process pool.
+
+The pool is bounded: at most `workers + queue_limit` tasks may be in flight.
+Anything beyond that is rejected immediately with NLPBackpressureError rather
+than queueing unboundedly, and each task has a deadline (NLPTimeoutError).
+A task whose caller timed out is cancelled if it hasn't started; one a worker
+is already running stays in flight until it finishes, so backpressure
+counts the work the pool really has.
+
+Background work (consistency audits) goes through `run_background`, which
+waits instead of being rejected and only starts a task when a worker is idle
+and fewer than NLP_BACKGROUND_SLOTS background tasks are running, so
+interactive requests never queue behind an audit for more than one task.
+"""
+
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# 0 workers = run inline on a single background thread (handy for dev and tests)
+NLP_POOL_WORKERS = int(os.getenv("NLP_POOL_WORKERS", "2"))
+NLP_QUEUE_LIMIT = int(os.getenv("NLP_QUEUE_LIMIT", "16"))
+NLP_TASK_TIMEOUT = float(os.getenv("NLP_TASK_TIMEOUT", "60"))
+# spawn, not fork: forking a process that already runs an event loop and Mongo threads is unsafe
+NLP_POOL_START_METHOD = os.getenv("NLP_POOL_START_METHOD", "spawn")
+# Loading en_core_web_sm in a fresh process can take a while on cold disks
+NLP_WARMUP_TIMEOUT = float(os.getenv("NLP_WARMUP_TIMEOUT", "180"))
+# Background tasks running at once, and their deadline (a whole chapter or a first bible build)
+NLP_BACKGROUND_SLOTS = int(os.getenv("NLP_BACKGROUND_SLOTS", "1"))
+NLP_BACKGROUND_TIMEOUT = float(os.getenv("NLP_BACKGROUND_TIMEOUT", "600"))
+
+
+class NLPBackpressureError(RuntimeError):
+    """Raised when the pool already has as much work queued as it is allowed to hold."""
+
+
+class NLPTimeoutError(TimeoutError):
+    """Raised when a task does not finish within its deadline."""
+
+
+class StaleReplicaError(RuntimeError):
+    """Raised by a worker whose bible replica the deltas sent can't bring to the requested version."""
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# Task functions — executed inside the pool's worker processes.
+# Engines are imported here (not at module top) so the API process itself
+# never has to load a spaCy model.
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _task_kg_paragraphs(
+    paragraphs: List[str], scene_id: Union[str, List[str]], aliases: Optional[Dict[str, dict]] = None
+) -> List[Dict[str, Any]]:
+    from services.engines import get_engine
+    kg_engine = get_engine("kg")
+    if not kg_engine:
+        raise RuntimeError("KnowledgeGraphEngine not initialized")
+    return kg_engine.process_paragraphs(paragraphs, scene_id=scene_id, aliases=aliases)
+
+
+def _task_contradictions(
+    paragraphs: List[Tuple[int, str]],
+    script_id: str,
+    version: int,
+    deltas: Tuple[dict, ...] = (),
+    snapshot: Optional[dict] = None,
+) -> List[Dict]:
+    # Raises StaleReplicaError when this worker needs `snapshot` (see services/bible_replica.py)
+    from services.engines import get_engine
+    detector = get_engine("detector")
+    if not detector:
+        raise RuntimeError("ContradictionDetector not initialized")
+    return detector.check_script(paragraphs, script_id, version, deltas, snapshot)
+
+
+def _task_personas(text: str) -> List[Dict[str, Any]]:
+    from services.engines import get_engine
+    persona_gen = get_engine("personas")
+    if not persona_gen:
+        raise RuntimeError("PersonaGenerator not initialized")
+    return persona_gen.generate_personas(text)
+
+
+def _task_enhance(text: str) -> dict:
+    from services.engines import get_engine
+    enhancement_service = get_engine("enhancement")
+    if not enhancement_service:
+        raise RuntimeError("EnhancementService not initialized")
+    return enhancement_service.enhance_paragraph(text)
+
+
+def _task_query_entities(text: str) -> List[str]:
+    from ai.fact_checker import extract_query_entities
+    return extract_query_entities(text)
+
+
+def _task_warm_up() -> Dict[str, Any]:
+    # Loads the model and every engine in this worker so the first real request doesn't pay for it
+    from services.engines import warm_all
+    from ai.fact_checker import _get_nlp
+    engines = warm_all()
+    engines["fact_checker"] = {"state": "ready"} if _get_nlp() else {"state": "failed", "error": "spaCy model not available"}
+    return {"pid": os.getpid(), "engines": engines}
+
+
+def _task_worker_stats() -> Dict[str, Any]:
+    # Caches and models live in the workers, so their stats have to be read there
+    from services.nlp_registry import registry
+    from services.doc_cache import doc_cache
+    return {"pid": os.getpid(), "models": registry.report(), "doc_cache": doc_cache.stats()}
+
+
+TASKS: Dict[str, Callable[..., Any]] = {
+    "kg_paragraphs": _task_kg_paragraphs,
+    "contradictions": _task_contradictions,
+    "personas": _task_personas,
+    "enhance": _task_enhance,
+    "query_entities": _task_query_entities,
+    "warm_up": _task_warm_up,
+    "worker_stats": _task_worker_stats,
+}
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# Executor
+# ═════════════════════════════════════════════════════════════════════════════
+
+class NLPExecutor:
+    def __init__(
+        self,
+        workers: int = NLP_POOL_WORKERS,
+        queue_limit: int = NLP_QUEUE_LIMIT,
+        timeout: float = NLP_TASK_TIMEOUT,
+    ):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._pool: Optional[Executor] = None
+        # Only touched from the event loop thread, so a plain counter is enough
+        self._inflight = 0
+        self._background = 0
+        # Timed-out tasks a worker is still running (they stay counted in _inflight)
+        self._abandoned = 0
+        # Created lazily, inside the running loop; notified whenever a task finishes
+        self._released: Optional[asyncio.Condition] = None
+        self._notifying: Set[asyncio.Task] = set()
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        # Per-engine readiness as reported by the warm-up; empty until warm-up starts
+        self._engine_status: Dict[str, dict] = {}
+        self._warm_workers = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.queue_limit
+
+    def _get_pool(self) -> Executor:
+        # Created on first use so importing this module never spawns processes
+        if self._pool is None:
+            if self.workers <= 0:
+                self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nlp")
+            else:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(NLP_POOL_START_METHOD),
+                )
+        return self._pool
+
+    async def run(self, task: str, *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run a named task in the pool and await its result.
+        Raises NLPBackpressureError when the pool is saturated and NLPTimeoutError on deadline.
+        A task counts against capacity until its worker is done with it, even after its caller timed out.
+        """
+        fn = TASKS[task]
+        if self._inflight >= self.capacity:
+            self.rejected += 1
+            raise NLPBackpressureError(
+                f"NLP workers are busy ({self._inflight} tasks in flight). Please retry shortly."
+            )
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            submitted = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            raise
+        self._inflight += 1
+        # Registered before wrap_future's own callback, so the count drops before the caller resumes
+        submitted.add_done_callback(lambda _: self._call_soon(loop, self._task_finished))
+        future = asyncio.wrap_future(submitted, loop=loop)
+        # A caller that stops waiting leaves nobody to read the outcome
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            # Dropped if it hasn't started; otherwise the worker keeps running it and it stays in_flight
+            if not submitted.cancel():
+                self._abandoned += 1
+                submitted.add_done_callback(lambda _: self._call_soon(loop, self._abandoned_finished))
+            self.timed_out += 1
+            raise NLPTimeoutError(f"NLP task '{task}' exceeded {timeout or self.timeout:.0f}s")
+        except asyncio.CancelledError:
+            submitted.cancel()
+            raise
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM on a huge manuscript) — rebuild the pool for the next caller
+            self._discard_pool(pool)
+            raise
+        self.completed += 1
+        return result
+
+    @staticmethod
+    def _call_soon(loop: asyncio.AbstractEventLoop, callback: Callable[[], None]) -> None:
+        # Pool callbacks run on a worker-management thread; the counters belong to the loop
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            pass  # loop already closed (shutdown)
+
+    def _task_finished(self) -> None:
+        self._inflight -= 1
+        if self._released is not None:
+            notify = asyncio.get_running_loop().create_task(self._notify_released())
+            self._notifying.add(notify)
+            notify.add_done_callback(self._notifying.discard)
+
+    def _abandoned_finished(self) -> None:
+        self._abandoned -= 1
+
+    def _discard_pool(self, pool: Executor) -> None:
+        """Shut a broken pool down (its processes are gone or going) and drop it, unless already replaced."""
+        if self._pool is pool:
+            logger.error("NLP process pool broke; recreating it")
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run_background(self, task: str, *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run a named task at background priority: waits (never rejects) until a
+        worker is idle and a background slot is free, then runs it like `run`.
+        """
+        released = self._condition()
+        async with released:
+            await released.wait_for(self._background_admissible)
+            self._background += 1
+        try:
+            return await self.run(task, *args, timeout=timeout or NLP_BACKGROUND_TIMEOUT)
+        finally:
+            self._background -= 1
+            await self._notify_released()
+
+    def _background_admissible(self) -> bool:
+        return self._inflight < max(self.workers, 1) and self._background < NLP_BACKGROUND_SLOTS
+
+    def _condition(self) -> asyncio.Condition:
+        if self._released is None:
+            self._released = asyncio.Condition()
+        return self._released
+
+    async def _notify_released(self) -> None:
+        if self._released is not None:
+            async with self._released:
+                self._released.notify_all()
+
+    async def warm_up(self) -> Dict[str, dict]:
+        """
+        Load the engines in every worker. Started as a background task from the
+        app lifespan so the API can serve `/` while models are still loading.
+        """
+        self._engine_status = {
+            name: {"state": "loading"} for name in ("kg", "detector", "personas", "enhancement", "fact_checker")
+        }
+        # One call per worker: each blocks for the whole model load, so the pool
+        # hands them to different processes instead of queueing them on one
+        results = await asyncio.gather(
+            *[self.run("warm_up", timeout=NLP_WARMUP_TIMEOUT) for _ in range(max(self.workers, 1))],
+            return_exceptions=True,
+        )
+
+        # Every worker must have an engine loaded before it counts as ready,
+        # so the worst state reported by any worker wins
+        severity = {"ready": 0, "loading": 1, "cold": 1, "failed": 2}
+        merged: Dict[str, dict] = {}
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"NLP warm-up failed: {result}")
+                for name in self._engine_status:
+                    merged[name] = {"state": "failed", "error": str(result)}
+                continue
+            self._warm_workers += 1
+            for name, state in result["engines"].items():
+                current = merged.get(name)
+                if current is None or severity[state["state"]] > severity[current["state"]]:
+                    merged[name] = state
+        self._engine_status = merged
+        return self.readiness()
+
+    def readiness(self) -> Dict[str, dict]:
+        return {name: dict(state) for name, state in self._engine_status.items()}
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "mode": "process" if self.workers > 0 else "thread",
+            "in_flight": self._inflight,
+            "background": self._background,
+            "capacity": self.capacity,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "abandoned": self._abandoned,
+            "warm_workers": self._warm_workers,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Single executor per API process — shared by every router and flow
+nlp_executor = NLPExecutor()
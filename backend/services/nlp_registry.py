@@ -0,0 +1,112 @@
+"""
+nlp_registry.py — Process-wide registry of loaded spaCy pipelines.
+
+Every NLP service used to call `spacy.load("en_core_web_sm")` on its own, so a
+single worker held one copy of the model per service. The registry loads each
+pipeline once and hands the same `Language` object to every caller, while
+remembering which services asked for it so the sharing is visible.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Set
+
+import spacy
+from spacy.language import Language
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "en_core_web_sm"
+
+# ── Pipeline profiles ────────────────────────────────────────────────────────
+# Components each profile keeps; every other component of the shared model is
+# skipped for that call. None means "run everything".
+#   ner-only      — entities + POS tags (tagger/attribute_ruler map TAG → POS)
+#   parse-only    — dependency labels and sentence boundaries, no NER/lemmas
+#   tokenize-only — tokenizer output only
+PROFILES: Dict[str, Optional[Set[str]]] = {
+    "full": None,
+    "ner-only": {"tok2vec", "tagger", "attribute_ruler", "ner"},
+    "parse-only": {"tok2vec", "parser", "senter", "sentencizer"},
+    "tokenize-only": set(),
+}
+
+
+def disabled_components(nlp: Language, profile: str) -> List[str]:
+    """Names of the components `profile` skips in this particular pipeline."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown pipeline profile '{profile}'. Choose from: {', '.join(PROFILES)}")
+    enabled = PROFILES[profile]
+    if enabled is None:
+        return []
+    return [name for name in nlp.pipe_names if name not in enabled]
+
+
+def run_profile(nlp: Language, text: str, profile: str = "full"):
+    """
+    Process `text` with only the components of `profile`.
+    Uses the per-call `disable=` argument rather than `nlp.select_pipes()`: the
+    latter toggles components on the shared object and would leak into other
+    threads using the same model.
+    """
+    disabled = disabled_components(nlp, profile)
+    if len(disabled) == len(nlp.pipe_names) and disabled:
+        # Nothing left to run — skip the pipeline machinery entirely
+        return nlp.make_doc(text)
+    return nlp(text, disable=disabled)
+
+
+class NLPRegistry:
+    def __init__(self):
+        self._pipelines: Dict[str, Language] = {}
+        self._users: Dict[str, Set[str]] = {}
+        self._load_seconds: Dict[str, float] = {}
+        # Services are created from several modules (and later from threads),
+        # so loading must be serialized to avoid two concurrent spacy.load calls
+        self._lock = threading.Lock()
+
+    def get(self, service: str, model: str = DEFAULT_MODEL) -> Language:
+        """
+        Return the shared pipeline for `model`, loading it on first use.
+        `service` is only recorded for reporting — it never changes what is returned.
+        """
+        with self._lock:
+            nlp = self._pipelines.get(model)
+            if nlp is None:
+                started = time.perf_counter()
+                try:
+                    nlp = spacy.load(model)
+                except OSError:
+                    raise RuntimeError(
+                        f"spaCy model '{model}' not found. Please run: python -m spacy download {model}"
+                    )
+                self._pipelines[model] = nlp
+                self._load_seconds[model] = time.perf_counter() - started
+                logger.info(f"Loaded spaCy model '{model}' in {self._load_seconds[model]:.2f}s")
+            self._users.setdefault(model, set()).add(service)
+            return nlp
+
+    def is_loaded(self, model: str = DEFAULT_MODEL) -> bool:
+        return model in self._pipelines
+
+    def report(self) -> dict:
+        """Which pipelines are loaded, how long each took, and which services share it."""
+        with self._lock:
+            return {
+                model: {
+                    "pipes": list(nlp.pipe_names),
+                    "load_seconds": round(self._load_seconds.get(model, 0.0), 3),
+                    "services": sorted(self._users.get(model, set())),
+                }
+                for model, nlp in self._pipelines.items()
+            }
+
+
+# Single registry per process — imported by every NLP service
+registry = NLPRegistry()
+
+
+def get_nlp(service: str, model: str = DEFAULT_MODEL) -> Language:
+    """Shortcut used by services: `self.nlp = get_nlp("KnowledgeGraphEngine")`."""
+    return registry.get(service, model)
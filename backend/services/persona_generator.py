@@ -1,16 +1,15 @@
-import spacy
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from spacy.language import Language
+from services.nlp_registry import get_nlp
+from services.doc_cache import parse
 
 class PersonaGenerator:
-    def __init__(self):
-        try:
-            # We use the same model as the knowledge graph to share resources
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            raise RuntimeError("spaCy model 'en_core_web_sm' not found.")
+    def __init__(self, nlp: Optional[Language] = None):
+        # Same registry-owned model instance as the knowledge graph — no extra copy in memory
+        self.nlp = nlp or get_nlp("PersonaGenerator")
 
     def generate_personas(self, text: str) -> List[Dict[str, Any]]:
-        doc = self.nlp(text)
+        doc = parse(self.nlp, text)
         
         # Track mentions and traits for each PERSON entity
         personas: Dict[str, Dict[str, Any]] = {}
@@ -1,23 +1,23 @@
-import spacy
 import logging
-from typing import Tuple, List
-
-
+from typing import Optional, Tuple, List
+from spacy.language import Language
+from services.nlp_registry import get_nlp
+from services.doc_cache import parse
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 class StyleTransformer:
-    def __init__(self):
+    def __init__(self, nlp: Optional[Language] = None):
         """
         Initializes the Style Transformer with spaCy for rule-based matching.
         """
         logger.info("Initializing Style Transformer...")
 
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            logger.error("spaCy model 'en_core_web_sm' not found.")
+            self.nlp = nlp or get_nlp("StyleTransformer")
+        except RuntimeError as e:
+            logger.error(str(e))
             self.nlp = None
             
         # Basic dictionary for rule-based swaps (Fallback / Augmentation)
@@ -81,7 +81,8 @@ class StyleTransformer:
         if not self.nlp:
             return text, []
             
-        doc = self.nlp(text)
+        # Vocabulary swaps only look at token text, so the tokenizer is enough
+        doc = parse(self.nlp, text, profile="tokenize-only")
         tokens = []
         tags = []
         
@@ -0,0 +1,135 @@
+"""
+Test script for consistency-audit planning and background-priority NLP tasks.
+No spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_audit.py
+"""
+import sys
+import os
+import time
+import asyncio
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai.flow as flow
+from ai.audit import audit_chapters, chapters_scanned, plain_text, resume_index, sse_event
+from services.kg_incremental import split_paragraphs
+from services.nlp_executor import TASKS, NLPExecutor, StaleReplicaError
+
+
+def test_plain_text():
+    """Saved editor HTML gives the paragraphs the editor's innerText would."""
+    html = "<p>Chapter 1</p><div>Meera&nbsp;waited.<br>Arjun <b>did not</b>.</div><hr/><p>Chapter 2</p>"
+    assert split_paragraphs(plain_text(html)) == ["Chapter 1", "Meera\xa0waited.", "Arjun did not.", "Chapter 2"]
+    print("[PASS] Editor HTML to text")
+
+
+def test_chapters_and_resume():
+    """Chapters carry manuscript offsets; a resume continues after the last scanned scene."""
+    text = "Chapter 1\nMeera waited.\nChapter 2\nArjun left.\nChapter 3\nRain."
+    chapters = audit_chapters(text)
+    assert [c["scene"] for c in chapters] == ["chapter-1", "chapter-2", "chapter-3"], chapters
+    offset, paragraph = chapters[1]["paragraphs"][0]
+    assert text[offset:offset + len(paragraph)] == "Arjun left.", chapters
+    assert resume_index(chapters, {"scene": None, "chapter": 0}) == 0
+    assert resume_index(chapters, {"scene": "chapter-2", "chapter": 2}) == 2
+    # Chapter 1 was deleted since the checkpoint: still resumes after chapter 2
+    assert resume_index(chapters[1:], {"scene": "chapter-2", "chapter": 2}) == 1
+    # The scanned scene is gone entirely: fall back to the count
+    assert resume_index(chapters, {"scene": "prologue", "chapter": 1}) == 1
+    print("[PASS] Chapter plan and resume point")
+
+
+def test_chapters_scanned():
+    """Progress is read off the cursor, so scanning a chapter again after a resume doesn't count it twice."""
+    plan = [3, 2, 4]
+    assert chapters_scanned(plan, 0, 0) == 0
+    assert chapters_scanned(plan, 1, 1) == 4
+    assert chapters_scanned(plan, 3, 0) == sum(plan)
+    print("[PASS] Chapters scanned from the cursor")
+
+
+def test_sse_event():
+    assert sse_event("progress", {"found": 1}) == 'event: progress\ndata: {"found": 1}\n\n'
+    assert sse_event("contradiction", {}, event_id="a1").startswith("id: a1\nevent: contradiction\n")
+    print("[PASS] Event stream format")
+
+
+def test_background_priority():
+    """A background task waits for an idle worker; interactive tasks never wait for it."""
+    TASKS["_sleep"] = time.sleep
+    executor = NLPExecutor(workers=0, queue_limit=4)
+    order = []
+
+    async def interactive(name, seconds):
+        await executor.run("_sleep", seconds)
+        order.append(name)
+
+    async def background():
+        await executor.run_background("_sleep", 0)
+        order.append("background")
+
+    async def scenario():
+        first = asyncio.create_task(interactive("first", 0.2))
+        await asyncio.sleep(0.05)
+        audit = asyncio.create_task(background())
+        await asyncio.sleep(0.05)
+        # Arrives after the audit task but goes straight into the pool queue
+        second = asyncio.create_task(interactive("second", 0))
+        await asyncio.gather(first, audit, second)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+        del TASKS["_sleep"]
+    assert order == ["first", "second", "background"], order
+    print("[PASS] Background tasks yield to interactive ones")
+
+
+def test_pinned_bible_version():
+    """Every chapter is checked against one pinned version; the bible is sent to a worker once."""
+    replicas, sent = {}, []
+
+    def contradictions(paragraphs, script_id, version, deltas=(), snapshot=None):
+        sent.append((version, snapshot is not None))
+        if snapshot is not None:
+            replicas[script_id] = version
+        if replicas.get(script_id, -1) < version:
+            raise StaleReplicaError(script_id)
+        return []
+
+    original, flow.nlp_executor = flow.nlp_executor, NLPExecutor(workers=0)
+    TASKS["contradictions"], task = contradictions, TASKS["contradictions"]
+    source = (7, (), {"nodes": [], "links": [], "evidence": {}, "facts": {}})
+
+    async def scan():
+        for chapter in audit_chapters("Chapter 1\nMeera waited.\nChapter 2\nArjun left.\nChapter 3\nRain."):
+            await flow.check_contradictions("s1", chapter["paragraphs"], background=True, source=source)
+
+    try:
+        asyncio.run(scan())
+    finally:
+        flow.nlp_executor.shutdown()
+        flow.nlp_executor, TASKS["contradictions"] = original, task
+    assert sent == [(7, False), (7, True), (7, False), (7, False)], sent
+    print("[PASS] Audits check every chapter against one cached bible")
+
+
+def main():
+    print("=" * 60)
+    print("  Consistency audits — Test Suite")
+    print("=" * 60)
+    test_plain_text()
+    test_chapters_and_resume()
+    test_chapters_scanned()
+    test_sse_event()
+    test_background_priority()
+    test_pinned_bible_version()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Test script for the versioned story-bible cache and delta write-through.
+Pure Python — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_bible_cache.py
+"""
+import sys
+import os
+import asyncio
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bible_cache import BibleCache, estimate_bytes
+from services.kg_merge import apply_delta, empty_delta
+
+BIBLE = {
+    "nodes": [{"id": "Meera", "type": "PERSON", "count": 1, "mentions": ["s1"]},
+              {"id": "Arjun", "type": "PERSON", "count": 1, "mentions": ["s1"]}],
+    "links": [{"source": "Arjun", "target": "Meera", "relation": "meet", "count": 1,
+               "scenes": ["s1"], "evidence": ["e1"]}],
+    "evidence": {"e1": "Meera met Arjun."},
+}
+
+
+def test_versioned_hits():
+    """Same version is a hit; a newer header version reloads."""
+    cache = BibleCache()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return BIBLE
+
+    async def run():
+        await cache.get("s1", 1, load)
+        await cache.get("s1", 1, load)
+        await cache.get("s1", 2, load)
+
+    asyncio.run(run())
+    stats = cache.stats()
+    assert len(loads) == 2, loads
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 2, 0.333), stats
+    assert stats["bytes"] == estimate_bytes(BIBLE), stats
+    print("[PASS] Version-keyed hits and reloads")
+
+
+def test_concurrent_misses_share_one_load():
+    cache = BibleCache()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return BIBLE
+
+    async def run():
+        return await asyncio.gather(*(cache.get("s1", 1, load) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(loads) == 1 and all(r is BIBLE for r in results), loads
+    print("[PASS] Concurrent misses share one load")
+
+
+def test_bounds():
+    """Entry and byte limits evict least-recently-used bibles; oversized ones aren't cached."""
+    cache = BibleCache(max_entries=2)
+    for script_id in ("a", "b", "c"):
+        cache.put(script_id, 1, BIBLE)
+    assert cache.peek("a") is None and cache.peek("c") is BIBLE
+    assert cache.stats()["evictions"] == 1
+
+    tiny = BibleCache(max_bytes=estimate_bytes(BIBLE) - 1)
+    tiny.put("a", 1, BIBLE)
+    assert tiny.stats()["entries"] == 0 and tiny.stats()["bytes"] == 0
+    print("[PASS] LRU bounded by entries and bytes")
+
+
+def test_stale_put_is_ignored():
+    cache = BibleCache()
+    cache.put("s1", 3, BIBLE)
+    cache.put("s1", 2, {"nodes": [], "links": [], "evidence": {}})
+    assert cache.peek("s1", 3) is BIBLE
+    print("[PASS] Older versions never replace newer ones")
+
+
+def test_delta_log():
+    """Entries patched forward by a merge keep the deltas that led to them; a reload starts over."""
+    cache = BibleCache()
+    cache.put("s1", 1, BIBLE)
+    first, second = dict(empty_delta(2), base_version=1), dict(empty_delta(3), base_version=2)
+    cache.put("s1", 2, BIBLE, first)
+    cache.put("s1", 3, BIBLE, second)
+    assert cache.deltas("s1", 3) == (first, second) and cache.deltas("s1", 2) == ()
+    cache.put("s1", 5, BIBLE, dict(empty_delta(5), base_version=4))
+    assert cache.deltas("s1", 5) == ()
+    print("[PASS] Delta log for worker replicas")
+
+
+def test_apply_delta():
+    """A merge delta patches a copy of the cached bible."""
+    delta = empty_delta(1)
+    delta["nodes"]["added"] = [{"id": "Ann", "type": "PERSON", "count": 1, "mentions": ["s2"]}]
+    delta["nodes"]["removed"] = ["Meera"]
+    delta["links"]["removed"] = [{"source": "Arjun", "target": "Meera", "relation": "meet"}]
+    delta["links"]["added"] = [{"source": "Ann", "target": "Arjun", "relation": "call", "count": 1,
+                                "scenes": ["s2"], "evidence": ["e2"]}]
+    delta["evidence"] = {"added": {"e2": "Ann called Arjun."}, "removed": ["e1"]}
+
+    patched = apply_delta(BIBLE, delta)
+    assert [n["id"] for n in patched["nodes"]] == ["Arjun", "Ann"], patched
+    assert [l["source"] for l in patched["links"]] == ["Ann"], patched
+    assert patched["evidence"] == {"e2": "Ann called Arjun."}, patched
+    assert len(BIBLE["nodes"]) == 2, "input must be left untouched"
+
+    # An updated edge showing evidence the cache never held can't be patched
+    stale = empty_delta(1)
+    stale["links"]["updated"] = [dict(BIBLE["links"][0], evidence=["e1", "e9"])]
+    assert apply_delta(BIBLE, stale) is None
+    print("[PASS] Delta write-through")
+
+
+def main():
+    print("=" * 60)
+    print("  Story Bible Cache — Test Suite")
+    print("=" * 60)
+    test_versioned_hits()
+    test_concurrent_misses_share_one_load()
+    test_bounds()
+    test_stale_put_is_ignored()
+    test_delta_log()
+    test_apply_delta()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
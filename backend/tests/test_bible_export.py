@@ -0,0 +1,68 @@
+"""
+Test script for the columnar story-bible export used by the graph viewer.
+Pure Python + NumPy — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_bible_export.py
+"""
+import sys
+import os
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bible_export import MAGIC, encode_bible, decode_bible
+
+BIBLE = {
+    "nodes": [{"id": "Arjun", "type": "PERSON", "count": 3, "mentions": ["s1", "s2"]},
+              {"id": "Méera", "type": "PERSON", "count": 1, "mentions": ["s2"]},
+              {"id": "Mumbai", "type": "GPE", "count": 2, "mentions": []}],
+    "links": [{"source": "Arjun", "target": "Méera", "relation": "meet", "count": 2, "scenes": ["s2"],
+               "evidence": ["0123456789abcdef", "fedcba9876543210"]},
+              {"source": "Arjun", "target": "Mumbai", "relation": "leave", "count": 1, "scenes": ["s1"],
+               "evidence": ["0123456789abcdef"]}],
+    "evidence": {"0123456789abcdef": "Arjun met Méera and left Mumbai.", "fedcba9876543210": "Méera met Arjun."},
+}
+
+
+def test_round_trip():
+    """Everything but evidence text survives; strings are stored once."""
+    payload = encode_bible(BIBLE, 7)
+    assert payload[:4] == MAGIC
+    decoded = decode_bible(payload)
+    assert decoded == {"version": 7, "nodes": BIBLE["nodes"], "links": BIBLE["links"]}, decoded
+    assert b"Arjun met" not in payload, "evidence text must not be embedded"
+    assert payload.count("Méera".encode("utf-8")) == 1
+    print("[PASS] Round trip with interned strings")
+
+
+def test_column_alignment():
+    """Every column starts on a 4-byte boundary so the browser can view it as a Uint32Array."""
+    payload = encode_bible(BIBLE, 1)
+    header_length = int.from_bytes(payload[4:8], "little")
+    assert (8 + header_length) % 4 == 0
+    print("[PASS] Columns are aligned")
+
+
+def test_edge_cases():
+    """Empty bibles, dangling links and non-hash evidence ids."""
+    assert decode_bible(encode_bible({"nodes": [], "links": []}, 0)) == {"version": 0, "nodes": [], "links": []}
+    dangling = dict(BIBLE, links=BIBLE["links"] + [{"source": "Arjun", "target": "Ghost", "relation": "x"}])
+    assert len(decode_bible(encode_bible(dangling, 1))["links"]) == 2
+    legacy = dict(BIBLE, links=[dict(BIBLE["links"][0], evidence=["legacy-1"])])
+    assert decode_bible(encode_bible(legacy, 1))["links"][0]["evidence"] == ["legacy-1"]
+    print("[PASS] Edge cases")
+
+
+def main():
+    print("=" * 60)
+    print("  Story Bible Export — Test Suite")
+    print("=" * 60)
+    test_round_trip()
+    test_column_alignment()
+    test_edge_cases()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
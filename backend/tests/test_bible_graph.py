@@ -0,0 +1,80 @@
+"""
+Test script for the CSR story-bible graph (k-hop, shortest path, degree queries).
+Pure Python + NumPy/SciPy — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_bible_graph.py
+"""
+import sys
+import os
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bible_graph import BibleGraph
+
+
+def _link(source, target, relation, count=1):
+    return {"source": source, "target": target, "relation": relation, "count": count, "scenes": [], "evidence": []}
+
+
+BIBLE = {
+    "nodes": [{"id": n, "type": "PERSON"} for n in ("Arjun", "Meera", "Ravi", "Ann", "Kabir")]
+             + [{"id": "Mumbai", "type": "GPE"}],
+    "links": [_link("Arjun", "Meera", "meet", 3), _link("Arjun", "Meera", "call"),
+              _link("Meera", "Ravi", "call"), _link("Ann", "Ravi", "meet"),
+              _link("Arjun", "Mumbai", "visit"), _link("Ghost", "Arjun", "meet")],
+}
+
+
+def test_k_hop():
+    """Distances by hop, nearest first; filters and caps apply."""
+    graph = BibleGraph(BIBLE)
+    assert graph.k_hop(["Arjun"], 2) == {"Arjun": 0, "Meera": 1, "Mumbai": 1, "Ravi": 2}
+    assert graph.k_hop(["Arjun"], 3, relations=["meet"]) == {"Arjun": 0, "Meera": 1}
+    assert graph.k_hop(["Arjun"], 3, min_count=2) == {"Arjun": 0, "Meera": 1}
+    assert list(graph.k_hop(["Arjun"], 3, max_nodes=2)) == ["Arjun", "Meera"]
+    assert graph.k_hop(["Nobody"], 2) == {}
+    print("[PASS] k-hop neighbourhoods")
+
+
+def test_shortest_path():
+    graph = BibleGraph(BIBLE)
+    path = graph.shortest_path("Arjun", "Ann")
+    assert path == ["Arjun", "Meera", "Ravi", "Ann"], path
+    assert [l["relation"] for l in graph.path_links(path)] == ["meet", "call", "meet"]
+    assert graph.shortest_path("Arjun", "Ann", relations=["meet"]) is None
+    assert graph.shortest_path("Arjun", "Kabir") is None
+    print("[PASS] Shortest paths")
+
+
+def test_degree():
+    """Distinct neighbours — parallel relations count once; links to unknown nodes are ignored."""
+    graph = BibleGraph(BIBLE)
+    assert dict(zip(graph.ids, graph.degree().tolist()))["Arjun"] == 2
+    assert graph.top_by_degree(2) == [("Arjun", 2), ("Meera", 2)]
+    assert graph.top_by_degree(3, node_type="GPE") == [("Mumbai", 1)]
+    assert graph.top_by_degree(1, relations=["call"]) == [("Meera", 2)]
+    print("[PASS] Degree queries")
+
+
+def test_subgraph_links():
+    graph = BibleGraph(BIBLE)
+    assert len(graph.subgraph_links(["Arjun", "Meera"])) == 2
+    assert graph.subgraph_links([]) == []
+    print("[PASS] Induced subgraph")
+
+
+def main():
+    print("=" * 60)
+    print("  Bible Graph (CSR) — Test Suite")
+    print("=" * 60)
+    test_k_hop()
+    test_shortest_path()
+    test_degree()
+    test_subgraph_links()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
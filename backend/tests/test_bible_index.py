@@ -0,0 +1,69 @@
+"""
+Test script for the fact-checker retrieval index (token postings + adjacency).
+Pure Python — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_bible_index.py
+"""
+import sys
+import os
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bible_index import BibleIndex, normalize_tokens
+
+
+def _link(source, target, relation="meet", evidence=()):
+    return {"source": source, "target": target, "relation": relation, "count": 1,
+            "scenes": ["s1"], "evidence": list(evidence)}
+
+
+BIBLE = {
+    "nodes": [{"id": name, "type": "PERSON"} for name in ("Arjun Mehta", "Meera", "Ann", "Annual Fair", "Ravi")],
+    "links": [_link("Arjun Mehta", "Meera", evidence=["e1"]),
+              _link("Ann", "Meera", "call", evidence=["e2"]),
+              _link("Annual Fair", "Ravi")],
+    "evidence": {"e1": "Arjun Mehta met Meera.", "e2": "Ann called Meera."},
+}
+
+
+def test_normalize_tokens():
+    assert normalize_tokens("Arjun's  SISTER") == ["arjun", "sister"]
+    assert normalize_tokens("—") == []
+    print("[PASS] Token normalization")
+
+
+def test_match():
+    """Whole-token matching in both directions; no substring false positives."""
+    index = BibleIndex(BIBLE)
+    assert index.match(["arjun"]) == ["Arjun Mehta"]
+    assert index.match(["Meera's brother"]) == ["Meera"]
+    assert index.match(["Ann"]) == ["Ann"], "Ann must not match Annual Fair"
+    assert index.match(["Arj", "Nobody"]) == []
+    print("[PASS] Entity matching via the inverted index")
+
+
+def test_neighbourhood():
+    """1-hop subgraph: matched nodes first, each touching link once, only its evidence."""
+    index = BibleIndex(BIBLE)
+    subgraph = index.neighbourhood(["Meera", "Ann"])
+    assert [n["id"] for n in subgraph["nodes"]] == ["Meera", "Ann", "Arjun Mehta"], subgraph
+    assert len(subgraph["links"]) == 2, subgraph
+    assert subgraph["evidence"] == BIBLE["evidence"], subgraph
+    assert index.neighbourhood(["Ravi"])["evidence"] == {}
+    print("[PASS] Neighbourhood via the adjacency map")
+
+
+def main():
+    print("=" * 60)
+    print("  Bible Retrieval Index — Test Suite")
+    print("=" * 60)
+    test_normalize_tokens()
+    test_match()
+    test_neighbourhood()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Test script for the NLP workers' versioned bible replicas.
+Pure Python — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_bible_replica.py
+"""
+import sys
+import os
+
+import numpy as np
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bible_replica import BibleReplica
+from services.kg_facts import build_fact_index
+from services.kg_merge import apply_delta, empty_delta
+
+BIBLE = {
+    "nodes": [{"id": "Meera", "type": "PERSON", "count": 1, "mentions": ["s1"]},
+              {"id": "Arjun", "type": "PERSON", "count": 1, "mentions": ["s1"]}],
+    "links": [{"source": "Arjun", "target": "Meera", "relation": "meet", "count": 1,
+               "scenes": ["s1"], "evidence": ["e1"]}],
+    "evidence": {"e1": "Meera met Arjun in Mumbai."},
+    "facts": {"e1": {"subject": "Meera", "lemma": "meet", "negated": False}},
+}
+
+
+def _delta(base_version: int) -> dict:
+    delta = dict(empty_delta(base_version + 1), base_version=base_version)
+    delta["nodes"]["added"] = [{"id": "Ann", "type": "PERSON", "count": 1, "mentions": ["s2"]}]
+    delta["links"]["updated"] = [dict(BIBLE["links"][0], count=2, evidence=["e1", "e2"])]
+    delta["links"]["added"] = [{"source": "Ann", "target": "Arjun", "relation": "meet", "count": 1,
+                                "scenes": ["s2"], "evidence": ["e2"]}]
+    delta["evidence"] = {"added": {"e2": "Arjun did not meet Ann."}, "removed": []}
+    delta["facts"] = {"added": {"e2": {"subject": "Arjun", "lemma": "meet", "negated": True}}}
+    return delta
+
+
+def test_advance_matches_fresh_copy():
+    """Deltas applied in place give the bible, fact index and lexical scores a fresh load would."""
+    replica = BibleReplica(4, BIBLE)
+    delta = _delta(4)
+    assert replica.advance([_delta(3), delta]) and replica.version == 5
+
+    fresh_bible = apply_delta(BIBLE, delta)
+    fresh = BibleReplica(5, fresh_bible)
+    assert list(replica.nodes) == ["Meera", "Arjun", "Ann"]
+    assert list(replica.links.values()) == fresh_bible["links"]
+    assert replica.fact_index == build_fact_index(fresh_bible) == fresh.fact_index
+    sids = ["e1", "e2"]
+    assert np.allclose(replica.index.similarities("Arjun met Meera.", sids),
+                       fresh.index.similarities("Arjun met Meera.", sids))
+    print("[PASS] Advancing by deltas matches a fresh replica")
+
+
+def test_broken_chain():
+    """A gap in versions, a reset or unknown evidence means the replica needs a snapshot."""
+    assert not BibleReplica(4, BIBLE).advance([_delta(5)])
+    assert not BibleReplica(4, BIBLE).advance([dict(_delta(4), reset=True)])
+    unknown = _delta(4)
+    unknown["evidence"] = {"added": {}, "removed": []}
+    assert not BibleReplica(4, BIBLE).advance([unknown])
+    assert BibleReplica(4, BIBLE).advance([])
+    print("[PASS] Broken delta chains are refused")
+
+
+def main():
+    print("=" * 60)
+    print("  Bible Replica — Test Suite")
+    print("=" * 60)
+    test_advance_matches_fresh_copy()
+    test_broken_chain()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
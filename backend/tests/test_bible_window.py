@@ -0,0 +1,98 @@
+"""
+Test script for the windowed story-bible query builders and node-degree bookkeeping.
+Pure Python — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_bible_window.py
+"""
+import sys
+import os
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bible_window import projections, encode_cursor, decode_cursor, edge_filter, scene_range
+from services.kg_merge import fold_contributions, plan_merge
+
+
+def test_projections():
+    """Key fields always come back; evidence ids are capped; unknown fields are rejected."""
+    nodes, links = projections(["count"])
+    assert nodes == {"_id": 0, "id": 1, "count": 1}, nodes
+    assert links == {"_id": 0, "source": 1, "target": 1, "relation": 1, "count": 1}, links
+    _, links = projections(None)
+    assert "$slice" in links["evidence"], links
+    try:
+        projections(["sentence"])
+        assert False, "unknown field accepted"
+    except ValueError:
+        pass
+    print("[PASS] Field projection")
+
+
+def test_cursor():
+    """Cursors round-trip any edge key and page strictly after it."""
+    link = {"source": "Méera", "target": "Arjun \"A\" Mehta", "relation": "meet"}
+    assert decode_cursor(encode_cursor(link)) == ("Méera", "Arjun \"A\" Mehta", "meet")
+    for bad in ("zz", encode_cursor({"source": "a", "target": "b"})[:-4], "WzEsMiwzXQ=="):
+        try:
+            decode_cursor(bad)
+            assert False, f"bad cursor {bad!r} accepted"
+        except ValueError:
+            pass
+
+    query = edge_filter("s", cursor=encode_cursor(link))
+    after = query["$and"][1]["$or"]
+    assert after[0] == {"source": {"$gt": "Méera"}}, after
+    assert after[2] == {"source": "Méera", "target": "Arjun \"A\" Mehta", "relation": {"$gt": "meet"}}, after
+    assert edge_filter("s") == {"script_id": "s"}
+    print("[PASS] Keyset cursor")
+
+
+def test_type_and_scene_filters():
+    """Types match the end types stored on the edge; scenes are an ordinal range."""
+    query = edge_filter("s", types=["PERSON"])
+    assert query["$and"][1] == {"source_type": {"$in": ["PERSON"]}, "target_type": {"$in": ["PERSON"]}}, query
+    assert scene_range("s", 2, 5) == {"script_id": "s", "ordinal": {"$gte": 2, "$lte": 5}}
+    assert scene_range("s", last=0) == {"script_id": "s", "ordinal": {"$lte": 0}}
+    assert scene_range("s") == {"script_id": "s"}
+    print("[PASS] Type and scene-range filters")
+
+
+def test_degree_bookkeeping():
+    """New edges add one to both ends' degree, deleted edges take it away; importance follows."""
+    current_nodes = {"Arjun": {"id": "Arjun", "type": "PERSON", "count": 2, "mentions": ["s0"], "degree": 1},
+                     "Meera": {"id": "Meera", "type": "PERSON", "count": 1, "mentions": ["s0"], "degree": 1}}
+    current_edges = {("Arjun", "Meera", "meet"): {"source": "Arjun", "target": "Meera", "relation": "meet",
+                                                  "count": 1, "scenes": ["s0"], "evidence": []}}
+    # A paragraph adding an Arjun–Meera call, no new mentions; and one retracting the meeting
+    call = {"nodes": [{"id": "Arjun", "count": 0, "mentions": ["s0"]}, {"id": "Meera", "count": 0, "mentions": ["s0"]}],
+            "links": [{"source": "Arjun", "target": "Meera", "relation": "call", "count": 1, "scenes": ["s0"]}]}
+    meeting = {"links": [{"source": "Arjun", "target": "Meera", "relation": "meet", "count": 1}]}
+    _, writes = plan_merge("s", fold_contributions([(call, 1)]), current_nodes, current_edges, {})
+    incs = {op._filter["id"]: op._doc["$inc"].get("degree") for op in writes["kg_nodes"]}
+    assert incs == {"Arjun": 1, "Meera": 1}, incs
+    inserted = writes["kg_edges"][0]._doc["$setOnInsert"]
+    assert inserted == {"source_type": "PERSON", "target_type": "PERSON"}, inserted
+
+    delta, writes = plan_merge("s", fold_contributions([(meeting, -1)]), current_nodes, current_edges, {})
+    incs = {op._filter["id"]: op._doc["$inc"]["degree"] for op in writes["kg_nodes"]}
+    assert incs == {"Arjun": -1, "Meera": -1}, incs
+    scores = {n["id"]: (n["degree"], n["importance"]) for n in delta["nodes"]["updated"]}
+    assert scores == {"Arjun": (0, 2), "Meera": (0, 1)}, scores
+    print("[PASS] Degree bookkeeping")
+
+
+def main():
+    print("=" * 60)
+    print("  Story Bible Window — Test Suite")
+    print("=" * 60)
+    test_projections()
+    test_cursor()
+    test_type_and_scene_filters()
+    test_degree_bookkeeping()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
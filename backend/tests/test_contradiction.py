@@ -7,17 +7,19 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.knowledge_graph import KnowledgeGraphEngine
 from services.contradiction_detector import ContradictionDetector
+from services.kg_facts import build_fact_index
 
 def main():
     print("Initializing Knowledge Graph Engine...")
     kg_engine = KnowledgeGraphEngine()
     
     print("Initializing Contradiction Detector...")
-    detector = ContradictionDetector(kg_engine)
+    detector = ContradictionDetector(kg_engine.nlp)
     
     # Let's seed the graph with our previous story
     story = "Meera waited nervously in Mumbai, hoping Arjun would return safely."
-    kg_engine.process_text(story, scene_id="scene_001")
+    bible = kg_engine.process_text(story, scene_id="scene_001")
+    fact_index = build_fact_index(bible)
     print(f"\n[Story Bible established]: '{story}'\n")
     
     # Test cases
@@ -32,7 +34,7 @@ def main():
     
     for idx, sentence in enumerate(test_sentences):
         print(f"\nTEST {idx+1}: '{sentence}'")
-        flags = detector.check_sentence(sentence, scene_id="scene_002")
+        flags = detector.check_document([(0, sentence)], bible["nodes"], fact_index, bible["evidence"])
         
         if flags:
             print("❌ CONTRADICTION FOUND:")
@@ -0,0 +1,105 @@
+"""
+Test script for alias / canonical-entity resolution in the story bible.
+Pure Python — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_kg_aliases.py
+"""
+import sys
+import os
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.kg_aliases import AliasTable, alias_key, canonicalize, name_key
+from services.bible_index import BibleIndex
+
+
+def _paragraph(*names, links=(), evidence=None):
+    return {"nodes": [{"id": n, "type": "PERSON", "count": 1, "mentions": ["s1"]} for n in names],
+            "links": [{"source": s, "target": t, "relation": "meet", "count": 1, "scenes": ["s1"], "evidence": [e]}
+                      for s, t, e in links],
+            "evidence": evidence or {}}
+
+
+def test_alias_key():
+    """Gendered honorifics stay in the key; neutral titles and possessives don't."""
+    assert alias_key("Mr. Mehta's") == "mr mehta"
+    assert alias_key("Dr. Mehta") == "mehta"
+    assert alias_key("ARJUN  Mehta") == "arjun mehta"
+    assert alias_key("Dr.") == ""
+    assert name_key("Mrs. Mehta") == "mehta"
+    print("[PASS] Alias keys")
+
+
+def test_resolution():
+    """Longest name first; partial and honorific forms join it; ambiguity creates a new canonical."""
+    table = AliasTable()
+    resolved = table.resolve_contributions([(_paragraph("Arjun", "Mr. Mehta", "Arjun Mehta"), 1)])
+    assert [n["id"] for n in resolved[0][0]["nodes"]] == ["Arjun Mehta"], resolved
+    assert resolved[0][0]["nodes"][0]["count"] == 3, resolved
+    assert set(table.added) == {"arjun", "mr mehta", "arjun mehta"}, table.added
+
+    # A second Arjun makes a bare "Arjun" ambiguous — but the stored mapping stays put
+    assert table.resolve("Arjun Kapoor", "PERSON") == "Arjun Kapoor"
+    assert table.resolve("Arjun", "PERSON") == "Arjun Mehta"
+    assert table.resolve("Kapoor", "PERSON") == "Arjun Kapoor"
+
+    # Places are only merged on an exact key
+    assert table.resolve("York", "GPE") == "York"
+    assert table.resolve("New York", "GPE") == "New York"
+    print("[PASS] Surface forms resolve to canonical ids")
+
+
+def test_honorifics_keep_people_apart():
+    """Arjun Mehta is known as "Mr. Mehta", so "Mrs. Mehta" becomes her own entity."""
+    table = AliasTable()
+    table.resolve_contributions([(_paragraph("Arjun Mehta", "Mr. Mehta"), 1)])
+    assert table.resolve("Mrs. Mehta", "PERSON") == "Mrs. Mehta"
+    assert table.resolve("Mr Mehta", "PERSON") == "Arjun Mehta"
+    # Two Mehtas now: a bare surname is ambiguous
+    assert table.resolve("Mehta", "PERSON") == "Mehta"
+
+    # Rows keyed before honorifics were kept still resolve the surfaces they were made for
+    legacy = AliasTable({"mehta": {"canonical": "Arjun Mehta", "type": "PERSON"}})
+    assert legacy.canonical("Mr. Mehta") == "Arjun Mehta"
+    modern = AliasTable({"mehta": {"canonical": "Mehta", "type": "PERSON", "honorific": None}})
+    assert modern.canonical("Mrs. Mehta") == "Mrs. Mehta"
+    print("[PASS] Gendered honorifics are never folded together")
+
+
+def test_canonicalize_drops_self_links():
+    """A link between two aliases of one entity disappears with the evidence only it cited."""
+    table = AliasTable({"arjun": {"canonical": "Arjun Mehta", "type": "PERSON"},
+                        "arjun mehta": {"canonical": "Arjun Mehta", "type": "PERSON"}})
+    paragraph = _paragraph("Arjun", "Arjun Mehta", "Meera",
+                           links=[("Arjun", "Arjun Mehta", "e1"), ("Arjun", "Meera", "e2"), ("Arjun Mehta", "Meera", "e3")],
+                           evidence={"e1": "x", "e2": "y", "e3": "z"})
+    result = canonicalize(paragraph, table.canonical)
+    assert [(l["source"], l["target"], l["count"], l["evidence"]) for l in result["links"]] == \
+        [("Arjun Mehta", "Meera", 2, ["e2", "e3"])], result
+    assert set(result["evidence"]) == {"e2", "e3"}, result
+    print("[PASS] Contributions rewritten onto canonical ids")
+
+
+def test_index_matches_aliases():
+    bible = {"nodes": [{"id": "Arjun Mehta"}], "links": [],
+             "aliases": {"mehta": {"canonical": "Arjun Mehta", "type": "PERSON"}}}
+    assert BibleIndex(bible).match(["Mr. Mehta"]) == ["Arjun Mehta"]
+    print("[PASS] Retrieval follows aliases")
+
+
+def main():
+    print("=" * 60)
+    print("  KG Aliases — Test Suite")
+    print("=" * 60)
+    test_alias_key()
+    test_resolution()
+    test_honorifics_keep_people_apart()
+    test_canonicalize_drops_self_links()
+    test_index_matches_aliases()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
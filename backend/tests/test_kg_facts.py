@@ -0,0 +1,78 @@
+"""
+Test script for per-sentence fact features and the (entity, lemma) fact index.
+Pure Python — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_kg_facts.py
+"""
+import sys
+import os
+from types import SimpleNamespace
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.kg_facts import NO_VERB_RELATION, build_fact_index, fact_features, relation_lemma
+from services.kg_merge import apply_delta
+
+
+def tokens(*specs):
+    """(text, dep, pos, lemma) tuples → objects with spaCy's token attributes."""
+    return [SimpleNamespace(text=t, dep_=d, pos_=p, lemma_=l) for t, d, p, l in specs]
+
+
+def test_features():
+    """Subject is the first *subj token, negation any neg token, lemma the first verb or root."""
+    sent = tokens(("Meera", "nsubj", "PROPN", "Meera"), ("did", "aux", "AUX", "do"),
+                  ("not", "neg", "PART", "not"), ("wait", "ROOT", "VERB", "wait"))
+    assert relation_lemma(sent) == "wait"
+    assert fact_features(sent, "wait") == {"subject": "Meera", "lemma": "wait", "negated": True}
+    assert relation_lemma(tokens(("Mumbai", "npadvmod", "PROPN", "Mumbai"))) == NO_VERB_RELATION
+    print("[PASS] Sentence features")
+
+
+def test_fact_index():
+    """Both ends of a link are keyed with its relation; a sentence is listed once per key."""
+    bible = {
+        "links": [
+            {"source": "Arjun", "target": "Meera", "relation": "wait", "evidence": ["e1", "e2"]},
+            {"source": "Meera", "target": "Mumbai", "relation": "wait", "evidence": ["e1"]},
+            {"source": "Arjun", "target": "Meera", "relation": "call", "evidence": ["e3"]},
+        ],
+        "facts": {"e1": {"subject": "Meera", "lemma": "wait", "negated": False},
+                  "e3": {"subject": "Arjun", "lemma": "call", "negated": True}},
+    }
+    index = build_fact_index(bible)
+    assert [f["sid"] for f in index[("Meera", "wait")]] == ["e1", "e2"], index
+    assert [f["sid"] for f in index[("Mumbai", "wait")]] == ["e1"], index
+    assert index[("Arjun", "call")] == [{"sid": "e3", "negated": True, "subject": "Arjun"}], index
+    # Evidence stored before features were recorded: polarity unknown
+    assert index[("Arjun", "wait")][1] == {"sid": "e2", "negated": None, "subject": ""}, index
+    print("[PASS] (entity, lemma) index")
+
+
+def test_delta_patches_facts():
+    """The cached bible's facts follow evidence added and removed by a merge."""
+    bible = {"nodes": [], "links": [], "evidence": {"e1": "A.", "e2": "B."},
+             "facts": {"e1": {"subject": "", "lemma": "be", "negated": False}}}
+    delta = {"nodes": {"added": [], "updated": [], "removed": []},
+             "links": {"added": [], "updated": [], "removed": []},
+             "evidence": {"added": {"e3": "C."}, "removed": ["e1"]},
+             "facts": {"added": {"e3": {"subject": "", "lemma": "see", "negated": True}}}}
+    patched = apply_delta(bible, delta)
+    assert patched["facts"] == {"e3": {"subject": "", "lemma": "see", "negated": True}}, patched
+    print("[PASS] Facts patched by merge deltas")
+
+
+def main():
+    print("=" * 60)
+    print("  Fact features — Test Suite")
+    print("=" * 60)
+    test_features()
+    test_fact_index()
+    test_delta_patches_facts()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Test script for node importance ranking used to pick prompt context.
+Pure Python — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_kg_importance.py
+"""
+import sys
+import os
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.kg_importance import DEGREE_WEIGHT, importance, node_importance, rank_bible
+
+
+def test_score():
+    """Relationships weigh more than mentions; nodes without a stored score get one computed."""
+    assert importance(3, 2) == 3 + 2 * DEGREE_WEIGHT
+    assert node_importance({"id": "A", "count": 4, "degree": 1}) == 4 + DEGREE_WEIGHT
+    assert node_importance({"id": "A", "count": 4, "degree": 1, "importance": 99}) == 99
+    print("[PASS] Importance score")
+
+
+def test_rank_bible():
+    """The busy protagonist outranks an early, often-named backdrop; ties keep bible order."""
+    bible = {
+        "nodes": [{"id": "Mumbai", "count": 6, "degree": 0},
+                  {"id": "Ann", "count": 1, "degree": 1},
+                  {"id": "Arjun", "count": 3, "degree": 3},
+                  {"id": "Meera", "count": 1, "degree": 1}],
+        "links": [{"source": "Ann", "target": "Meera", "count": 1},
+                  {"source": "Arjun", "target": "Meera", "count": 1},
+                  {"source": "Ann", "target": "Arjun", "count": 2}],
+    }
+    ranked = rank_bible(bible)
+    assert [n["id"] for n in ranked["nodes"]] == ["Arjun", "Mumbai", "Ann", "Meera"], ranked["nodes"]
+    assert [(l["source"], l["target"]) for l in ranked["links"]] == \
+        [("Ann", "Arjun"), ("Arjun", "Meera"), ("Ann", "Meera")], ranked["links"]
+    assert [n["id"] for n in bible["nodes"]][0] == "Mumbai", "the bible itself is not reordered"
+    print("[PASS] Bible ranking")
+
+
+def main():
+    print("=" * 60)
+    print("  Node Importance — Test Suite")
+    print("=" * 60)
+    test_score()
+    test_rank_bible()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
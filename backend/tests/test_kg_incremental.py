@@ -0,0 +1,151 @@
+"""
+Test script for paragraph-level incremental story-bible bookkeeping.
+Pure Python — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_kg_incremental.py
+"""
+import sys
+import os
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.kg_incremental import (
+    MAX_EVIDENCE_PER_EDGE, split_paragraphs, paragraph_spans, paragraph_hash, diff_paragraphs, merge_link,
+)
+from services.kg_merge import fold_contributions, plan_merge
+
+
+def test_split_paragraphs():
+    """Newline runs separate paragraphs; blank lines and padding are dropped."""
+    text = "  Meera left.\n\n\nArjun stayed.  \n \nThe end."
+    paragraphs = split_paragraphs(text)
+    assert paragraphs == ["Meera left.", "Arjun stayed.", "The end."], paragraphs
+    # Same paragraphs, with their offsets in the text
+    assert [p for _, p in paragraph_spans(text)] == paragraphs
+    assert all(text[start:start + len(p)] == p for start, p in paragraph_spans(text))
+    print("[PASS] Paragraph splitting")
+
+
+def test_diff_paragraphs():
+    """Only unseen paragraphs are extracted; edits and deletions are detected."""
+    first = ["Meera met Arjun.", "Arjun left Mumbai."]
+    new, recounted, removed = diff_paragraphs(first, {})
+    assert list(new.values()) == first and not recounted and not removed
+    stored = {h: 1 for h in new}
+
+    # Nothing changed → nothing to do
+    assert diff_paragraphs(first, stored) == ({}, {}, [])
+
+    # Edit the second paragraph and repeat the first one
+    second = ["Meera met Arjun.", "Arjun left Delhi.", "Meera met Arjun."]
+    new, recounted, removed = diff_paragraphs(second, stored)
+    assert list(new.values()) == ["Arjun left Delhi."], new
+    assert recounted == {paragraph_hash("Meera met Arjun."): 2}, recounted
+    assert removed == [paragraph_hash("Arjun left Mumbai.")], removed
+    print("[PASS] Paragraph diff (new / recounted / removed)")
+
+
+def test_fold_contributions():
+    """Signed contributions collapse into one $inc delta per node / edge / evidence sentence."""
+    link = {"source": "Arjun", "target": "Meera", "relation": "meet", "count": 1, "scenes": ["s1"], "evidence": ["e1"]}
+    added = {"nodes": [{"id": "Meera", "type": "PERSON", "mentions": ["s1"], "count": 1}],
+             "links": [link],
+             "evidence": {"e1": "Meera met Arjun."},
+             "facts": {"e1": {"subject": "Meera", "lemma": "meet", "negated": False}}}
+    removed = {"nodes": [{"id": "Meera", "type": "PERSON", "mentions": ["s0"], "count": 3}],
+               "links": [dict(link, count=2, scenes=["s0"], evidence=["e0"])],
+               "evidence": {"e0": "Arjun met Meera long ago."}}
+
+    # The added paragraph appears twice in the text; the removed one appeared once
+    nodes, edges, evidence = fold_contributions([(added, 2), (removed, -1)])
+    assert nodes == {"Meera": {"type": "PERSON", "count": -1, "mentions": {"s1"}}}, nodes
+    assert edges == {("Arjun", "Meera", "meet"): {"count": 0, "scenes": {"s1"}, "evidence": {"e1"}}}, edges
+    assert evidence == {"e1": {"text": "Meera met Arjun.", "refs": 1,
+                               "fact": {"subject": "Meera", "lemma": "meet", "negated": False}},
+                        "e0": {"text": "Arjun met Meera long ago.", "refs": -1, "fact": None}}, evidence
+    print("[PASS] Delta folding")
+
+
+def test_plan_merge():
+    """The delta lists only what changed; retracted items and dead evidence are removed."""
+    current_nodes = {"Meera": {"id": "Meera", "type": "PERSON", "count": 1, "mentions": ["s0"]},
+                     "Arjun": {"id": "Arjun", "type": "PERSON", "count": 2, "mentions": ["s0"]}}
+    current_edges = {("Arjun", "Meera", "meet"): {"source": "Arjun", "target": "Meera", "relation": "meet",
+                                                  "count": 1, "scenes": ["s0"], "evidence": ["e0"]}}
+    current_evidence = {"e0": {"sid": "e0", "refs": 1}}
+
+    # Retract the paragraph behind the Arjun–Meera edge, add one mentioning Ann and Arjun
+    retracted = {"nodes": [{"id": "Meera", "count": 1}, {"id": "Arjun", "count": 1}],
+                 "links": [{"source": "Arjun", "target": "Meera", "relation": "meet", "count": 1}],
+                 "evidence": {"e0": "Arjun met Meera."}}
+    added = {"nodes": [{"id": "Ann", "type": "PERSON", "mentions": ["s1"], "count": 1},
+                       {"id": "Arjun", "type": "PERSON", "mentions": ["s1"], "count": 1}],
+             "links": [{"source": "Ann", "target": "Arjun", "relation": "call", "count": 1,
+                        "scenes": ["s1"], "evidence": ["e1"]}],
+             "evidence": {"e1": "Ann called Arjun."},
+             "facts": {"e1": {"subject": "Ann", "lemma": "call", "negated": False}}}
+
+    folded = fold_contributions([(retracted, -1), (added, 1)])
+    delta, writes = plan_merge("script", folded, current_nodes, current_edges, current_evidence)
+    assert delta["nodes"]["removed"] == ["Meera"], delta
+    assert [n["id"] for n in delta["nodes"]["added"]] == ["Ann"], delta
+    assert delta["nodes"]["updated"] == [{"id": "Arjun", "type": "PERSON", "count": 2, "mentions": ["s0", "s1"],
+                                          "degree": 0, "importance": 2}], delta
+    assert delta["links"]["removed"] == [{"source": "Arjun", "target": "Meera", "relation": "meet"}], delta
+    assert [l["target"] for l in delta["links"]["added"]] == ["Arjun"], delta
+    assert delta["evidence"] == {"added": {"e1": "Ann called Arjun."}, "removed": ["e0"]}, delta
+    assert delta["facts"] == {"added": {"e1": {"subject": "Ann", "lemma": "call", "negated": False}}}, delta
+    assert {name: len(ops) for name, ops in writes.items()} == {"kg_nodes": 3, "kg_edges": 2, "kg_evidence": 2}, writes
+    print("[PASS] Merge plan / delta")
+
+
+def test_merge_link_cap():
+    """merge_link keeps at most MAX_EVIDENCE_PER_EDGE sentence ids, however often an edge recurs."""
+    links = {}
+    for i in range(MAX_EVIDENCE_PER_EDGE + 3):
+        merge_link(links, {"source": "A", "target": "B", "relation": "meet", "count": 1,
+                           "scenes": ["s1"], "evidence": [f"e{i}"]})
+    (edge,) = links.values()
+    assert edge["count"] == MAX_EVIDENCE_PER_EDGE + 3, edge
+    assert len(edge["evidence"]) == MAX_EVIDENCE_PER_EDGE, edge
+    print("[PASS] Evidence sample is capped")
+
+
+def test_plan_merge_evidence_cap():
+    """Stored edges keep at most MAX_EVIDENCE_PER_EDGE ids: new ones are pushed with a $slice."""
+    stored = [f"e{i}" for i in range(MAX_EVIDENCE_PER_EDGE - 1)]
+    current_edges = {("A", "B", "meet"): {"source": "A", "target": "B", "relation": "meet",
+                                          "count": 1, "scenes": ["s1"], "evidence": stored}}
+    current_nodes = {n: {"id": n, "type": "PERSON", "count": 1, "mentions": ["s1"], "degree": 1} for n in "AB"}
+    added = {"links": [{"source": "A", "target": "B", "relation": "meet", "count": 1, "scenes": ["s1"],
+                        "evidence": ["x1", "x2", "x3"]}]}
+    delta, writes = plan_merge("script", fold_contributions([(added, 1)]), current_nodes, current_edges, {})
+    (update,) = [op._doc for op in writes["kg_edges"]]
+    assert update["$push"] == {"evidence": {"$each": ["x1"], "$slice": MAX_EVIDENCE_PER_EDGE}}, update
+    assert len(delta["links"]["updated"][0]["evidence"]) <= MAX_EVIDENCE_PER_EDGE, delta
+
+    # Already full: only the count moves
+    current_edges[("A", "B", "meet")]["evidence"] = stored + ["x1"]
+    _, writes = plan_merge("script", fold_contributions([(added, 1)]), current_nodes, current_edges, {})
+    (update,) = [op._doc for op in writes["kg_edges"]]
+    assert "$push" not in update and "$set" not in update, update
+    print("[PASS] Stored edge evidence is capped")
+
+
+def main():
+    print("=" * 60)
+    print("  Incremental KG — Test Suite")
+    print("=" * 60)
+    test_split_paragraphs()
+    test_diff_paragraphs()
+    test_fold_contributions()
+    test_plan_merge()
+    test_merge_link_cap()
+    test_plan_merge_evidence_cap()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Test script for chapter / scene segmentation of the manuscript.
+Pure Python — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_kg_scenes.py
+"""
+import sys
+import os
+from collections import Counter
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.kg_incremental import split_paragraphs, diff_paragraphs, paragraph_hash
+from services.kg_scenes import OPENING_SCENE, is_heading, split_scenes
+
+TEXT = ("A title page line.\n\n"
+        "CHAPTER I\nMeera met Arjun.\nPart of me knew she would leave.\n\n"
+        "Chapter 2: The Return\nArjun left Mumbai.\n"
+        "IV.\nThe end.\n"
+        "CHAPTER I\nAgain.")
+
+
+def test_headings():
+    """DocumentParser's heading patterns, minus prose that merely starts like one."""
+    assert is_heading("CHAPTER I") and is_heading("Chapter 2: The Return") and is_heading("IV.")
+    assert not is_heading("Part of me knew she would leave.")
+    assert not is_heading("Meera met Arjun.")
+    print("[PASS] Heading detection")
+
+
+def test_split_scenes():
+    """Stable slug ids, ordinals, heading / paragraph offsets; paragraphs split like split_paragraphs."""
+    scenes = split_scenes(TEXT)
+    assert [s["scene"] for s in scenes] == [OPENING_SCENE, "chapter-i", "chapter-2-the-return", "iv", "chapter-i-2"]
+    assert [s["ordinal"] for s in scenes] == list(range(5))
+    assert all(TEXT[s["start"]:].startswith(s["title"]) for s in scenes[1:])
+    body = [p for p in split_paragraphs(TEXT) if not is_heading(p)]
+    assert [p for s in scenes for p in s["paragraphs"]] == body
+    assert all(TEXT[o:o + len(p)] == p for s in scenes for o, p in zip(s["offsets"], s["paragraphs"]))
+
+    # Text added before a chapter moves its offset and ordinal, not its id
+    shifted = split_scenes(TEXT.replace("CHAPTER I\n", "Chapter 0\nA new scene.\nCHAPTER I\n", 1))
+    assert shifted[2]["scene"] == "chapter-i" and shifted[2]["ordinal"] == 2, shifted
+    assert shifted[2]["start"] > scenes[1]["start"]
+    assert split_scenes("") == []
+    assert [s["scene"] for s in split_scenes("No headings here.\nAt all.")] == [OPENING_SCENE]
+    print("[PASS] Scene splitting")
+
+
+def test_scene_keys():
+    """A paragraph moved to another scene is re-extracted; unmoved ones are not."""
+    stored = {paragraph_hash("Meera met Arjun.", "chapter-1"): 1, paragraph_hash("Arjun left.", "chapter-1"): 1}
+    new, recounted, removed = diff_paragraphs(["Meera met Arjun.", "Arjun left."], stored, ["chapter-1", "chapter-2"])
+    assert list(new.values()) == ["Arjun left."] and not recounted, new
+    assert removed == [paragraph_hash("Arjun left.", "chapter-1")], removed
+    print("[PASS] Scene-qualified paragraph keys")
+
+
+def test_chapter_without_heading():
+    """A chapter analysed without its heading is matched by text, so nothing it holds is counted twice."""
+    stored, counts = {}, Counter()  # kg_paragraphs {hash: text_hash}, node counts
+
+    def analyse(text, full_manuscript):
+        scenes = split_scenes(text)
+        paragraphs = [p for scene in scenes for p in scene["paragraphs"]]
+        scene_ids = [scene["scene"] for scene in scenes for _ in scene["paragraphs"]]
+        known_texts = None if full_manuscript else set(stored.values())
+        new, _, _ = diff_paragraphs(paragraphs, dict.fromkeys(stored, 1), scene_ids, known_texts)
+        for p_hash, paragraph in new.items():
+            stored[p_hash] = paragraph_hash(paragraph)
+            counts.update(word.strip(".") for word in paragraph.split() if word[0].isupper())
+        return new
+
+    analyse(TEXT, full_manuscript=True)
+    before = dict(counts)
+    chapter = "Arjun left Mumbai."  # Chapter 2's body, cut into the opening scene
+    assert diff_paragraphs([chapter], dict.fromkeys(stored, 1), [OPENING_SCENE]) != ({}, {}, [])
+    assert analyse(chapter, full_manuscript=False) == {}
+    assert dict(counts) == before, counts
+    # Text that is really new is still extracted
+    assert list(analyse("Arjun met Ann.", full_manuscript=False).values()) == ["Arjun met Ann."]
+    print("[PASS] Chapters without headings match stored paragraphs")
+
+
+def main():
+    print("=" * 60)
+    print("  KG Scenes — Test Suite")
+    print("=" * 60)
+    test_headings()
+    test_split_scenes()
+    test_scene_keys()
+    test_chapter_without_heading()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Test script for the incremental lexical index behind contradiction candidate search.
+Pure Python — no spaCy model or MongoDB connection needed.
+Run: uv run python tests/test_lexical_index.py
+"""
+import sys
+import os
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+import services.lexical_index as lexical_index
+from services.lexical_index import LexicalIndex
+
+EVIDENCE = {
+    "s1": "Meera waited nervously in Mumbai for Arjun.",
+    "s2": "Arjun left Mumbai before the monsoon.",
+    "s3": "The old clock in the hallway kept its stubborn rhythm.",
+    "s4": "Kabir trusted Meera with the letter.",
+}
+QUERY = "Meera did not wait in Mumbai."
+
+
+def test_matches_tfidf():
+    """Same cosine as a TfidfVectorizer fitted on the indexed sentences (query words all indexed)."""
+    query = "Arjun left Mumbai."
+    index = LexicalIndex()
+    index.add(EVIDENCE)
+    sids = list(EVIDENCE)
+    ours = index.similarities(query, sids)
+
+    vectorizer = TfidfVectorizer().fit(list(EVIDENCE.values()))
+    expected = cosine_similarity(vectorizer.transform([query]), vectorizer.transform(list(EVIDENCE.values())))[0]
+    assert np.allclose(ours, expected), (ours, expected)
+    assert int(np.argmax(ours)) == 1 and ours[2] == 0 and ours[3] == 0
+    # Words never seen in evidence still weigh in the query's norm, as they did when the query was fitted too
+    assert 0 < index.similarities(QUERY, ["s1"])[0] < 1
+    print("[PASS] Cosine matches TfidfVectorizer")
+
+
+def test_incremental_matches_fresh():
+    """Adding and removing sentences gives the scores a fresh build would."""
+    index = LexicalIndex()
+    index.add({sid: EVIDENCE[sid] for sid in ("s1", "s2", "s3")})
+    index.add({"s4": EVIDENCE["s4"], "s1": "ignored — already indexed"})
+    index.remove(["s3"])
+
+    fresh = LexicalIndex()
+    fresh.add({sid: EVIDENCE[sid] for sid in ("s1", "s2", "s4")})
+    sids = ["s1", "s2", "s3", "s4"]
+    assert np.allclose(index.similarities(QUERY, sids), fresh.similarities(QUERY, sids))
+    assert index.similarities(QUERY, ["s3"])[0] == 0
+    assert np.array_equal(index.df, fresh.df)
+    print("[PASS] Incremental add / remove")
+
+
+def test_sync_and_compact():
+    """sync applies an evidence delta; removed rows are compacted away once they dominate."""
+    original = lexical_index.MIN_COMPACT_ROWS
+    lexical_index.MIN_COMPACT_ROWS = 2
+    try:
+        index = LexicalIndex()
+        index.sync(EVIDENCE)
+        assert len(index) == 4
+        index.sync({"s4": EVIDENCE["s4"], "s5": "Arjun did not leave Mumbai."}, ["s1", "s2", "s3"])
+        assert set(index.row_of) == {"s4", "s5"}
+        assert index.matrix.shape[0] == 2  # 3 removed rows > 2 live ones
+
+        fresh = LexicalIndex()
+        fresh.add({"s4": EVIDENCE["s4"], "s5": "Arjun did not leave Mumbai."})
+        sids = ["s5", "s4"]
+        assert np.allclose(index.similarities("Arjun left Mumbai.", sids), fresh.similarities("Arjun left Mumbai.", sids))
+    finally:
+        lexical_index.MIN_COMPACT_ROWS = original
+    print("[PASS] Sync and compaction")
+
+
+def test_pairwise():
+    """One sparse product gives every (text, sentence) cosine similarities() gives one text at a time."""
+    index = LexicalIndex()
+    index.add(EVIDENCE)
+    texts = ["Arjun left Mumbai.", QUERY, "Nothing in common whatsoever"]
+    sids = ["s2", "unknown", "s1", "s4"]
+    matrix = index.pairwise(texts, sids)
+    assert matrix.shape == (3, 4)
+    expected = np.array([index.similarities(text, sids) for text in texts])
+    assert np.allclose(matrix.toarray(), expected), (matrix.toarray(), expected)
+    assert index.pairwise(texts, ["unknown"]).nnz == 0
+    print("[PASS] Pairwise similarity matrix")
+
+
+def main():
+    test_matches_tfidf()
+    test_incremental_matches_fresh()
+    test_sync_and_compact()
+    test_pairwise()
+    print("\nAll lexical index tests passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Test script for the LLM gateway: retries, deadlines, the concurrency cap and usage metrics.
+Uses a stand-in for the Groq client — no API key or network needed.
+Run: uv run python tests/test_llm_gateway.py
+"""
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LLM_BACKOFF_BASE", "0.01")
+
+import httpx
+from groq import BadRequestError, InternalServerError, RateLimitError
+
+from ai.llm_gateway import LLMError, LLMGateway, LLMTimeoutError, LLMUnavailableError, backoff_delay
+from ai.llm_scheduler import LLMScheduler
+
+
+def status_error(cls, status, headers=None):
+    response = httpx.Response(status, headers=headers, request=httpx.Request("POST", "https://api.groq.test"))
+    return cls(f"HTTP {status}", response=response, body=None)
+
+
+class FakeCompletions:
+    """Plays back `script` (exceptions or reply texts), optionally sleeping before each."""
+
+    def __init__(self, script, delay=0.0):
+        self.script = list(script)
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            step = self.script.pop(0) if self.script else "ok"
+            if isinstance(step, Exception):
+                raise step
+            usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=step))], usage=usage)
+        finally:
+            self.active -= 1
+
+
+def gateway_with(completions, **kwargs):
+    # A budget large enough never to wait — the scheduler has its own tests
+    gateway = LLMGateway(api_key="test", scheduler=LLMScheduler(tokens_per_minute=1e9), **kwargs)
+    gateway._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return gateway
+
+
+def test_retries_then_succeeds():
+    """429 and 5xx are retried; token usage and latency are recorded."""
+    fake = FakeCompletions([status_error(RateLimitError, 429), status_error(InternalServerError, 503), "reply"])
+    gateway = gateway_with(fake)
+    assert asyncio.run(gateway.chat([{"role": "user", "content": "hi"}], purpose="test")) == "reply"
+    report = gateway.stats()["purposes"]["test"]
+    assert fake.calls == 3 and report["retries"] == 2 and report["failures"] == 0, report
+    assert report["prompt_tokens"] == 10 and report["completion_tokens"] == 5, report
+    assert report["latency_ms"]["p50"] is not None, report
+    print("[PASS] Retries on 429 / 5xx")
+
+
+def test_gives_up():
+    """Client errors are not retried; retryable ones stop after max_retries."""
+    fake = FakeCompletions([status_error(BadRequestError, 400)])
+    try:
+        asyncio.run(gateway_with(fake).chat([], purpose="test"))
+        raise AssertionError("expected LLMError")
+    except LLMUnavailableError:
+        raise AssertionError("a 400 is not an availability problem")
+    except LLMError:
+        assert fake.calls == 1
+    fake = FakeCompletions([status_error(RateLimitError, 429, {"retry-after": "0"})] * 5)
+    try:
+        asyncio.run(gateway_with(fake, max_retries=2).chat([], purpose="test"))
+        raise AssertionError("expected LLMUnavailableError")
+    except LLMUnavailableError as e:
+        assert fake.calls == 3 and e.retry_after == 0, (fake.calls, e.retry_after)
+    print("[PASS] Non-retryable errors and retry limit")
+
+
+def test_failed_attempts_refund():
+    """Only the attempt that succeeded stays charged — at the usage the provider reported."""
+    scheduler = LLMScheduler(tokens_per_minute=60000)
+    fake = FakeCompletions([status_error(InternalServerError, 503), status_error(BadRequestError, 400)])
+    gateway = LLMGateway(api_key="test", scheduler=scheduler)
+    gateway._client = SimpleNamespace(chat=SimpleNamespace(completions=fake))
+    try:
+        asyncio.run(gateway.chat([], purpose="test"))
+        raise AssertionError("expected LLMError")
+    except LLMError:
+        pass
+    assert scheduler.bucket.level == 60000, scheduler.bucket.level
+    fake.script = [status_error(InternalServerError, 503), "reply"]
+    assert asyncio.run(gateway.chat([], purpose="test")) == "reply"
+    assert scheduler.bucket.level > 60000 - 100, scheduler.bucket.level
+    print("[PASS] Failed attempts give their budget back")
+
+
+def test_deadline():
+    fake = FakeCompletions(["late"], delay=0.5)
+    try:
+        asyncio.run(gateway_with(fake).chat([], purpose="test", deadline=0.1))
+        raise AssertionError("expected LLMTimeoutError")
+    except LLMTimeoutError:
+        pass
+    print("[PASS] Per-call deadline")
+
+
+def test_concurrency_cap():
+    fake = FakeCompletions([], delay=0.05)
+    gateway = gateway_with(fake, max_concurrency=2)
+
+    async def burst():
+        return await asyncio.gather(*[gateway.chat([], purpose="test") for _ in range(6)])
+
+    assert asyncio.run(burst()) == ["ok"] * 6
+    assert fake.peak == 2, fake.peak
+    print("[PASS] Global concurrency cap")
+
+
+def test_backoff():
+    """Full jitter stays under the cap and never undercuts Retry-After."""
+    assert all(0 <= backoff_delay(10) <= float(os.getenv("LLM_BACKOFF_MAX", "8")) for _ in range(100))
+    assert backoff_delay(0, retry_after=3.0) >= 3.0
+    print("[PASS] Jittered backoff")
+
+
+def main():
+    print("=" * 60)
+    print("  LLM gateway — Test Suite")
+    print("=" * 60)
+    test_retries_then_succeeds()
+    test_gives_up()
+    test_failed_attempts_refund()
+    test_deadline()
+    test_concurrency_cap()
+    test_backoff()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Test script for the tokens-per-minute bucket and the LLM priority classes.
+No API key or network needed.
+Run: uv run python tests/test_llm_scheduler.py
+"""
+import sys
+import os
+import asyncio
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.llm_errors import LLMShedError
+from ai.llm_scheduler import LLMScheduler, TokenBucket, estimate_tokens
+
+
+def test_bucket():
+    """600 tokens a minute = 10 a second; a floor keeps part of the bucket back."""
+    bucket = TokenBucket(600, 10, now=0.0)
+    assert bucket.take(500, 0, now=0.0) and bucket.level == 100
+    assert not bucket.take(200, 0, now=0.0)
+    assert bucket.wait_time(200, 0, now=0.0) == 10.0
+    assert bucket.take(200, 0, now=10.0)
+    assert not bucket.take(50, floor=100, now=10.0), "would dip into the reserve"
+    bucket.adjust(1000, now=10.0)
+    assert bucket.level == 600, "never above capacity"
+    bucket.drain(now=10.0)
+    assert bucket.level == 0
+    print("[PASS] Token bucket")
+
+
+def test_estimate():
+    messages = [{"role": "system", "content": "x" * 400}, {"role": "user", "content": "y" * 40}]
+    assert estimate_tokens(messages, max_tokens=100) == 100 + 4 + 10 + 4 + 100
+    print("[PASS] Token estimate")
+
+
+def test_priorities():
+    """With the budget gone, interactive calls are served first; suggestions queue behind them or are shed."""
+    # 100 tokens a second; suggestions keep 60 back
+    scheduler = LLMScheduler(
+        tokens_per_minute=6000, reserves={"interactive": 0.0, "suggestion": 0.01}, max_waits={"suggestion": 1.0},
+    )
+    order = []
+
+    async def call(priority, tokens):
+        loop = asyncio.get_running_loop()
+        try:
+            await scheduler.acquire(priority, tokens, expires=loop.time() + 5)
+            order.append(priority)
+        except LLMShedError:
+            order.append(f"{priority} shed")
+
+    async def scenario():
+        scheduler.throttled()
+        # Needs its 10 tokens above the 60 reserve (0.7s); the second one can't get in within the second
+        suggestion = asyncio.create_task(call("suggestion", 10))
+        late = asyncio.create_task(call("suggestion", 40))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive", 10))
+        await asyncio.gather(suggestion, late, interactive)
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert order == ["interactive", "suggestion", "suggestion shed"], order
+    assert stats["shed"]["suggestion"] == 1 and stats["granted"]["suggestion"] == 1, stats
+    assert set(stats["reserves"]) == {"interactive", "suggestion"}, stats
+    print("[PASS] Priority classes: interactive first, suggestions queued or shed")
+
+
+def test_refund():
+    """settle(charged, 0) gives a failed attempt's whole charge back."""
+    scheduler = LLMScheduler(tokens_per_minute=6000)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        charged = await scheduler.acquire("interactive", 500, expires=loop.time() + 1)
+        scheduler.settle(charged, 0)
+        return scheduler.bucket.level
+
+    assert asyncio.run(scenario()) == 6000
+    print("[PASS] Refund of a failed attempt")
+
+
+def main():
+    print("=" * 60)
+    print("  LLM scheduler — Test Suite")
+    print("=" * 60)
+    test_bucket()
+    test_estimate()
+    test_priorities()
+    test_refund()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Test script for the NLP executor's accounting: timed-out tasks keep counting
+against capacity until their worker is done with them.
+Uses the inline thread pool (workers=0) — no spaCy model needed.
+Run: uv run python tests/test_nlp_executor.py
+"""
+import sys
+import os
+import time
+import asyncio
+
+# Add parent dir to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.nlp_executor import TASKS, NLPExecutor, NLPTimeoutError
+
+
+def test_timeouts_stay_in_flight():
+    """A running task that timed out is still in flight; a queued one is dropped."""
+    TASKS["_sleep"] = time.sleep
+    executor = NLPExecutor(workers=0, queue_limit=4)
+
+    async def scenario():
+        running = asyncio.create_task(executor.run("_sleep", 0.3, timeout=0.05))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(executor.run("_sleep", 0, timeout=0.02))
+        for task in (running, queued):
+            try:
+                await task
+                raise AssertionError("expected NLPTimeoutError")
+            except NLPTimeoutError:
+                pass
+        await asyncio.sleep(0)
+        during = executor.stats()
+        await asyncio.sleep(0.4)
+        return during, executor.stats()
+
+    try:
+        during, after = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+        del TASKS["_sleep"]
+    assert during["in_flight"] == 1 and during["abandoned"] == 1 and during["timed_out"] == 2, during
+    assert after["in_flight"] == 0 and after["abandoned"] == 0, after
+    print("[PASS] Timed-out tasks count until their worker finishes")
+
+
+def main():
+    print("=" * 60)
+    print("  NLP executor — Test Suite")
+    print("=" * 60)
+    test_timeouts_stay_in_flight()
+    print("\n" + "=" * 60)
+    print("  All tests completed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
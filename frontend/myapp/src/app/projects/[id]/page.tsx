@@ -197,7 +197,7 @@ export default function ProjectEditorPage() {
         fetch(`http://localhost:8000/api/scripts/${activeScriptId}/analyze`, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ text: content }),
+          body: JSON.stringify({ text: content, full_manuscript: true }),
         }).catch(err => console.error("Failed to auto-analyze project:", err));
       }
     }, 2000);
@@ -785,7 +785,7 @@ export default function ProjectEditorPage() {
                   fetch(`http://localhost:8000/api/scripts/${scriptId}/analyze`, {
                     method: "POST",
                     headers: { "Content-Type": "application/json" },
-                    body: JSON.stringify({ text: content }),
+                    body: JSON.stringify({ text: content, full_manuscript: true }),
                   }).catch(err => console.error("KG re-analysis after accept failed:", err));
                 }
               }
@@ -1220,8 +1220,9 @@ export default function ProjectEditorPage() {
           onAfterSend={(message) => {
             if (!activeScriptId) return;
             const storyContent = editorRef.current?.innerText || "";
-            const textToCheck = storyContent.trim() ? storyContent : message;
-            orchestrateAnalysis(activeScriptId, textToCheck, true, message)
+            const hasStory = storyContent.trim().length > 0;
+            // Without story text the message is checked instead — it must not replace the story bible
+            orchestrateAnalysis(activeScriptId, hasStory ? storyContent : message, true, message, hasStory)
               .then(res => {
                 if (res.issues?.length > 0) {
                   setContradictions(res.issues);
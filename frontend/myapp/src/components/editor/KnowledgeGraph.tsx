@@ -1,7 +1,7 @@
 "use client";
 
 import { useState, useEffect, useRef, useCallback } from "react";
-import { KnowledgeGraphData, KGNode, KGLink, PositionedNode, fetchKnowledgeGraph } from "@/lib/knowledgeGraph";
+import { KnowledgeGraphData, KGNode, KGLink, PositionedNode, fetchKnowledgeGraph, fetchEvidence } from "@/lib/knowledgeGraph";
 
 // ─── Node type colors ─────────────────────────────────────────────────────────
 const NODE_COLORS: Record<string, { bg: string; border: string; text: string; glow: string }> = {
@@ -168,7 +168,8 @@ interface Props {
     setSelectedNode(null);
     setSelectedLink(null);
     try {
-      const data = await fetchKnowledgeGraph(trimmed, projectId);
+      // Patches the current graph with the analysis delta when possible
+      const data = await fetchKnowledgeGraph(trimmed, projectId, graphData);
       setGraphData(data);
       setLastAnalyzed(trimmed);
     } catch (e) {
@@ -176,7 +177,23 @@ interface Props {
     } finally {
       setLoading(false);
     }
-  }, [editorContent, projectId, lastAnalyzed]);
+  }, [editorContent, projectId, lastAnalyzed, graphData]);
+
+  // Evidence text isn't part of the graph download — load it when a link is opened
+  useEffect(() => {
+    if (!selectedLink || !graphData) return;
+    const missing = selectedLink.evidence.filter(id => !(id in graphData.evidence));
+    if (!missing.length) return;
+    let cancelled = false;
+    fetchEvidence(projectId, missing)
+      .then(found => {
+        // Ids the server no longer has are stored as "" so they aren't requested again
+        const loaded = Object.fromEntries(missing.map(id => [id, found[id] ?? ""]));
+        if (!cancelled) setGraphData(prev => prev && { ...prev, evidence: { ...prev.evidence, ...loaded } });
+      })
+      .catch(() => { /* the link still shows its count and scenes */ });
+    return () => { cancelled = true; };
+  }, [selectedLink, graphData, projectId]);
 
   // Get related links for a node
   const getNodeLinks = (nodeId: string) =>
@@ -570,7 +587,7 @@ interface Props {
                       <span style={{ fontWeight: 500, color: "#1a1510" }}>{other as string}</span>
                       <span style={{ color: "#9e9589" }}>{link.relation}</span>
                       <span style={{ marginLeft: "auto", fontSize: "0.7rem", color: "#b8b0a4" }}>
-                        {link.scene_id}
+                        {link.scenes.join(", ")}
                       </span>
                     </div>
                   );
@@ -603,10 +620,14 @@ interface Props {
                 </span>
               </div>
               <div style={{ background: "#faf7f4", borderRadius: "8px", padding: "0.6rem 0.8rem", borderLeft: "3px solid #c96a3b" }}>
-                <p style={{ fontSize: "0.78rem", color: "#4a4540", fontStyle: "italic", lineHeight: 1.6 }}>
-                  "{selectedLink.sentence}"
+                {selectedLink.evidence.filter(id => graphData?.evidence[id]).map(id => (
+                  <p key={id} style={{ fontSize: "0.78rem", color: "#4a4540", fontStyle: "italic", lineHeight: 1.6 }}>
+                    "{graphData?.evidence[id]}"
+                  </p>
+                ))}
+                <p style={{ fontSize: "0.7rem", color: "#9e9589", marginTop: "0.3rem" }}>
+                  {selectedLink.count} mention{selectedLink.count !== 1 ? "s" : ""} · {selectedLink.scenes.join(", ")}
                 </p>
-                <p style={{ fontSize: "0.7rem", color: "#9e9589", marginTop: "0.3rem" }}>{selectedLink.scene_id}</p>
               </div>
             </>
           )}
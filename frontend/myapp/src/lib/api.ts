@@ -131,12 +131,13 @@ export async function sendChatMessage(
   projectId: string,
   scriptId: string,
   context: string,
-  mode: string = "Standard"
+  mode: string = "Standard",
+  cursor?: number
 ): Promise<ChatMessage> {
   const res = await fetch(`http://localhost:8000/api/chat`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ messages, projectId, scriptId, context, mode }),
+    body: JSON.stringify({ messages, projectId, scriptId, context, mode, cursor }),
   });
   
   if (!res.ok) throw new Error(await res.text());
@@ -233,6 +234,7 @@ export interface AutoSuggestResponse {
 export async function autoSuggestTweaks(
   scriptId: string,
   recentText: string,
+  cursor?: number,
 ): Promise<AutoSuggestResponse> {
   const res = await fetch(`http://localhost:8000/api/analysis/auto-suggest-tweaks`, {
     method: "POST",
@@ -240,6 +242,7 @@ export async function autoSuggestTweaks(
     body: JSON.stringify({
       script_id: scriptId,
       recent_text: recentText,
+      cursor,
     }),
   });
 
@@ -348,17 +351,21 @@ export interface OrchestrateResult {
  * POST /api/scripts/{scriptId}/orchestrate
  * Runs the full analysis pipeline: KG build → contradiction detection → auto-suggestions.
  * Called after the user's first AI interaction on a script.
+ * Pass fullManuscript only when `text` is the whole script — anything else is only added to the story bible.
  */
 export async function orchestrateAnalysis(
   scriptId: string,
   text: string,
   runSuggestions: boolean = true,
   userMessage: string = "",
+  fullManuscript: boolean = false,
 ): Promise<OrchestrateResult> {
   const res = await fetch(`http://localhost:8000/api/scripts/${scriptId}/orchestrate`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ text, run_suggestions: runSuggestions, user_message: userMessage }),
+    body: JSON.stringify({
+      text, run_suggestions: runSuggestions, user_message: userMessage, full_manuscript: fullManuscript,
+    }),
   });
   if (!res.ok) throw new Error(await res.text());
   return res.json();
@@ -11,8 +11,9 @@ export interface KGLink {
   source: string;
   target: string;
   relation: string;
-  scene_id: string;
-  sentence: string;
+  count: number;
+  scenes: string[];
+  evidence: string[];
 }
 
 export interface KnowledgeGraphData {
@@ -21,6 +22,7 @@ export interface KnowledgeGraphData {
   graph: Record<string, unknown>;
   nodes: KGNode[];
   links: KGLink[];
+  evidence: Record<string, string>;
 }
 
 export interface PersonaTrait {
@@ -60,7 +62,7 @@ export async function fetchKnowledgeGraph(
   const analyzeRes = await fetch(`http://localhost:8000/api/scripts/${scriptId}/analyze`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ text: content }),
+    body: JSON.stringify({ text: content, full_manuscript: true }),
   });
   if (!analyzeRes.ok) throw new Error(await analyzeRes.text());
 
@@ -76,6 +78,7 @@ export async function fetchKnowledgeGraph(
     graph: {},
     nodes: data.nodes || [],
     links: data.links || [],
+    evidence: data.evidence || {},
   };
 }
 
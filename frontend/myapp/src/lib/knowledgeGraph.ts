@@ -5,14 +5,16 @@ export interface KGNode {
   id: string;           // entity text e.g. "Arjun"
   type: string;         // NER label: PERSON | GPE | ORG | EVENT | etc.
   mentions: string[];   // scene IDs where entity appears
+  count?: number;       // mentions across the manuscript
 }
 
 export interface KGLink {
-  source: string;       // subject entity id
-  target: string;       // object entity id
+  source: string;       // entity id (co-occurrence is undirected; ids are sorted)
+  target: string;       // entity id
   relation: string;     // verb connecting them e.g. "visited"
-  scene_id: string;
-  sentence: string;     // original text snippet
+  count: number;        // sentences supporting this (source, target, relation)
+  scenes: string[];     // scene IDs where the pair co-occurs
+  evidence: string[];   // capped sample of sentence ids — text lives in KnowledgeGraphData.evidence
 }
 
 export interface KnowledgeGraphData {
@@ -21,6 +23,26 @@ export interface KnowledgeGraphData {
   graph: Record<string, unknown>;
   nodes: KGNode[];
   links: KGLink[];
+  evidence: Record<string, string>;  // sentence id → original text snippet
+  aliases?: Record<string, KGAlias>; // normalized surface form → canonical entity
+  version?: number;     // story-bible version this view reflects
+}
+
+// One row of the per-script alias table — backend services/kg_aliases.py
+export interface KGAlias {
+  canonical: string;
+  type: string | null;
+}
+
+// What one /analyze call changed — backend ai/flow.py + services/kg_merge.py
+export interface KGDelta {
+  nodes: { added: KGNode[]; updated: KGNode[]; removed: string[] };
+  links: { added: KGLink[]; updated: KGLink[]; removed: Pick<KGLink, "source" | "target" | "relation">[] };
+  evidence: { added: Record<string, string>; removed: string[] };
+  aliases?: { added: Record<string, KGAlias> };
+  base_version: number; // version the delta applies on top of
+  version: number;      // version after applying it
+  reset: boolean;       // bible was rebuilt from scratch — refetch instead of patching
 }
 
 // ─── Positioned node for rendering ───────────────────────────────────────────
@@ -31,36 +53,131 @@ export interface PositionedNode extends KGNode {
   vy: number;
 }
 
+// ─── Delta patching ───────────────────────────────────────────────────────────
+
+const linkKey = (l: Pick<KGLink, "source" | "target" | "relation">) => `${l.source}\u0000${l.target}\u0000${l.relation}`;
+
+/**
+ * Apply a KGDelta to the graph currently on screen.
+ * Returns null when the delta doesn't stack on this view (stale version, or a
+ * full rebuild) — the caller should refetch the whole story bible then.
+ */
+export function applyKGDelta(graph: KnowledgeGraphData, delta: KGDelta): KnowledgeGraphData | null {
+  if (delta.reset || graph.version === undefined || graph.version !== delta.base_version) return null;
+  if (delta.version === delta.base_version) return graph;
+
+  const removedNodes = new Set(delta.nodes.removed);
+  const changedNodes = new Map([...delta.nodes.updated, ...delta.nodes.added].map(n => [n.id, n]));
+  const nodes = graph.nodes
+    .filter(n => !removedNodes.has(n.id))
+    .map(n => changedNodes.get(n.id) ?? n);
+  const knownNodes = new Set(nodes.map(n => n.id));
+  nodes.push(...delta.nodes.added.filter(n => !knownNodes.has(n.id)));
+
+  const removedLinks = new Set(delta.links.removed.map(linkKey));
+  const changedLinks = new Map([...delta.links.updated, ...delta.links.added].map(l => [linkKey(l), l]));
+  const links = graph.links
+    .filter(l => !removedLinks.has(linkKey(l)))
+    .map(l => changedLinks.get(linkKey(l)) ?? l);
+  const knownLinks = new Set(links.map(linkKey));
+  links.push(...delta.links.added.filter(l => !knownLinks.has(linkKey(l))));
+
+  const evidence = { ...graph.evidence, ...delta.evidence.added };
+  delta.evidence.removed.forEach(id => delete evidence[id]);
+
+  const aliases = { ...graph.aliases, ...delta.aliases?.added };
+
+  return { ...graph, nodes, links, evidence, aliases, version: delta.version };
+}
+
+// ─── Columnar export decoding — backend services/bible_export.py ─────────────
+// "QKG1" | u32 header length | header JSON | 4-byte aligned little-endian columns.
+// Columns are viewed in place as typed arrays; only the string tables are parsed.
+
+interface ExportHeader {
+  version: number;
+  strings: { ids: string[]; types: string[]; relations: string[]; scenes: string[]; sids?: string[] };
+  columns: { name: string; dtype: "u1" | "u4"; length: number }[];
+}
+
+export function decodeStoryBibleExport(buffer: ArrayBuffer): KnowledgeGraphData {
+  const bytes = new Uint8Array(buffer);
+  if (String.fromCharCode(...bytes.subarray(0, 4)) !== "QKG1") throw new Error("Not a story-bible export");
+  const headerLength = new DataView(buffer).getUint32(4, true);
+  const header: ExportHeader = JSON.parse(new TextDecoder().decode(bytes.subarray(8, 8 + headerLength)));
+
+  const col: Record<string, Uint8Array | Uint32Array> = {};
+  let offset = 8 + headerLength;
+  for (const { name, dtype, length } of header.columns) {
+    col[name] = dtype === "u1" ? new Uint8Array(buffer, offset, length) : new Uint32Array(buffer, offset, length);
+    const size = length * (dtype === "u1" ? 1 : 4);
+    offset += size + ((4 - (size % 4)) % 4);
+  }
+
+  const { ids, types, relations, scenes } = header.strings;
+  const sids = header.strings.sids ?? Array.from({ length: col.evidence_sids.length / 8 }, (_, i) =>
+    Array.from(col.evidence_sids.subarray(i * 8, i * 8 + 8), b => b.toString(16).padStart(2, "0")).join("")
+  );
+  const list = (name: string, i: number, table: string[]) =>
+    Array.from(col[name].subarray(col[`${name}_offsets`][i], col[`${name}_offsets`][i + 1]), v => table[v]);
+
+  const nodes: KGNode[] = ids.map((id, i) => ({
+    id,
+    type: types[col.node_type[i]],
+    count: col.node_count[i],
+    mentions: list("node_mentions", i, scenes),
+  }));
+  const links: KGLink[] = Array.from(col.edge_source, (source, i) => ({
+    source: ids[source],
+    target: ids[col.edge_target[i]],
+    relation: relations[col.edge_relation[i]],
+    count: col.edge_count[i],
+    scenes: list("edge_scenes", i, scenes),
+    evidence: list("edge_evidence", i, sids),
+  }));
+
+  // Evidence text is fetched per link on demand (fetchEvidence)
+  return { directed: false, multigraph: true, graph: {}, nodes, links, evidence: {}, version: header.version };
+}
+
 // ─── API call ─────────────────────────────────────────────────────────────────
 
+async function fetchStoryBible(projectId: string): Promise<KnowledgeGraphData> {
+  const res = await fetch(`http://localhost:8000/api/scripts/${projectId}/story_bible/export`);
+  if (!res.ok) throw new Error(await res.text());
+  return decodeStoryBibleExport(await res.arrayBuffer());
+}
+
+/** GET /api/scripts/{id}/story_bible/evidence — sentence texts for the given evidence ids. */
+export async function fetchEvidence(projectId: string, ids: string[]): Promise<Record<string, string>> {
+  if (!ids.length) return {};
+  const query = ids.map(id => `sid=${encodeURIComponent(id)}`).join("&");
+  const res = await fetch(`http://localhost:8000/api/scripts/${projectId}/story_bible/evidence?${query}`);
+  if (!res.ok) throw new Error(await res.text());
+  return (await res.json()).evidence || {};
+}
+
 /**
- * POST /api/knowledge-graph
- * Sends story content to backend, gets back graph data.
- * Backend runs NLP (spaCy NER + relation extraction) and returns NetworkX node_link_data().
+ * POST /api/scripts/{id}/analyze
+ * Sends story content to backend; only edited paragraphs are re-extracted and
+ * the response carries the resulting KGDelta. When `current` is the view the
+ * delta applies to, it is patched in place of refetching the whole bible.
  */
 export async function fetchKnowledgeGraph(
   content: string,
-  projectId: string
+  projectId: string,
+  current?: KnowledgeGraphData | null
 ): Promise<KnowledgeGraphData> {
   // 1. Analyze the content to update the knowledge graph
   const analyzeRes = await fetch(`http://localhost:8000/api/scripts/${projectId}/analyze`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ text: content }),
+    body: JSON.stringify({ text: content, full_manuscript: true }),
   });
   if (!analyzeRes.ok) throw new Error(await analyzeRes.text());
+  const { kg_delta: delta } = await analyzeRes.json();
 
-  // 2. Fetch the updated knowledge graph
-  const res = await fetch(`http://localhost:8000/api/scripts/${projectId}/story_bible`);
-  if (!res.ok) throw new Error(await res.text());
-  
-  const data = await res.json();
-  
-  return {
-    directed: true,
-    multigraph: true,
-    graph: {},
-    nodes: data.nodes || [],
-    links: data.links || [],
-  };
-}
\ No newline at end of file
+  // 2. Patch the current view, or fetch the updated knowledge graph
+  const patched = current && delta ? applyKGDelta(current, delta) : null;
+  return patched ?? fetchStoryBible(projectId);
+}